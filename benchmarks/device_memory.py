@@ -0,0 +1,104 @@
+"""Memory benchmark of WebastoDevice with and without raw payloads.
+
+Run with `python benchmarks/device_memory.py [devices]`.
+"""
+
+import gc
+import json
+import sys
+import tracemalloc
+
+from pywebasto.device import WebastoDevice
+
+SETTINGS = json.dumps(
+    {
+        "settings_tab": [
+            {
+                "group": "general",
+                "options": [
+                    {"key": "allow_GPS", "value": True, "type": "bool"},
+                    {"key": "low_voltage_cutoff", "value": 11.5, "type": "float"},
+                    {"key": "ext_temp_comp", "value": -1.0, "type": "float"},
+                ]
+                + [
+                    {"key": f"option_{index}", "value": index, "type": "int"}
+                    for index in range(20)
+                ],
+            },
+            {
+                "group": "webasto",
+                "options": [
+                    {"key": "OUTH", "value": "ON", "timeout": 1800},
+                    {"key": "OUTV", "value": "OFF", "timeout": 1800},
+                ],
+            },
+            {
+                "group": "outputs",
+                "options": [
+                    {"key": "OUT1", "value": "OFF", "timeout": 600},
+                    {"key": "OUT2", "value": "OFF", "timeout": 600},
+                ],
+            },
+        ]
+    }
+)
+LAST_DATA = json.dumps(
+    {
+        "temperature": "18C",
+        "voltage": "12.4V",
+        "location": {"state": "ON", "lat": "55.0", "lon": "12.0", "timestamp": 1},
+        "connection_lost": False,
+        "outputs": [
+            {
+                "line": line,
+                "state": "OFF",
+                "name": "",
+                "icon": "car_heat",
+                "timers": [
+                    {"type": "simple", "start": 420, "duration": 1800, "repeat": 31}
+                ],
+            }
+            for line in ("OUTH", "OUT1", "OUT2")
+        ],
+    }
+)
+DEV_DATA = json.dumps(
+    {
+        "subscription": {"expiration": 1766325670},
+        "connection_lost": False,
+        "account_info": {"devices": [["1", "Heater"]]},
+    }
+)
+
+
+def bytes_per_device(count: int, keep_payloads: bool) -> float:
+    """Return the traced memory per refreshed device."""
+    gc.collect()
+    tracemalloc.start()
+    devices = []
+    for index in range(count):
+        device = WebastoDevice(str(index), f"Heater {index}", keep_payloads)
+        # Each device gets its own decoded payloads, as from the API
+        device.settings = json.loads(SETTINGS)
+        device.last_data = json.loads(LAST_DATA)
+        device.dev_data = json.loads(DEV_DATA)
+        devices.append(device)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / count
+
+
+def main() -> None:
+    """Print bytes per device for both modes."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    full = bytes_per_device(count, keep_payloads=True)
+    compact = bytes_per_device(count, keep_payloads=False)
+    print(f"devices:                {count}")
+    print(f"keep_payloads=True:     {full:8.0f} bytes/device")
+    print(f"keep_payloads=False:    {compact:8.0f} bytes/device")
+    print(f"saved:                  {1 - compact / full:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Replay a recorded cassette and report request counts and CPU time.
+
+Record a cassette by passing `cassette=Cassette(path, mode="record")` to a
+client running the usual workload of `connect()` followed by refreshes, then
+compare client versions offline with
+`PYTHONPATH=. python benchmarks/replay.py traffic.jsonl.gz [--updates N]`.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from time import perf_counter, process_time
+
+from pywebasto import Cassette, WebastoConnect
+
+
+async def replay(args: argparse.Namespace) -> dict:
+    """Replay `connect()` and full refreshes from the cassette."""
+    cassette = Cassette(args.cassette, realtime=args.realtime)
+    webasto = WebastoConnect(
+        "replay",
+        "replay",
+        refresh_interval=0,
+        sessions=args.sessions,
+        cassette=cassette,
+    )
+    wall = perf_counter()
+    cpu = process_time()
+    try:
+        await webasto.connect()
+        for _ in range(args.updates):
+            await webasto.update(force=True)
+    finally:
+        await webasto.close()
+
+    requests = webasto.stats()["requests"]
+    return {
+        "recorded_exchanges": len(cassette.exchanges),
+        "devices": len(webasto.devices),
+        "requests": {name: data["count"] for name, data in requests.items()},
+        "total_requests": sum(data["count"] for data in requests.values()),
+        "wall_seconds": perf_counter() - wall,
+        "cpu_seconds": process_time() - cpu,
+    }
+
+
+def main() -> None:
+    """Replay the cassette and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cassette")
+    parser.add_argument("--updates", type=int, default=1)
+    parser.add_argument("--sessions", type=int, default=1)
+    parser.add_argument("--realtime", action="store_true")
+    args = parser.parse_args()
+
+    sys.stdout.write(json.dumps(asyncio.run(replay(args)), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Benchmark suite running WebastoConnect against the local API simulator.
+
+Measures requests per refresh cycle, latency percentiles of `update()`,
+`save_timers` and output commands, full refresh throughput by fleet size, the
+time per traced phase of a refresh and CPU time spent parsing payloads in
+`WebastoDevice`. Results are written as JSON, so runs of different releases
+can be compared.
+
+Run with `PYTHONPATH=. python benchmarks/suite.py [--output results.json]`.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+from datetime import datetime, timezone
+from importlib import metadata
+from time import perf_counter, process_time
+
+from pywebasto import SimpleTimer, SpanCollector, WebastoConnect
+from pywebasto.device import WebastoDevice
+from pywebasto.simulator import SimulatedDevice, WebastoSimulator
+
+DEFAULT_FLEET_SIZES = (1, 10, 100, 1000)
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """Summarize latency samples in milliseconds."""
+    if len(samples) < 2:
+        samples = samples * 2
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+
+
+def _client(
+    simulator: WebastoSimulator, sessions: int, **kwargs: object
+) -> WebastoConnect:
+    """Create a client for the simulator without the refresh guard."""
+    return WebastoConnect(
+        "user",
+        "pass",
+        refresh_interval=0,
+        sessions=sessions,
+        api_url=simulator.api_url,
+        **kwargs,
+    )
+
+
+async def requests_per_refresh(args: argparse.Namespace) -> dict:
+    """Count the requests of a full refresh and of a single device refresh."""
+    results = {}
+    for devices in (1, 10):
+        async with WebastoSimulator(devices=devices) as simulator:
+            webasto = _client(simulator, args.sessions)
+            try:
+                await webasto.connect()
+                simulator.reset_counters()
+                await webasto.update(force=True)
+                full = dict(simulator.requests)
+
+                simulator.reset_counters()
+                device_id = next(iter(simulator.devices))
+                await webasto.update(device_id=device_id, force=True)
+                single = dict(simulator.requests)
+            finally:
+                await webasto.close()
+
+        results[str(devices)] = {
+            "full_refresh": {"total": sum(full.values()), "by_path": full},
+            "device_refresh": {"total": sum(single.values()), "by_path": single},
+        }
+    return results
+
+
+async def operation_latency(args: argparse.Namespace) -> dict:
+    """Measure latency percentiles of refreshes, timer saves and commands."""
+    samples: dict[str, list[float]] = {
+        "update": [],
+        "update_device": [],
+        "save_timers": [],
+        "set_output_main": [],
+    }
+    async with WebastoSimulator(
+        devices=args.latency_devices, latency=args.latency, jitter=args.jitter, seed=1
+    ) as simulator:
+        webasto = _client(simulator, args.sessions)
+        try:
+            await webasto.connect()
+            devices = list(webasto.devices.values())
+            for iteration in range(args.iterations):
+                device = devices[iteration % len(devices)]
+                timers = [SimpleTimer(start=420 + iteration, duration=1800, repeat=31)]
+                operations = {
+                    "update": lambda: webasto.update(force=True),
+                    "update_device": lambda: webasto.update(
+                        device_id=device.device_id, force=True
+                    ),
+                    "save_timers": lambda: webasto.save_timers(device, timers),
+                    "set_output_main": lambda: webasto.set_output_main(
+                        device, iteration % 2 == 0
+                    ),
+                }
+                for name, operation in operations.items():
+                    start = perf_counter()
+                    await operation()
+                    samples[name].append(perf_counter() - start)
+        finally:
+            await webasto.close()
+
+    return {name: percentiles(values) for name, values in samples.items()}
+
+
+async def fleet_throughput(args: argparse.Namespace) -> dict:
+    """Measure full refresh throughput for each fleet size."""
+    results = {}
+    for devices in args.fleet:
+        async with WebastoSimulator(
+            devices=devices, latency=args.latency, jitter=args.jitter, seed=1
+        ) as simulator:
+            webasto = _client(simulator, args.sessions)
+            try:
+                await webasto.connect()
+                simulator.reset_counters()
+                start = perf_counter()
+                await webasto.update(force=True)
+                elapsed = perf_counter() - start
+            finally:
+                await webasto.close()
+
+        requests = sum(simulator.requests.values())
+        results[str(devices)] = {
+            "seconds": elapsed,
+            "requests": requests,
+            "devices_per_second": devices / elapsed,
+            "requests_per_second": requests / elapsed,
+        }
+    return results
+
+
+async def phase_breakdown(args: argparse.Namespace) -> dict:
+    """Break a full refresh down into the time spent per traced phase."""
+    collector = SpanCollector(max_spans=None)
+    async with WebastoSimulator(
+        devices=args.latency_devices, latency=args.latency, jitter=args.jitter, seed=1
+    ) as simulator:
+        webasto = _client(simulator, args.sessions, trace_hooks=[collector])
+        try:
+            await webasto.connect()
+            collector.clear()
+            await webasto.update(force=True)
+        finally:
+            await webasto.close()
+
+    return collector.summary()
+
+
+def parsing_cpu(args: argparse.Namespace) -> dict:
+    """Measure CPU time spent assigning payloads to devices."""
+    source = SimulatedDevice("1", "Heater")
+    source.timers["OUTH"] = [
+        {"type": "simple", "start": 420, "duration": 1800, "repeat": 31}
+    ]
+    settings = source.settings()
+    last_data = source.service_data()
+    dev_data = {**last_data, "account_info": {"devices": [["1", "Heater"]]}}
+
+    results = {}
+    for keep_payloads in (True, False):
+        device = WebastoDevice("1", "Heater", keep_payloads)
+        start = process_time()
+        for _ in range(args.parse_iterations):
+            device.settings = settings
+            device.last_data = last_data
+            device.dev_data = dev_data
+        elapsed = process_time() - start
+        results["keep_payloads" if keep_payloads else "compact"] = {
+            "iterations": args.parse_iterations,
+            "cpu_seconds": elapsed,
+            "us_per_refresh": elapsed / args.parse_iterations * 1_000_000,
+        }
+    return results
+
+
+def _version() -> str | None:
+    """Return the installed pywebasto version, if any."""
+    try:
+        return metadata.version("pywebasto")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Run all benchmarks."""
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "pywebasto": _version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sessions": args.sessions,
+            "latency": args.latency,
+            "jitter": args.jitter,
+        },
+        "requests_per_refresh": await requests_per_refresh(args),
+        "latency": await operation_latency(args),
+        "fleet_throughput": await fleet_throughput(args),
+        "phase_breakdown": await phase_breakdown(args),
+        "parsing_cpu": parsing_cpu(args),
+    }
+
+
+def main() -> None:
+    """Run the suite and write the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write results to this file")
+    parser.add_argument(
+        "--fleet",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_FLEET_SIZES),
+        help="fleet sizes for the throughput benchmark",
+    )
+    parser.add_argument("--sessions", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--latency-devices", type=int, default=5)
+    parser.add_argument("--parse-iterations", type=int, default=10_000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,22 @@
 import asyncio
 import json
 import logging
+import os
 import sys
-from time import monotonic
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import asynccontextmanager
+from contextvars import Context, ContextVar
+from time import monotonic, time
 
 import aiohttp
 
 from .device import WebastoDevice
 
-from .consts import (
-    API_URL,
-    CMD_AUX1_OFF,
-    CMD_AUX1_ON,
-    CMD_AUX2_OFF,
-    CMD_AUX2_ON,
-    CMD_HEATER_OFF,
-    CMD_HEATER_ON,
-    CMD_VENTILATION_OFF,
-    CMD_VENTILATION_ON,
-)
+from .cache import INVALIDATED_BY, ResponseCache
+from .cassette import Cassette, RecordingSession, ReplaySession
+from .consts import API_URL, OUTPUT_COMMANDS
 from .enums import Outputs, Request
+from .events import ChangeListener, ChangeNotifier, DeviceChange
 from .exceptions import (
     ForbiddenException,
     InvalidRequestException,
@@ -29,17 +26,53 @@ from .exceptions import (
     TooManyRequestsException,
     UnauthorizedException,
 )
-from .timer import SimpleTimer
+from .history import HistoryStore, SQLiteHistoryStore
+from .metrics import RequestMetrics
+from .poller import DevicePoller, PollIntervals
+from .ratelimit import RateLimiter, parse_retry_after
+from .schedule import Activation, TimerConflict, TimerSchedule
+from .session import ApiSession, SessionPool, cookie_lifetime
+from .settings import SettingsTransaction
+from .singleflight import SingleFlight
+from .store import FileSessionStore, SessionStore
+from .telemetry import DeviceHistory, TelemetrySample
+from .timer import SimpleTimer, extract_simple_timers
+from .tracing import SpanCollector, TraceHook, Tracer
 
 if sys.version_info < (3, 11, 0):
     sys.exit("The pywebasto module requires Python 3.11.0 or later")
 
-__all__ = ["WebastoConnect", "SimpleTimer"]
+__all__ = [
+    "WebastoConnect",
+    "SimpleTimer",
+    "RateLimiter",
+    "PollIntervals",
+    "DeviceChange",
+    "SettingsTransaction",
+    "SessionStore",
+    "FileSessionStore",
+    "RequestMetrics",
+    "TraceHook",
+    "SpanCollector",
+    "Cassette",
+    "DeviceHistory",
+    "TelemetrySample",
+    "HistoryStore",
+    "SQLiteHistoryStore",
+    "TimerSchedule",
+    "Activation",
+    "TimerConflict",
+]
 
 LOGGER = logging.getLogger(__name__)
 REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=60, connect=10, sock_read=45)
 DEFAULT_REFRESH_INTERVAL = 15
 MAX_READ_RETRIES = 2
+# Sessions are renewed this many seconds before they expire, at most
+SESSION_REFRESH_MARGIN = 60.0
+# Shorter lifetimes are not learned, those sessions were most likely revoked.
+# Sessions are not renewed sooner after their login either.
+MIN_LEARNED_SESSION_LIFETIME = 300.0
 RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
 RETRYABLE_REQUESTS = {
     Request.LOGIN,
@@ -58,63 +91,414 @@ class WebastoConnect:
         username: str,
         password: str,
         refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        sessions: int = 1,
+        concurrent_reads: bool = True,
+        cache_ttls: dict[Request, float] | None = None,
+        rate_limiter: RateLimiter | None = None,
+        keep_payloads: bool = True,
+        optimistic_delay: float | None = None,
+        session_store: SessionStore | str | os.PathLike | None = None,
+        auto_login: bool = True,
+        session_lifetime: float | None = None,
+        api_url: str = API_URL,
+        trace_hooks: Iterable[TraceHook] | None = None,
+        cassette: Cassette | None = None,
+        history_samples: int | None = None,
+        history_minutes: int = 60,
+        history_hours: int = 24,
+        history_store: HistoryStore | str | os.PathLike | None = None,
     ) -> None:
-        """Initialize the component."""
+        """Initialize the component.
+
+        `sessions` sets how many logged-in API sessions are kept for the account.
+        Each session has its own cookie and active device, so refreshes and
+        commands for different devices can run concurrently.
+
+        `concurrent_reads` fetches the settings and data reads of a device refresh
+        in parallel. Set it to `False` to send them one after another.
+
+        `cache_ttls` maps read request types to how many seconds a response is
+        reused by later refreshes, e.g. `{Request.GET_SETTINGS: 3600}`. Writes
+        drop the cached responses they affect.
+
+        `rate_limiter` throttles all requests client-side and adapts to `429`
+        responses from the API.
+
+        `keep_payloads` keeps the raw API payloads on each device next to the
+        parsed values. Set it to `False` to drop them and save memory.
+
+        `optimistic_delay` makes output commands and settings changes return as
+        soon as they are sent. Output states and the ventilation mode are applied
+        to the device locally, and all changes are confirmed by one refresh once
+        no further writes were sent to the device for that many seconds.
+
+        `session_store` keeps the session cookies between process runs, so
+        `connect()` can skip the login while the stored session is accepted.
+        Pass a `SessionStore` or the path of a file for a `FileSessionStore`.
+
+        `auto_login` logs a session in again when the API rejects its cookie,
+        and replays the rejected request once. Sessions are also renewed in the
+        background shortly before they expire. The expiry comes from the cookie,
+        from `session_lifetime` in seconds, or is learned from rejected cookies.
+        Renewals wait at least five minutes after a login.
+
+        `api_url` points the client at another API base URL, e.g. a local
+        `pywebasto.simulator.WebastoSimulator`.
+
+        `trace_hooks` receive nested spans of each operation, request attempt
+        and connection phase, e.g. a `SpanCollector`.
+
+        `cassette` records all API exchanges to a file, or replays them from
+        one without contacting the API, see `Cassette`.
+
+        `history_samples` keeps a fixed-memory telemetry history of each device,
+        with that many raw refreshes plus the last `history_minutes` per-minute
+        and `history_hours` per-hour aggregates, see `history()`. Set either to
+        `0` to not keep that resolution.
+
+        `history_store` persists the telemetry of every device refresh in
+        batches, without blocking the event loop. Pass a `HistoryStore` or the
+        path of a database file for an `SQLiteHistoryStore`.
+        """
         self._usn: str = username
         self._pwd: str = password
-        self._hssess: str | None = None
-        self._hssess_webclient: str | None = None
+        self._pool = SessionPool(sessions)
+        self._active_session: ContextVar[ApiSession | None] = ContextVar(
+            f"pywebasto_session_{id(self)}", default=None
+        )
+        # Device selected by the current operation, kept while its session logs in
+        self._operation_device: ContextVar[str | None] = ContextVar(
+            f"pywebasto_operation_device_{id(self)}", default=None
+        )
+        self._refresh_cycle: ContextVar[
+            dict[tuple[str | None, Request], dict | None] | None
+        ] = ContextVar(f"pywebasto_refresh_cycle_{id(self)}", default=None)
         self._data: dict | None = None
-        self._session: aiohttp.ClientSession | None = None
+        self._session: (
+            aiohttp.ClientSession | RecordingSession | ReplaySession | None
+        ) = None
+        self._cassette = cassette
+        self._history_samples = history_samples
+        self._history_minutes = history_minutes
+        self._history_hours = history_hours
+        self._history: dict[str, DeviceHistory] = {}
+        # Stores created from a path are closed with the client
+        self._owns_history_store = isinstance(history_store, str | os.PathLike)
+        if isinstance(history_store, str | os.PathLike):
+            history_store = SQLiteHistoryStore(history_store)
+        self._history_store = history_store
         self._refresh_interval = refresh_interval
+        self._concurrent_reads = concurrent_reads
+        self._keep_payloads = keep_payloads
+        self._optimistic_delay = optimistic_delay
+        if isinstance(session_store, str | os.PathLike):
+            session_store = FileSessionStore(session_store)
+        self._session_store = session_store
+        self._auto_login = auto_login
+        self._session_lifetime = session_lifetime
+        self._api_url = api_url.rstrip("/")
+        self._renewal_tasks: dict[int, asyncio.Task] = {}
+        self._lazy = False
+        self._hydration_task: asyncio.Task | None = None
+        self._confirm_due: dict[str, float] = {}
+        self._confirm_tasks: dict[str, asyncio.Task] = {}
+        self._cache = ResponseCache(cache_ttls)
+        self._rate_limiter = rate_limiter
+        self._inflight = SingleFlight()
+        self._writes: dict[str | None, int] = {}
+        self._last_write: dict[str, float] = {}
+        self._poller: DevicePoller | None = None
+        self._notifier = ChangeNotifier()
         self._last_full_update: float | None = None
         self._last_device_update: dict[str, float] = {}
         self._update_lock = asyncio.Lock()
+        self._device_update_locks: dict[str, asyncio.Lock] = {}
+        self.metrics = RequestMetrics()
+        self.tracer = Tracer(trace_hooks or ())
+        self.schedule = TimerSchedule()
 
         self.devices: dict[int, WebastoDevice] = {}
 
-    async def connect(self) -> None:
-        """Connect to the API."""
-        await self._call(Request.LOGIN, {"username": self._usn, "password": self._pwd})
-        if self._hssess is None and self._hssess_webclient is None:
+    @property
+    def _hssess(self) -> str | None:
+        """Return the `hssess` cookie of the primary session."""
+        return self._pool.primary.hssess
+
+    @_hssess.setter
+    def _hssess(self, value: str | None) -> None:
+        """Set the `hssess` cookie of the primary session."""
+        self._pool.primary.hssess = value
+
+    @property
+    def _hssess_webclient(self) -> str | None:
+        """Return the `hssess-webclient` cookie of the primary session."""
+        return self._pool.primary.hssess_webclient
+
+    @_hssess_webclient.setter
+    def _hssess_webclient(self, value: str | None) -> None:
+        """Set the `hssess-webclient` cookie of the primary session."""
+        self._pool.primary.hssess_webclient = value
+
+    async def connect(self, lazy: bool = False, hydrate: bool = False) -> None:
+        """Connect to the API.
+
+        With `lazy`, only the device list of the account is loaded. Each device
+        is then hydrated with its data on first use, by `get_device()`, or, with
+        `hydrate`, progressively in the background.
+        """
+        with self.tracer.span("connect", lazy=lazy):
+            if await self._restore_sessions():
+                try:
+                    await self._initial_update(lazy)
+                except UnauthorizedException:
+                    LOGGER.debug("Stored session was rejected, logging in again")
+                else:
+                    self._start_hydration(lazy and hydrate)
+                    return
+
+            await self._login_all()
+            await self._initial_update(lazy)
+            self._start_hydration(lazy and hydrate)
+
+    async def _initial_update(self, lazy: bool) -> None:
+        """Load the device list, and the data of all devices unless `lazy`."""
+        self._lazy = lazy
+        if not lazy:
+            await self.update(force=True)
+            return
+
+        async with self._hold_session():
+            self._data = await self._read(None, Request.GET_DATA_NOPOLL)
+        self._sync_device_list()
+
+    async def get_device(self, device_id: str) -> WebastoDevice:
+        """Return a device, hydrating it with its data first if needed."""
+        await self._ensure_hydrated(device_id)
+        return self.devices[device_id]  # type: ignore[index]
+
+    async def _ensure_hydrated(self, device_id: str) -> None:
+        """Refresh a device that was never refreshed."""
+        if device_id not in self._last_device_update:
+            await self.update(device_id=device_id)
+
+    async def _hydrate_before_write(self, device: WebastoDevice) -> None:
+        """Hydrate a device of a lazy connection before writing its state."""
+        if self._lazy:
+            await self._ensure_hydrated(device.device_id)
+
+    def _start_hydration(self, enabled: bool) -> None:
+        """Hydrate all devices in the background."""
+        if not enabled or (
+            self._hydration_task is not None and not self._hydration_task.done()
+        ):
+            return
+
+        # Run in an empty context so no session binding of the caller leaks in
+        self._hydration_task = asyncio.get_running_loop().create_task(
+            self._hydrate_all(), context=Context()
+        )
+
+    async def _hydrate_all(self) -> None:
+        """Hydrate devices one by one, so other operations are not starved."""
+        for device_id in list(self.devices):
+            try:
+                await self._ensure_hydrated(device_id)  # type: ignore[arg-type]
+            except Exception as err:
+                # The device is hydrated again on first use
+                LOGGER.debug("Hydrating device %s failed: %s", device_id, err)
+
+    async def _login_all(self, missing_only: bool = False) -> None:
+        """Log in the pooled sessions, or only those without a session cookie."""
+        if not (missing_only and self._pool.primary.logged_in):
+            await self._login(self._pool.primary)
+
+        # Extra pool sessions are independent logins for the same account
+        await asyncio.gather(
+            *(
+                self._login(session)
+                for session in self._pool.sessions[1:]
+                if not (missing_only and session.logged_in)
+            )
+        )
+
+        await self._save_sessions()
+
+    async def _restore_sessions(self) -> bool:
+        """Reuse stored session cookies, returning whether any were restored."""
+        if self._session_store is None:
+            return False
+
+        try:
+            stored = await self._session_store.load(self._usn)
+        except (OSError, ValueError) as err:
+            LOGGER.debug("Could not load stored sessions: %s", err)
+            return False
+
+        for session, cookies in zip(self._pool.sessions, stored):
+            session.restore(cookies)
+
+        if not self._pool.primary.logged_in:
+            return False
+
+        LOGGER.debug("Reusing %s stored session(s)", min(len(stored), self._pool.size))
+        # Sessions the store did not have yet are logged in as usual
+        await self._login_all(missing_only=True)
+        return True
+
+    async def _save_sessions(self) -> None:
+        """Store the current session cookies, if a session store is used."""
+        if self._session_store is None or not self._pool.primary.logged_in:
+            return
+
+        try:
+            await self._session_store.save(
+                self._usn, [session.cookies() for session in self._pool.sessions]
+            )
+        except OSError as err:
+            LOGGER.debug("Could not store sessions: %s", err)
+
+    async def _login(self, session: ApiSession) -> None:
+        """Log in one pooled session."""
+        # Never send a stale cookie along with the login
+        session.reset()
+        token = self._active_session.set(session)
+        try:
+            await self._call(
+                Request.LOGIN, {"username": self._usn, "password": self._pwd}
+            )
+        finally:
+            self._active_session.reset(token)
+
+        if not session.logged_in:
             raise InvalidResponseException("Login failed, no session cookie received")
 
-        await self.update(force=True)
+        session.active_device = None
+        session.logged_in_at = monotonic()
+        if session.expires_at is None and self._session_lifetime is not None:
+            session.expires_at = session.logged_in_at + self._session_lifetime
+        self._schedule_renewal(session)
+
+    async def _relogin(self, session: ApiSession, stale: dict[str, str | None]) -> None:
+        """Log a session in again, once for all callers holding the same cookie."""
+        key = ("login", session.index, *stale.values())
+        if session.cookies() != stale and not self._inflight.in_flight(key):
+            # Another caller already logged this session in again
+            return
+
+        async def login() -> None:
+            await self._login(session)
+            await self._save_sessions()
+
+        await self._inflight.do(key, login)
+
+    def _schedule_renewal(self, session: ApiSession) -> None:
+        """Renew a session in the background shortly before it expires."""
+        task = self._renewal_tasks.pop(session.index, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+        if not self._auto_login or session.expires_at is None:
+            return
+
+        lifetime = session.expires_at - (session.logged_in_at or monotonic())
+        margin = min(SESSION_REFRESH_MARGIN, max(lifetime, 0) * 0.1)
+        delay = session.expires_at - margin - monotonic()
+        if session.logged_in_at is not None:
+            # A short lifetime must not turn renewals into a stream of logins
+            delay = max(
+                delay,
+                session.logged_in_at + MIN_LEARNED_SESSION_LIFETIME - monotonic(),
+            )
+        # Run in an empty context so no session binding of the caller leaks in
+        self._renewal_tasks[session.index] = asyncio.get_running_loop().create_task(
+            self._renew_session(session, delay), context=Context()
+        )
 
-    def assemble_headers(self) -> dict:
+    async def _renew_session(self, session: ApiSession, delay: float) -> None:
+        """Wait, then log a session in again once it is idle."""
+        await asyncio.sleep(max(delay, 0))
+        await self._pool.acquire_session(session)
+        token = self._active_session.set(session)
+        try:
+            LOGGER.debug("Renewing session %s before it expires", session.index)
+            await self._relogin(session, session.cookies())
+        except Exception as err:
+            LOGGER.debug("Renewing session %s failed: %s", session.index, err)
+        finally:
+            self._active_session.reset(token)
+            await self._pool.release(session)
+
+    async def _cancel_renewals(self) -> None:
+        """Cancel background session renewals."""
+        tasks = list(self._renewal_tasks.values())
+        self._renewal_tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _learn_session_lifetime(self, session: ApiSession) -> None:
+        """Estimate the session lifetime from a cookie the API rejected."""
+        if session.logged_in_at is None:
+            return
+
+        observed = monotonic() - session.logged_in_at
+        if observed < MIN_LEARNED_SESSION_LIFETIME:
+            return
+        if self._session_lifetime is None or observed < self._session_lifetime:
+            LOGGER.debug("Estimating session lifetime at %.0f seconds", observed)
+            self._session_lifetime = observed
+
+    def _current_session(self) -> ApiSession:
+        """Return the session bound to the running operation."""
+        return self._active_session.get() or self._pool.primary
+
+    def assemble_headers(self, session: ApiSession | None = None) -> dict:
         """Generate headers."""
         _headers: dict = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0"
         }
 
-        if isinstance(self._hssess, type(None)) and isinstance(
-            self._hssess_webclient, type(None)
-        ):
-            pass
-        else:
-            if isinstance(self._hssess_webclient, type(None)):
-                _headers.update({"Cookie": f"hssess={self._hssess};"})
-            else:
-                _headers.update(
-                    {"Cookie": f"hssess-webclient={self._hssess_webclient};"}
-                )
+        if isinstance(session, type(None)):
+            session = self._current_session()
 
+        _headers.update(session.cookie_header())
         return _headers
 
-    def _handle_cookies(self, response: aiohttp.ClientResponse) -> None:
+    def _handle_cookies(
+        self, response: aiohttp.ClientResponse, session: ApiSession | None = None
+    ) -> None:
         """Handle cookies from the response."""
+        if isinstance(session, type(None)):
+            session = self._current_session()
+
         hssess_cookie = response.cookies.get("hssess")
         if hssess_cookie is not None:
-            self._hssess = hssess_cookie.value
+            session.hssess = hssess_cookie.value
 
         hssess_webclient_cookie = response.cookies.get("hssess-webclient")
         if hssess_webclient_cookie is not None:
-            self._hssess_webclient = hssess_webclient_cookie.value
+            session.hssess_webclient = hssess_webclient_cookie.value
+
+        for cookie in (hssess_cookie, hssess_webclient_cookie):
+            if (lifetime := cookie_lifetime(cookie)) is not None:
+                session.expires_at = monotonic() + lifetime
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Create or reuse an HTTP session."""
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(timeout=REQUEST_TIMEOUT)
+            if self._cassette is not None and not self._cassette.recording:
+                await self._cassette.load()
+                self._session = self._cassette.replay(self._api_url)
+                return self._session
+
+            self._session = aiohttp.ClientSession(
+                timeout=REQUEST_TIMEOUT,
+                trace_configs=(
+                    [self.tracer.trace_config()] if self.tracer.enabled else None
+                ),
+            )
+            if self._cassette is not None:
+                self._session = self._cassette.record(self._session, self._api_url)
         return self._session
 
     @staticmethod
@@ -127,10 +511,93 @@ class WebastoConnect:
         """Return exponential backoff delay in seconds."""
         return float(2**attempt)
 
+    def subscribe(
+        self,
+        callback: ChangeListener,
+        fields: Iterable[str] | None = None,
+        device_id: str | None = None,
+    ) -> Callable[[], None]:
+        """Call `callback` when a refresh changes watched device fields.
+
+        `fields` limits the listener to some of the fields in
+        `pywebasto.events.FIELDS` and `device_id` to one device. The callback
+        receives a `DeviceChange` with `(old, new)` values of the changed
+        fields. Returns a function removing the listener again.
+        """
+        return self._notifier.subscribe(callback, fields, device_id)
+
+    @property
+    def polling(self) -> bool:
+        """Return whether background polling is running."""
+        return self._poller is not None and self._poller.running
+
+    def start_polling(self, intervals: PollIntervals | None = None) -> None:
+        """Refresh devices in the background at activity-aware intervals."""
+        if self._poller is None:
+            self._poller = DevicePoller(self, intervals)
+        elif intervals is not None:
+            self._poller.intervals = intervals
+
+        self._poller.start()
+
+    async def stop_polling(self) -> None:
+        """Stop background polling."""
+        if self._poller is not None:
+            await self._poller.stop()
+
+    def history(self, device_id: str) -> DeviceHistory | None:
+        """Return the telemetry history of a device, if `history_samples` is set."""
+        return self._history.get(device_id)
+
+    def _record_history(self, device: WebastoDevice) -> None:
+        """Add the refreshed values of a device to its telemetry history."""
+        if self._history_samples is None and self._history_store is None:
+            return
+
+        sample = TelemetrySample.from_device(device, time())
+        if self._history_samples is not None:
+            history = self._history.get(device.device_id)
+            if history is None:
+                history = self._history[device.device_id] = DeviceHistory(
+                    self._history_samples, self._history_minutes, self._history_hours
+                )
+            history.add(sample)
+        if self._history_store is not None:
+            self._history_store.add(device.device_id, sample)
+
+    def _index_timers(self, device: WebastoDevice) -> None:
+        """Update the timers of a refreshed device in `schedule`."""
+        try:
+            timers = device.timers
+        except InvalidRequestException as err:
+            LOGGER.debug("Not indexing timers of %s: %s", device.device_id, err)
+            return
+        self.schedule.update(device.device_id, timers)
+
+    def stats(self) -> dict:
+        """Return the request metrics as plain data, see `RequestMetrics.stats`."""
+        return self.metrics.stats()
+
     async def close(self) -> None:
         """Close any open HTTP session."""
+        await self.stop_polling()
+        await self._cancel_confirmations()
+        await self._cancel_renewals()
+        if self._hydration_task is not None:
+            self._hydration_task.cancel()
+            await asyncio.gather(self._hydration_task, return_exceptions=True)
+            self._hydration_task = None
+        # Cookies may have been renewed by the API since they were stored
+        await self._save_sessions()
         if self._session is not None and not self._session.closed:
             await self._session.close()
+        if self._cassette is not None and self._cassette.recording:
+            await self._cassette.save()
+        if self._history_store is not None:
+            if self._owns_history_store:
+                await self._history_store.close()
+            else:
+                await self._history_store.flush()
 
     async def __aenter__(self) -> "WebastoConnect":
         """Allow async context manager usage."""
@@ -145,13 +612,59 @@ class WebastoConnect:
         api_type: Request,
         payload: dict | str | None = None,
         extra_headers: dict | None = None,
+    ) -> dict | None:
+        """Make an API request, logging in again once if the session expired."""
+        with self.tracer.span("request", request=api_type.name):
+            if api_type == Request.LOGIN or not self._auto_login:
+                return await self._request(api_type, payload, extra_headers)
+
+            session = self._current_session()
+            if session.expires_at is not None and monotonic() >= session.expires_at:
+                LOGGER.debug("Session %s has expired, logging in again", session.index)
+                await self._restore_login(session, api_type, session.cookies())
+
+            sent = session.cookies()
+            try:
+                return await self._request(api_type, payload, extra_headers)
+            except UnauthorizedException:
+                if not any(sent.values()):
+                    # Never logged in, so there is no session to restore
+                    raise
+                LOGGER.debug(
+                    "Session %s was rejected for %s, logging in again",
+                    session.index,
+                    api_type.name,
+                )
+                if session.cookies() == sent:
+                    self._learn_session_lifetime(session)
+                await self._restore_login(session, api_type, sent)
+
+            # The request is replayed once, a second rejection is raised
+            return await self._request(api_type, payload, extra_headers)
+
+    async def _restore_login(
+        self, session: ApiSession, api_type: Request, stale: dict[str, str | None]
+    ) -> None:
+        """Log a session in again and select the device of the operation again."""
+        # A shared login resets the selection while other callers still wait
+        device_id = self._operation_device.get() or session.active_device
+        await self._relogin(session, stale)
+        if device_id is not None and api_type != Request.CHANGE_DEVICE:
+            await self._change_device(device_id)
+
+    async def _request(
+        self,
+        api_type: Request,
+        payload: dict | str | None = None,
+        extra_headers: dict | None = None,
     ) -> dict | None:
         """Make an API request."""
 
         if isinstance(payload, type(None)):
             payload = {}
 
-        headers = self.assemble_headers()
+        api_session = self._current_session()
+        headers = self.assemble_headers(api_session)
         if isinstance(extra_headers, dict):
             headers.update(extra_headers)
 
@@ -160,89 +673,146 @@ class WebastoConnect:
         )
 
         for attempt in range(max_attempts):
-            session = await self._get_session()
-            try:
-                start = monotonic()
-                async with session.post(
-                    f"{API_URL}{api_type.value}",
-                    headers=headers,
-                    data=payload,
-                ) as response:
-                    self._handle_cookies(response)
-                    elapsed = monotonic() - start
-                    LOGGER.debug(
-                        "Request %s completed in %.3f seconds with status %s",
-                        api_type.name,
-                        elapsed,
-                        response.status,
-                    )
+            with self.tracer.span(
+                "attempt", request=api_type.name, attempt=attempt + 1
+            ):
+                session = await self._get_session()
+                if self._rate_limiter is not None:
+                    with self.tracer.span("rate_limit"):
+                        await self._rate_limiter.acquire()
+                try:
+                    start = monotonic()
+                    async with session.post(
+                        f"{self._api_url}{api_type.value}",
+                        headers=headers,
+                        data=payload,
+                    ) as response:
+                        self._handle_cookies(response, api_session)
+                        self._record_write(api_type, api_session)
+                        elapsed = monotonic() - start
+                        self.tracer.annotate(status=response.status)
+                        # Read the body once, json() and text() reuse it
+                        body = await response.read()
+                        self.metrics.observe_response(
+                            api_type, response.status, elapsed, len(body)
+                        )
+                        LOGGER.debug(
+                            "Request %s completed in %.3f seconds with status %s",
+                            api_type.name,
+                            elapsed,
+                            response.status,
+                        )
 
-                    if response.status != 200:
-                        if response.status == 401:
-                            raise UnauthorizedException(
-                                "Username or password incorrect"
-                            )
-                        if response.status == 403:
-                            raise ForbiddenException(
-                                "Access to the requested resource is forbidden"
-                            )
-                        if response.status == 429:
-                            raise TooManyRequestsException(
-                                "Too many requests - you are being rate limited"
-                            )
-                        if (
-                            response.status in RETRYABLE_STATUS_CODES
-                            and attempt < max_attempts - 1
-                        ):
-                            delay = self._backoff_seconds(attempt)
-                            LOGGER.debug(
-                                "Retrying %s after HTTP %s in %.1f seconds (attempt %s/%s)",
-                                api_type.name,
-                                response.status,
-                                delay,
-                                attempt + 1,
-                                max_attempts,
+                        if response.status != 200:
+                            if response.status == 401:
+                                raise UnauthorizedException(
+                                    "Username or password incorrect"
+                                )
+                            if response.status == 403:
+                                raise ForbiddenException(
+                                    "Access to the requested resource is forbidden"
+                                )
+                            if response.status == 429:
+                                if self._rate_limiter is not None:
+                                    self._rate_limiter.on_throttled(
+                                        parse_retry_after(
+                                            response.headers.get("Retry-After")
+                                        )
+                                    )
+                                raise TooManyRequestsException(
+                                    "Too many requests - you are being rate limited"
+                                )
+                            if (
+                                response.status in RETRYABLE_STATUS_CODES
+                                and attempt < max_attempts - 1
+                            ):
+                                delay = self._backoff_seconds(attempt)
+                                self.metrics.observe_retry(api_type)
+                                LOGGER.debug(
+                                    "Retrying %s after HTTP %s in %.1f seconds (attempt %s/%s)",
+                                    api_type.name,
+                                    response.status,
+                                    delay,
+                                    attempt + 1,
+                                    max_attempts,
+                                )
+                                with self.tracer.span("backoff", delay=delay):
+                                    await asyncio.sleep(delay)
+                                continue
+
+                            text = await response.text()
+                            raise InvalidRequestException(
+                                f"API reported {response.status}: {text}"
                             )
-                            await asyncio.sleep(delay)
-                            continue
 
-                        text = await response.text()
-                        raise InvalidRequestException(
-                            f"API reported {response.status}: {text}"
+                        if self._rate_limiter is not None:
+                            self._rate_limiter.on_success()
+
+                        if "GET" in api_type.name:
+                            try:
+                                return await response.json(content_type=None)
+                            except (
+                                aiohttp.ContentTypeError,
+                                json.JSONDecodeError,
+                            ) as err:
+                                text = await response.text()
+                                raise InvalidResponseException(
+                                    f"Invalid JSON response for {api_type.name}: {text}"
+                                ) from err
+
+                        return None
+                except (
+                    aiohttp.ClientConnectionError,
+                    aiohttp.ClientOSError,
+                    aiohttp.ServerTimeoutError,
+                    asyncio.TimeoutError,
+                ) as err:
+                    self._record_write(api_type, api_session)
+                    self.metrics.observe_error(api_type, monotonic() - start)
+                    if attempt < max_attempts - 1:
+                        delay = self._backoff_seconds(attempt)
+                        self.metrics.observe_retry(api_type)
+                        LOGGER.debug(
+                            "Retrying %s after network error in %.1f seconds (attempt %s/%s): %s",
+                            api_type.name,
+                            delay,
+                            attempt + 1,
+                            max_attempts,
+                            err.__class__.__name__,
                         )
-
-                    if "GET" in api_type.name:
-                        try:
-                            return await response.json(content_type=None)
-                        except (aiohttp.ContentTypeError, json.JSONDecodeError) as err:
-                            text = await response.text()
-                            raise InvalidResponseException(
-                                f"Invalid JSON response for {api_type.name}: {text}"
-                            ) from err
-
-                    return None
-            except (
-                aiohttp.ClientConnectionError,
-                aiohttp.ClientOSError,
-                aiohttp.ServerTimeoutError,
-                asyncio.TimeoutError,
-            ) as err:
-                if attempt < max_attempts - 1:
-                    delay = self._backoff_seconds(attempt)
-                    LOGGER.debug(
-                        "Retrying %s after network error in %.1f seconds (attempt %s/%s): %s",
-                        api_type.name,
-                        delay,
-                        attempt + 1,
-                        max_attempts,
-                        err.__class__.__name__,
-                    )
-                    await asyncio.sleep(delay)
-                    continue
-                raise InvalidRequestException(f"API request failed: {err}") from err
+                        with self.tracer.span("backoff", delay=delay):
+                            await asyncio.sleep(delay)
+                        continue
+                    raise InvalidRequestException(f"API request failed: {err}") from err
 
         raise InvalidRequestException("API request failed after retries")
 
+    def _record_write(self, api_type: Request, session: ApiSession) -> None:
+        """Drop cached reads a write request may have changed."""
+        if api_type not in INVALIDATED_BY or session.active_device is None:
+            return
+
+        self._cache.invalidate(session.active_device, INVALIDATED_BY[api_type])
+
+        # Reads started before the write must not be shared with later callers
+        self._writes[session.active_device] = (
+            self._write_generation(session.active_device) + 1
+        )
+        self._writes[None] = self._write_generation(None) + 1
+
+        self._last_write[session.active_device] = monotonic()
+        if self._poller is not None:
+            self._poller.nudge(session.active_device)
+
+    def _command_pending(self, device_id: str, window: float) -> bool:
+        """Return whether a write was sent to the device within `window` seconds."""
+        last_write = self._last_write.get(device_id)
+        return last_write is not None and monotonic() - last_write < window
+
+    def _write_generation(self, device_id: str | None) -> int:
+        """Return the number of writes seen for a device, or the account if `None`."""
+        return self._writes.get(device_id, 0)
+
     def _is_update_fresh(self, last_update: float | None) -> bool:
         """Return whether cached data is still fresh enough to reuse."""
         if self._refresh_interval <= 0:
@@ -253,20 +823,38 @@ class WebastoConnect:
 
         return monotonic() - last_update < self._refresh_interval
 
+    def _update_fresh(self, scope: str, last_update: float | None) -> bool:
+        """Return whether an update can be skipped, counting cache hits and misses."""
+        fresh = self._is_update_fresh(last_update)
+        self.metrics.observe_update_cache(scope, fresh)
+        return fresh
+
     async def update(self, device_id: str | None = None, force: bool = False) -> None:
         """Get current data from Webasto API."""
-        async with self._update_lock:
-            if isinstance(device_id, type(None)):
-                if not force and self._is_update_fresh(self._last_full_update):
+        # Concurrent identical updates share one refresh
+        key = ("update", device_id, force, self._write_generation(device_id))
+        with self.tracer.span("update", device_id=device_id, force=force):
+            await self._inflight.do(key, lambda: self._update(device_id, force))
+
+    async def _update(self, device_id: str | None, force: bool) -> None:
+        """Refresh account or device data unless cached data is fresh."""
+        if isinstance(device_id, type(None)):
+            async with self._hold_update_lock(self._update_lock):
+                if not force and self._update_fresh("account", self._last_full_update):
                     LOGGER.debug("Skipping update because cached account data is fresh")
                     return
 
+                if force:
+                    self._cache.clear()
                 await self._update_all_devices()
                 self._last_full_update = monotonic()
                 return
 
-            if not force and self._is_update_fresh(
-                self._last_device_update.get(device_id)
+        # Updates of different devices run concurrently, bounded by the pool
+        lock = self._device_update_locks.setdefault(device_id, asyncio.Lock())
+        async with self._hold_update_lock(lock):
+            if not force and self._update_fresh(
+                "device", self._last_device_update.get(device_id)
             ):
                 LOGGER.debug(
                     "Skipping update for device %s because cached data is fresh",
@@ -274,37 +862,208 @@ class WebastoConnect:
                 )
                 return
 
+            if force:
+                self._cache.invalidate(device_id)
+
             # A specific device was requested, only update that one
             await self._update_device_data(device_id)
 
+    @asynccontextmanager
+    async def _hold_update_lock(self, lock: asyncio.Lock) -> AsyncIterator[None]:
+        """Hold an update lock, recording the time spent waiting for it."""
+        start = monotonic()
+        with self.tracer.span("lock_wait"):
+            await lock.acquire()
+        self.metrics.observe_lock_wait(monotonic() - start)
+        try:
+            yield
+        finally:
+            lock.release()
+
     async def _update_all_devices(self) -> None:
         """Refresh account device list and data for all devices."""
-        self._data = await self._call(Request.GET_DATA_NOPOLL)
-        available_devices = self._list_devices()
+        # Reads within one refresh cycle are only sent once
+        cycle: dict[tuple[str | None, Request], dict | None] = {}
+        token = self._refresh_cycle.set(cycle)
+        try:
+            async with self._hold_session() as session:
+                cached, _ = self._cache.get(None, Request.GET_DATA_NOPOLL)
+                self._data = await self._read(None, Request.GET_DATA_NOPOLL)
+                if not cached and session.active_device is not None:
+                    # The account payload is also the device payload of the
+                    # device selected on this session
+                    cycle[(session.active_device, Request.GET_DATA_NOPOLL)] = self._data
+
+            # Devices are refreshed concurrently, bounded by the session pool size
+            device_ids = self._sync_device_list()
+            selected = {session.active_device for session in self._pool.sessions}
+            # Devices already selected on a session go first, saving a switch
+            ordered = sorted(
+                device_ids, key=lambda device_id: device_id not in selected
+            )
+            results = await asyncio.gather(
+                *(self._update_device_data(device_id) for device_id in ordered),
+                return_exceptions=True,
+            )
+        finally:
+            self._refresh_cycle.reset(token)
 
-        # Loop through all devices
-        for device in available_devices:
-            self.devices[device["id"]] = WebastoDevice(device["id"], device["name"])
-            await self._update_device_data(device["id"])
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
 
     async def _update_device_data(
         self, device_id: str, switch_device: bool = True
     ) -> None:
         """Refresh data for one device."""
         if switch_device:
-            await self._change_device(device_id)
+            async with self._device_session(device_id):
+                await self._update_device_data(device_id, switch_device=False)
+            return
+
+        # The caller holds the session, so the device cannot change mid-flight
+        with self.tracer.span("refresh_device", device_id=device_id):
+            settings, last_data, dev_data = await self._read_all(
+                device_id,
+                Request.GET_SETTINGS,
+                Request.GET_DATA,
+                Request.GET_DATA_NOPOLL,
+            )
 
-        device_data = self.devices[device_id]  # type: ignore[index]
-        device_data.settings = await self._call(Request.GET_SETTINGS)
-        device_data.last_data = await self._call(Request.GET_DATA)
-        device_data.dev_data = await self._call(Request.GET_DATA_NOPOLL)
+            device_data = self.devices[device_id]  # type: ignore[index]
+            before = self._notifier.snapshot(
+                device_data, known=device_id in self._last_device_update
+            )
+            with self.tracer.span("parse", device_id=device_id):
+                device_data.settings = settings
+                device_data.last_data = last_data
+                device_data.dev_data = dev_data
+            self._notifier.notify(device_data, before)
+            self._record_history(device_data)
+            self._index_timers(device_data)
 
         self.devices.update({device_id: device_data})  # type: ignore[arg-type]
         self._last_device_update[device_id] = monotonic()
 
+    async def _read(self, device_id: str | None, api_type: Request) -> dict | None:
+        """Send a read on the current session, reusing a fresh cached response."""
+        cycle = self._refresh_cycle.get()
+        if cycle is not None and (device_id, api_type) in cycle:
+            LOGGER.debug(
+                "Reusing %s for device %s from this refresh cycle",
+                api_type.name,
+                device_id,
+            )
+            return cycle[(device_id, api_type)]
+
+        hit, data = self._cache.get(device_id, api_type)
+        if self._cache.is_cached(api_type):
+            self.metrics.observe_read_cache(api_type, hit)
+        if hit:
+            LOGGER.debug("Using cached %s for device %s", api_type.name, device_id)
+            return data
+
+        # Identical reads in flight on any session are shared
+        key = ("read", device_id, api_type, self._write_generation(device_id))
+        data = await self._inflight.do(key, lambda: self._call(api_type))
+        self._cache.set(device_id, api_type, data)
+        if cycle is not None:
+            cycle[(device_id, api_type)] = data
+        return data
+
+    async def _read_all(
+        self, device_id: str | None, *api_types: Request
+    ) -> list[dict | None]:
+        """Send independent reads on the current session."""
+        if not self._concurrent_reads:
+            return [await self._read(device_id, api_type) for api_type in api_types]
+
+        tasks = [
+            asyncio.ensure_future(self._read(device_id, api_type))
+            for api_type in api_types
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            # Raise the read that failed, not the siblings cancelled below
+            for task in tasks:
+                if task in done and not task.cancelled() and task.exception():
+                    raise task.exception()
+        finally:
+            # Never leave reads running once the session is handed back
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        return [task.result() for task in tasks]
+
+    @asynccontextmanager
+    async def _hold_session(
+        self, device_id: str | None = None
+    ) -> AsyncIterator[ApiSession]:
+        """Hold a pooled session for one operation."""
+        current = self._active_session.get()
+        if current is not None:
+            # Nested operation, keep using the session this task already holds
+            yield current
+            return
+
+        session = await self._pool.acquire(device_id)
+        token = self._active_session.set(session)
+        try:
+            yield session
+        finally:
+            self._active_session.reset(token)
+            await self._pool.release(session)
+
+    @asynccontextmanager
+    async def _device_session(self, device_id: str) -> AsyncIterator[ApiSession]:
+        """Hold a pooled session with `device_id` selected for one operation."""
+        async with self._hold_session(device_id) as session:
+            async with self._track_device(session, device_id):
+                yield session
+
+    @asynccontextmanager
+    async def _track_device(
+        self, session: ApiSession, device_id: str
+    ) -> AsyncIterator[None]:
+        """Select `device_id` and forget the selection if the operation fails."""
+        token = self._operation_device.set(device_id)
+        try:
+            await self._change_device(device_id)
+            yield
+        except BaseException:
+            # The server-side device context is unknown after a failure
+            session.active_device = None
+            raise
+        finally:
+            self._operation_device.reset(token)
+
     async def _change_device(self, device_id: str) -> None:
-        """Change the active device."""
+        """Change the active device, unless the session already has it selected."""
+        session = self._current_session()
+        if session.active_device == device_id:
+            LOGGER.debug(
+                "Skipping device change, session %s already has device %s selected",
+                session.index,
+                device_id,
+            )
+            return
+
         await self._call(Request.CHANGE_DEVICE, {"device": device_id})
+        session.active_device = device_id
+
+    def _sync_device_list(self) -> list[str]:
+        """Create device objects for the account devices and return their IDs."""
+        available_devices = self._list_devices()
+        for device in available_devices:
+            existing = self.devices.get(device["id"])
+            # Keep device objects stable so references and listeners stay valid
+            if existing is None or existing.name != device["name"]:
+                self.devices[device["id"]] = WebastoDevice(
+                    device["id"], device["name"], self._keep_payloads
+                )
+
+        return list(dict.fromkeys(device["id"] for device in available_devices))
 
     def _list_devices(self) -> list[dict]:
         """List all devices associated with the account."""
@@ -322,48 +1081,25 @@ class WebastoConnect:
         data: dict | None, line: str
     ) -> list[SimpleTimer]:
         """Extract simple timers for a specific output line from API data."""
-        if not isinstance(data, dict):
-            return []
-
-        timers: list[SimpleTimer] = []
-        for section in ("outputs", "disabled_outputs"):
-            outputs = data.get(section)
-            if not isinstance(outputs, list):
-                continue
-
-            for output in outputs:
-                if not isinstance(output, dict):
-                    continue
-                if output.get("line") != line:
-                    continue
-
-                output_timers = output.get("timers")
-                if not isinstance(output_timers, list):
-                    continue
-
-                for timer_data in output_timers:
-                    if not isinstance(timer_data, dict):
-                        continue
-                    if timer_data.get("type") != "simple":
-                        continue
-
-                    try:
-                        timers.append(SimpleTimer.from_api_dict(timer_data))
-                    except (KeyError, TypeError, ValueError) as err:
-                        raise InvalidRequestException(
-                            f"Invalid simple timer data in response: {err}"
-                        ) from err
-
-        return timers
+        return extract_simple_timers(data, line)
 
     async def get_timers(
         self, device: WebastoDevice, line: Outputs = Outputs.HEATER
     ) -> list[SimpleTimer]:
         """Get simple timers for an output line from the latest API data."""
-        await self._change_device(device_id=device.device_id)
-        data = await self._call(Request.GET_DATA_NOPOLL)
+        data = await self._device_read(device.device_id, Request.GET_DATA_NOPOLL)
         return self._extract_simple_timers_from_data(data, line.value)
 
+    async def _device_read(self, device_id: str, api_type: Request) -> dict | None:
+        """Select a device and send one read, sharing it with concurrent callers."""
+
+        async def read() -> dict | None:
+            async with self._device_session(device_id):
+                return await self._read(device_id, api_type)
+
+        key = ("device_read", device_id, api_type, self._write_generation(device_id))
+        return await self._inflight.do(key, read)
+
     async def save_timers(
         self,
         device: WebastoDevice,
@@ -377,18 +1113,18 @@ class WebastoConnect:
                 "and line='OUTV' (Outputs.VENTILATION)"
             )
 
-        await self._change_device(device_id=device.device_id)
-
-        payload = {
-            "line": line.value,
-            "timers": [timer.to_api_dict() for timer in timers],
-        }
-        await self._call(
-            Request.SAVE_TIMERS,
-            json.dumps(payload),
-            extra_headers={"X-Requested-With": "XMLHttpRequest"},
-        )
-        await self._update_device_data(device.device_id, switch_device=False)
+        with self.tracer.span("save_timers", device_id=device.device_id):
+            async with self._device_session(device.device_id):
+                payload = {
+                    "line": line.value,
+                    "timers": [timer.to_api_dict() for timer in timers],
+                }
+                await self._call(
+                    Request.SAVE_TIMERS,
+                    json.dumps(payload),
+                    extra_headers={"X-Requested-With": "XMLHttpRequest"},
+                )
+                await self._update_device_data(device.device_id, switch_device=False)
 
     async def get_simple_timers(
         self, device: WebastoDevice, line: Outputs = Outputs.HEATER
@@ -407,79 +1143,45 @@ class WebastoConnect:
 
     async def set_output_main(self, device: WebastoDevice, state: bool) -> None:
         """Turn on or off the heater or ventilation."""
-        await self._change_device(device_id=device.device_id)
-
-        if state:
-            if device.is_ventilation:
-                await self._call(Request.COMMAND, CMD_VENTILATION_ON)
-            else:
-                await self._call(Request.COMMAND, CMD_HEATER_ON)
-        else:
-            if device.is_ventilation:
-                await self._call(Request.COMMAND, CMD_VENTILATION_OFF)
-            else:
-                await self._call(Request.COMMAND, CMD_HEATER_OFF)
-        await self._update_device_data(device.device_id, switch_device=False)
+        # The current mode decides which line is switched
+        await self._hydrate_before_write(device)
+        line = Outputs.VENTILATION if device.is_ventilation else Outputs.HEATER
+        await self.set_outputs(device, {line: state})
 
     async def set_output_aux1(self, device: WebastoDevice, state: bool) -> None:
         """Turn on or off the aux1 output."""
-        await self._change_device(device_id=device.device_id)
-
-        if state:
-            await self._call(Request.COMMAND, CMD_AUX1_ON)
-        else:
-            await self._call(Request.COMMAND, CMD_AUX1_OFF)
-        await self._update_device_data(device.device_id, switch_device=False)
+        await self.set_outputs(device, {Outputs.AUX1: state})
 
     async def set_output_aux2(self, device: WebastoDevice, state: bool) -> None:
         """Turn on or off the aux2 output."""
-        await self._change_device(device_id=device.device_id)
+        await self.set_outputs(device, {Outputs.AUX2: state})
 
-        if state:
-            await self._call(Request.COMMAND, CMD_AUX2_ON)
-        else:
-            await self._call(Request.COMMAND, CMD_AUX2_OFF)
-        await self._update_device_data(device.device_id, switch_device=False)
+    async def set_outputs(
+        self,
+        device: WebastoDevice,
+        states: dict[Outputs, bool] | Iterable[tuple[Outputs, bool]],
+    ) -> None:
+        """Switch several outputs of one device, followed by a single refresh.
+
+        Commands are sent in order after selecting the device once. If the same
+        output is given more than once, the last state wins.
+        """
+        states = dict(states)
+        if not states:
+            return
+
+        with self.tracer.span("set_outputs", device_id=device.device_id):
+            async with self._device_session(device.device_id):
+                for line, state in states.items():
+                    await self._call(
+                        Request.COMMAND, OUTPUT_COMMANDS[line.value][state]
+                    )
+                await self._after_commands(device, states)
 
     async def ventilation_mode(self, device: WebastoDevice, state: bool) -> None:
         """Turn ventilation mode on or off."""
-        await self._change_device(device_id=device.device_id)
-
-        vent_sec = device.timeout_vent % (24 * 3600)
-        vent_h = vent_sec // 3600
-        vent_sec = vent_sec % 3600
-        vent_m = vent_sec // 60
-
-        heat_sec = device.timeout_heat % (24 * 3600)
-        heat_h = heat_sec // 3600
-        heat_sec = heat_sec % 3600
-        heat_m = heat_sec // 60
-
-        ventmode = {
-            "device_settings": {
-                "webasto_emul_mode": "thermoconnect",
-                "OUTV_timeout_on": True,
-                "OUTV_timeout_h": vent_h,
-                "OUTV_timeout_min": vent_m,
-                "OUTH_timeout_on": True,
-                "OUTH_timeout_h": heat_h,
-                "OUTH_timeout_min": heat_m,
-            },
-            "service_settings": {
-                "OUTH_on": True if not state else False,
-                "OUTV_on": False if not state else True,
-                "heater_mode": 0 if not state else 1,
-                "OUTV_name": "Ventilation",
-                "OUTV_icon": "car_vent",
-                "OUTH_name": "Heater",
-                "OUTH_icon": "car_heat",
-            },
-            "location_events": None,
-            "air_heater": {},
-        }
-
-        await self._call(Request.POST_SETTING, json.dumps(ventmode))
-        await self._update_device_data(device.device_id, switch_device=False)
+        async with self.settings(device) as transaction:
+            transaction.ventilation_mode(state)
 
     async def set_main_timeout(
         self,
@@ -488,13 +1190,8 @@ class WebastoConnect:
         ventilation: int | None = None,
     ) -> None:
         """Sets timeout of main output port in seconds."""
-        if not isinstance(heater, type(None)):
-            device.timeout_heat = heater
-
-        if not isinstance(ventilation, type(None)):
-            device.timeout_vent = ventilation
-
-        await self.ventilation_mode(device, device.is_ventilation)
+        async with self.settings(device) as transaction:
+            transaction.set_main_timeout(heater, ventilation)
 
     async def set_aux_timeout(
         self,
@@ -503,67 +1200,104 @@ class WebastoConnect:
         aux: Outputs = Outputs.AUX1,
     ) -> None:
         """Sets timeout of an AUX port in seconds."""
-        await self._change_device(device_id=device.device_id)
-
-        if aux == Outputs.AUX1:
-            device.timeout_aux1 = timeout
-        elif aux == Outputs.AUX2:
-            device.timeout_aux2 = timeout
-
-        heat_sec = timeout % (24 * 3600)
-        heat_h = heat_sec // 3600
-        heat_sec = heat_sec % 3600
-        heat_m = heat_sec // 60
-
-        data = {
-            "device_settings": {
-                f"{aux.value}_function": "enabled",
-                f"{aux.value}_timeout_on": True,
-                f"{aux.value}_timeout_h": heat_h,
-                f"{aux.value}_timeout_min": heat_m,
-            },
-            "service_settings": {
-                f"{aux.value}_on": True,
-                f"{aux.value}_name": (
-                    device.output_aux1_name
-                    if aux == Outputs.AUX1
-                    else device.output_aux2_name
-                ),
-                f"{aux.value}_icon": (
-                    device.icon_aux1 if aux == Outputs.AUX1 else device.icon_aux2
-                ),
-            },
-            "location_events": None,
-            "air_heater": {},
-        }
-
-        await self._call(Request.POST_SETTING, json.dumps(data))
-        await self._update_device_data(device.device_id, switch_device=False)
+        async with self.settings(device) as transaction:
+            transaction.set_aux_timeout(timeout, aux)
 
     async def set_low_voltage_cutoff(self, device: WebastoDevice, value: float) -> None:
         """Set the low voltage cutoff value."""
-        await self._change_device(device_id=device.device_id)
-
-        payload = {
-            "device_settings": {"low_voltage_cutoff": value},
-            "service_settings": {},
-            "location_events": None,
-            "air_heater": {},
-        }
-        await self._call(Request.POST_SETTING, json.dumps(payload))
-        await self._update_device_data(device.device_id, switch_device=False)
+        async with self.settings(device) as transaction:
+            transaction.set_low_voltage_cutoff(value)
 
     async def set_temperature_compensation(
         self, device: WebastoDevice, value: float
     ) -> None:
         """Set the temperature compensation value."""
-        await self._change_device(device_id=device.device_id)
+        async with self.settings(device) as transaction:
+            transaction.set_temperature_compensation(value)
+
+    @asynccontextmanager
+    async def settings(
+        self, device: WebastoDevice
+    ) -> AsyncIterator[SettingsTransaction]:
+        """Collect settings changes and send them as one `POST_SETTING`.
+
+        The changes are sent, followed by a single refresh of the device, when
+        the block exits without an exception.
+        """
+        # Settings not changed are sent with their current values
+        await self._hydrate_before_write(device)
+        transaction = SettingsTransaction(device)
+        yield transaction
+        if not transaction:
+            return
+
+        with self.tracer.span("post_settings", device_id=device.device_id):
+            async with self._device_session(device.device_id):
+                await self._call(
+                    Request.POST_SETTING, json.dumps(transaction.payload())
+                )
+                # The device only changes once the API accepted the settings
+                before = self._notifier.snapshot(device)
+                transaction.apply()
+                self._notifier.notify(device, before)
+                if self._optimistic_delay is None:
+                    await self._update_device_data(
+                        device.device_id, switch_device=False
+                    )
+                    return
 
-        payload = {
-            "device_settings": {"ext_temp_comp": value},
-            "service_settings": {},
-            "location_events": None,
-            "air_heater": {},
-        }
-        await self._call(Request.POST_SETTING, json.dumps(payload, indent=4))
-        await self._update_device_data(device.device_id, switch_device=False)
+                self._schedule_confirmation(device.device_id)
+
+    async def _after_commands(
+        self, device: WebastoDevice, states: dict[Outputs, bool]
+    ) -> None:
+        """Refresh a device after commands, or apply the commands optimistically."""
+        if self._optimistic_delay is None:
+            await self._update_device_data(device.device_id, switch_device=False)
+            return
+
+        before = self._notifier.snapshot(device)
+        for line, state in states.items():
+            device.apply_output_state(line.value, state)
+        self._notifier.notify(device, before)
+        self._schedule_confirmation(device.device_id)
+
+    def _schedule_confirmation(self, device_id: str) -> None:
+        """Refresh a device once no write was sent to it for the debounce delay."""
+        loop = asyncio.get_running_loop()
+        self._confirm_due[device_id] = loop.time() + self._optimistic_delay
+        task = self._confirm_tasks.get(device_id)
+        if task is None or task.done():
+            # Run in an empty context so the session held by the caller is not reused
+            self._confirm_tasks[device_id] = loop.create_task(
+                self._confirm(device_id), context=Context()
+            )
+
+    async def _confirm(self, device_id: str) -> None:
+        """Wait for writes to a device to settle, then refresh it once."""
+        loop = asyncio.get_running_loop()
+        try:
+            while (due := self._confirm_due.get(device_id)) is not None:
+                if (delay := due - loop.time()) > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                del self._confirm_due[device_id]
+                try:
+                    await self.update(device_id=device_id, force=True)
+                except Exception as err:
+                    LOGGER.debug(
+                        "Confirmation refresh of device %s failed: %s", device_id, err
+                    )
+        finally:
+            if self._confirm_tasks.get(device_id) is asyncio.current_task():
+                del self._confirm_tasks[device_id]
+
+    async def _cancel_confirmations(self) -> None:
+        """Cancel pending confirmation refreshes."""
+        tasks = list(self._confirm_tasks.values())
+        self._confirm_due.clear()
+        self._confirm_tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
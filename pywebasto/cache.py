@@ -0,0 +1,66 @@
+"""Response cache for Webasto Connect reads."""
+
+from collections.abc import Iterable
+from time import monotonic
+
+from .enums import Request
+
+# Read responses affected by each write request
+INVALIDATED_BY: dict[Request, frozenset[Request]] = {
+    Request.COMMAND: frozenset({Request.GET_DATA, Request.GET_DATA_NOPOLL}),
+    Request.SAVE_TIMERS: frozenset({Request.GET_DATA, Request.GET_DATA_NOPOLL}),
+    Request.POST_SETTING: frozenset(
+        {Request.GET_SETTINGS, Request.GET_DATA, Request.GET_DATA_NOPOLL}
+    ),
+}
+
+
+class ResponseCache:
+    """Per-device cache of read responses with a TTL per request type.
+
+    Only request types with a positive TTL are cached. Entries are keyed by
+    device ID, or `None` for account-level responses.
+    """
+
+    def __init__(self, ttls: dict[Request, float] | None = None) -> None:
+        """Initialize the cache."""
+        self._ttls: dict[Request, float] = {
+            api_type: ttl for api_type, ttl in (ttls or {}).items() if ttl > 0
+        }
+        self._entries: dict[tuple[str | None, Request], tuple[float, dict | None]] = {}
+
+    def is_cached(self, api_type: Request) -> bool:
+        """Return whether responses for `api_type` are cached at all."""
+        return api_type in self._ttls
+
+    def get(self, device_id: str | None, api_type: Request) -> tuple[bool, dict | None]:
+        """Return `(hit, data)` for a cached response that is still fresh."""
+        entry = self._entries.get((device_id, api_type))
+        if entry is None:
+            return False, None
+
+        stored, data = entry
+        if monotonic() - stored >= self._ttls.get(api_type, 0):
+            del self._entries[(device_id, api_type)]
+            return False, None
+
+        return True, data
+
+    def set(self, device_id: str | None, api_type: Request, data: dict | None) -> None:
+        """Store a response if its request type is cached."""
+        if self.is_cached(api_type):
+            self._entries[(device_id, api_type)] = (monotonic(), data)
+
+    def invalidate(
+        self, device_id: str | None, api_types: Iterable[Request] | None = None
+    ) -> None:
+        """Drop cached responses for a device, optionally only some request types."""
+        for key in list(self._entries):
+            if key[0] != device_id:
+                continue
+            if api_types is None or key[1] in api_types:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        self._entries.clear()
@@ -0,0 +1,366 @@
+"""Recording and offline replay of Webasto Connect API exchanges."""
+
+import asyncio
+import gzip
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from http.cookies import SimpleCookie
+from pathlib import Path
+from time import monotonic
+from typing import Any
+
+import aiohttp
+
+from .enums import Request
+from .exceptions import CassetteMissException
+from .session import cookie_lifetime
+
+# Payload fields never written to a cassette
+REDACTED_FIELDS = frozenset({"password"})
+# Response headers kept in a cassette
+RECORDED_HEADERS = ("Content-Type", "Content-Length", "Retry-After")
+
+
+@dataclass(slots=True)
+class Exchange:
+    """One recorded request and the response it got."""
+
+    request: str
+    payload: dict | str | None
+    device: str | None
+    status: int
+    body: str = ""
+    headers: dict[str, str] = field(default_factory=dict)
+    cookies: dict[str, dict[str, str]] = field(default_factory=dict)
+    offset: float = 0.0
+    elapsed: float = 0.0
+
+    def key(self) -> tuple[str, str, str | None]:
+        """Return what a replayed request has to match to get this response."""
+        return _key(self.request, self.payload, self.device)
+
+
+def _key(
+    request: str, payload: dict | str | None, device: str | None
+) -> tuple[str, str, str | None]:
+    """Return the matching key of a request sent with `device` selected."""
+    if request == Request.LOGIN.name:
+        # Credentials are not recorded, so any login matches
+        return request, "", None
+    if request == Request.CHANGE_DEVICE.name:
+        # Selecting a device does not depend on the previous one, so replays
+        # can switch devices in another order or on more or fewer sessions
+        device = None
+    return request, json.dumps(payload, sort_keys=True), device
+
+
+def _redact(payload: Any) -> dict | str | None:
+    """Return a payload without secrets, as stored in a cassette."""
+    if isinstance(payload, dict):
+        return {
+            key: "***" if key in REDACTED_FIELDS else value
+            for key, value in payload.items()
+        }
+    if payload is None or isinstance(payload, str):
+        return payload
+    return str(payload)
+
+
+class Cassette:
+    """Exchanges with the API, stored as gzipped JSON lines.
+
+    Pass a cassette to `WebastoConnect(cassette=...)`. In `record` mode every
+    HTTP exchange is added and the cassette is written on `close()`. In
+    `replay` mode nothing is sent, responses are served from the cassette
+    instead, either as fast as possible or, with `realtime`, after the
+    latency they were recorded with. Only that latency is reproduced, the
+    pauses between requests are up to the replaying client. Session cookies
+    are written as placeholders, never their real values.
+
+    Replayed requests are matched by request type, payload and the device
+    selected on the session, device changes by their payload only. Matching exchanges are served in recorded
+    order, and the last one is repeated once they run out, so a client
+    sending more requests than were recorded still gets answers.
+    """
+
+    def __init__(
+        self, path: str | os.PathLike, mode: str = "replay", realtime: bool = False
+    ) -> None:
+        """Initialize an empty cassette."""
+        if mode not in ("record", "replay"):
+            raise ValueError("mode must be 'record' or 'replay'")
+
+        self.path = Path(path).expanduser()
+        self.mode = mode
+        self.realtime = realtime
+        self.exchanges: list[Exchange] = []
+        self._started = monotonic()
+        self._loaded = False
+
+    @property
+    def recording(self) -> bool:
+        """Return whether exchanges are recorded."""
+        return self.mode == "record"
+
+    def add(self, exchange: Exchange) -> None:
+        """Add a recorded exchange."""
+        self.exchanges.append(exchange)
+
+    def _read(self) -> list[Exchange]:
+        """Read all exchanges from the file."""
+        with gzip.open(self.path, "rt", encoding="utf-8") as file:
+            return [Exchange(**json.loads(line)) for line in file if line.strip()]
+
+    def _write(self) -> None:
+        """Atomically replace the file, readable by the owner only."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(f"{self.path.name}.tmp")
+        fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as file:
+            for exchange in self.exchanges:
+                file.write(json.dumps(asdict(exchange), separators=(",", ":")))
+                file.write("\n")
+        os.replace(temp, self.path)
+
+    async def load(self) -> None:
+        """Load the exchanges from the file, once."""
+        if not self._loaded:
+            self.exchanges = await asyncio.to_thread(self._read)
+            self._loaded = True
+
+    async def save(self) -> None:
+        """Write the exchanges to the file."""
+        await asyncio.to_thread(self._write)
+
+    def record(
+        self, session: aiohttp.ClientSession, api_url: str
+    ) -> "RecordingSession":
+        """Wrap an HTTP session so its exchanges are recorded."""
+        self._started = monotonic()
+        return RecordingSession(self, session, api_url)
+
+    def replay(self, api_url: str) -> "ReplaySession":
+        """Return an HTTP session answering from the loaded exchanges."""
+        return ReplaySession(self, api_url)
+
+
+def _request_name(url: str, api_url: str) -> str:
+    """Return the request type name of an API URL."""
+    return Request(url.removeprefix(api_url)).name
+
+
+class _DeviceTracker:
+    """Tracks the device selected on each API session, keyed by its cookie."""
+
+    def __init__(self) -> None:
+        """Initialize the tracker."""
+        self._devices: dict[str, str | None] = {}
+
+    @staticmethod
+    def session_key(headers: dict | None) -> str:
+        """Return the session a request was sent on."""
+        return (headers or {}).get("Cookie", "")
+
+    def device(self, headers: dict | None) -> str | None:
+        """Return the device selected on the session of a request."""
+        return self._devices.get(self.session_key(headers))
+
+    def observe(
+        self, request: str, payload: Any, headers: dict | None, status: int
+    ) -> None:
+        """Follow device changes made by a successful request."""
+        if request == Request.CHANGE_DEVICE.name and status == 200:
+            self._devices[self.session_key(headers)] = str(payload["device"])
+
+
+class RecordingSession:
+    """HTTP session wrapper adding every exchange to a cassette."""
+
+    def __init__(
+        self, cassette: Cassette, session: aiohttp.ClientSession, api_url: str
+    ) -> None:
+        """Initialize the wrapper."""
+        self._cassette = cassette
+        self._session = session
+        self._api_url = api_url
+        self._tracker = _DeviceTracker()
+        self._placeholders: dict[str, str] = {}
+
+    @property
+    def closed(self) -> bool:
+        """Return whether the wrapped session is closed."""
+        return self._session.closed
+
+    async def close(self) -> None:
+        """Close the wrapped session."""
+        await self._session.close()
+
+    def post(
+        self, url: str, headers: dict | None = None, data: Any = None, **kwargs: Any
+    ) -> "_RecordingContext":
+        """Send a request, recording it once the response arrived."""
+        return _RecordingContext(self, url, headers, data, kwargs)
+
+    async def _record(
+        self,
+        url: str,
+        headers: dict | None,
+        data: Any,
+        response: aiohttp.ClientResponse,
+        start: float,
+    ) -> None:
+        """Add the exchange of a response to the cassette."""
+        body = await response.read()
+        request = _request_name(url, self._api_url)
+        cookies = {}
+        for name, morsel in response.cookies.items():
+            # Session tokens grant control of the heaters, so only a stable
+            # placeholder is written; replays just need them to be consistent
+            placeholder = self._placeholders.setdefault(
+                morsel.value, f"session-{len(self._placeholders) + 1}"
+            )
+            cookies[name] = {"value": placeholder}
+            if (lifetime := cookie_lifetime(morsel)) is not None:
+                cookies[name]["max-age"] = str(int(lifetime))
+
+        self._cassette.add(
+            Exchange(
+                request=request,
+                payload=_redact(data),
+                device=self._tracker.device(headers),
+                status=response.status,
+                body=body.decode("utf-8", errors="replace"),
+                headers={
+                    name: response.headers[name]
+                    for name in RECORDED_HEADERS
+                    if name in response.headers
+                },
+                cookies=cookies,
+                offset=start - self._cassette._started,
+                elapsed=monotonic() - start,
+            )
+        )
+        self._tracker.observe(request, data, headers, response.status)
+
+
+class _RecordingContext:
+    """Context of one recorded request."""
+
+    def __init__(
+        self,
+        owner: RecordingSession,
+        url: str,
+        headers: dict | None,
+        data: Any,
+        kwargs: dict,
+    ) -> None:
+        self._owner = owner
+        self._url = url
+        self._headers = headers
+        self._data = data
+        self._context = owner._session.post(url, headers=headers, data=data, **kwargs)
+
+    async def __aenter__(self) -> aiohttp.ClientResponse:
+        start = monotonic()
+        response = await self._context.__aenter__()
+        await self._owner._record(self._url, self._headers, self._data, response, start)
+        return response
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self._context.__aexit__(*args)
+
+
+class _ReplayResponse:
+    """Response served from a recorded exchange."""
+
+    def __init__(self, exchange: Exchange) -> None:
+        self.status = exchange.status
+        self.headers = dict(exchange.headers)
+        self.cookies: SimpleCookie = SimpleCookie()
+        for name, attributes in exchange.cookies.items():
+            self.cookies[name] = attributes["value"]
+            if "max-age" in attributes:
+                self.cookies[name]["max-age"] = attributes["max-age"]
+        self._body = exchange.body
+
+    async def json(self, **_: Any) -> Any:
+        return json.loads(self._body) if self._body else None
+
+    async def text(self) -> str:
+        return self._body
+
+    async def read(self) -> bytes:
+        return self._body.encode()
+
+
+class ReplaySession:
+    """HTTP session stand-in answering requests from a cassette."""
+
+    def __init__(self, cassette: Cassette, api_url: str) -> None:
+        """Index the exchanges of the cassette for matching."""
+        self._cassette = cassette
+        self._api_url = api_url
+        self._tracker = _DeviceTracker()
+        self._exchanges: dict[tuple, list[Exchange]] = {}
+        self._served: dict[tuple, int] = {}
+        self._logins = 0
+        self.closed = False
+        for exchange in cassette.exchanges:
+            self._exchanges.setdefault(exchange.key(), []).append(exchange)
+
+    async def close(self) -> None:
+        """Close the session."""
+        self.closed = True
+
+    def post(
+        self, url: str, headers: dict | None = None, data: Any = None, **_: Any
+    ) -> "_ReplayContext":
+        """Answer a request from the cassette."""
+        return _ReplayContext(self, url, headers, data)
+
+    async def _respond(
+        self, url: str, headers: dict | None, data: Any
+    ) -> _ReplayResponse:
+        """Return the response recorded for a request."""
+        request = _request_name(url, self._api_url)
+        key = _key(request, _redact(data), self._tracker.device(headers))
+        exchanges = self._exchanges.get(key)
+        if not exchanges:
+            raise CassetteMissException(
+                f"No recorded {request} with payload {key[1]} for device {key[2]}"
+            )
+
+        served = self._served.get(key, 0)
+        self._served[key] = served + 1
+        exchange = exchanges[min(served, len(exchanges) - 1)]
+        if self._cassette.realtime:
+            await asyncio.sleep(exchange.elapsed)
+
+        self._tracker.observe(request, data, headers, exchange.status)
+        response = _ReplayResponse(exchange)
+        if request == Request.LOGIN.name:
+            # Each login gets its own session, also beyond the recorded ones
+            self._logins += 1
+            for morsel in response.cookies.values():
+                token = f"replay-{self._logins}"
+                morsel.set(morsel.key, token, token)
+        return response
+
+
+class _ReplayContext:
+    """Context of one replayed request."""
+
+    def __init__(
+        self, owner: ReplaySession, url: str, headers: dict | None, data: Any
+    ) -> None:
+        self._owner = owner
+        self._url = url
+        self._headers = headers
+        self._data = data
+
+    async def __aenter__(self) -> _ReplayResponse:
+        return await self._owner._respond(self._url, self._headers, self._data)
+
+    async def __aexit__(self, *_: Any) -> None:
+        return None
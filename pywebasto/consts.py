@@ -13,3 +13,11 @@ CMD_AUX1_OFF = "OUT 1 OFF"
 
 CMD_AUX2_ON = "OUT 2 ON"
 CMD_AUX2_OFF = "OUT 2 OFF"
+
+# Commands switching an output line on (`True`) or off (`False`)
+OUTPUT_COMMANDS = {
+    "OUTH": {True: CMD_HEATER_ON, False: CMD_HEATER_OFF},
+    "OUTV": {True: CMD_VENTILATION_ON, False: CMD_VENTILATION_OFF},
+    "OUT1": {True: CMD_AUX1_ON, False: CMD_AUX1_OFF},
+    "OUT2": {True: CMD_AUX2_ON, False: CMD_AUX2_OFF},
+}
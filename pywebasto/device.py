@@ -1,103 +1,171 @@
 """Device class for Webasto devices."""
 
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone
 from typing import Any
 
+from .exceptions import InvalidRequestException
+from .timer import SimpleTimer, extract_simple_timers
+
+# Output lines carrying `simple` timers
+TIMER_LINES = ("OUTH", "OUTV")
+
+
+@dataclass(frozen=True, slots=True)
+class OutputState:
+    """Parsed state of one output line."""
+
+    line: str
+    state: str | None = None
+    name: str | None = None
+    icon: str = ""
+    ontime: int | float | None = None
+
+    @classmethod
+    def from_api_dict(cls, data: dict) -> "OutputState":
+        """Build from an output dict returned by API data endpoints."""
+        name = data.get("name")
+        return cls(
+            line=data["line"],
+            state=data.get("state"),
+            # An empty name means the default name, a missing name means none
+            name=(name or "") if "name" in data else None,
+            icon=data.get("icon", ""),
+            ontime=data.get("ontime"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceState:
+    """Immutable snapshot of the parsed state of a device."""
+
+    temperature: int = 0
+    voltage: float = 0.0
+    is_celsius: bool = False
+    location: dict = field(default_factory=dict)
+    connection_lost: bool | None = None
+    ventilation: bool = False
+    output_main: OutputState | None = None
+    output_aux1: OutputState | None = None
+    output_aux2: OutputState | None = None
+    icon_heat: str = ""
+    icon_vent: str = ""
+    icon_aux1: str = ""
+    icon_aux2: str = ""
+    timeout_heat: int = 0
+    timeout_vent: int = 0
+    timeout_aux1: int = 0
+    timeout_aux2: int = 0
+    hardware_version: str = ""
+    software_version: str = ""
+    software_variant: str = ""
+    allow_location: bool = False
+    low_voltage_cutoff: float = 0.0
+    temperature_compensation: float = 0.0
+    subscription_expiration: datetime | None = None
+    timers: tuple[tuple[SimpleTimer, ...], ...] | None = None
+
 
 class WebastoDevice:
-    """Webasto Device representation."""
+    """Webasto Device representation.
+
+    Parsed values are kept in an immutable `DeviceState` snapshot. With
+    `keep_payloads=False` the raw API payloads are dropped once parsed, which
+    keeps the memory footprint of large fleets small.
+    """
 
-    def __init__(self, device_id: str, name: str) -> None:
+    def __init__(self, device_id: str, name: str, keep_payloads: bool = True) -> None:
         """Initialize the device."""
         self.__device_id: str = device_id
         self.__name: str = name
-        self.__temperature: int = 0
-        self.__voltage: float = 0.0
-        self.__location: dict = {}
-        self.__output_main: dict = {}
-        self.__output_aux1: dict = {}
-        self.__output_aux2: dict = {}
-        self.__ventilation: bool = False
-        self.__iscelcius: bool = False
-        self.__hardware_version: str = ""
-        self.__software_version: str = ""
-        self.__software_variant: str = ""
-        self.__allow_location: bool = False
-        self.__low_voltage_cutoff: float = 0.0
-        self.__temperature_compensation: float = 0.0
-        self.__subscription_expiration: datetime | None = None
-        self.__connection_lost: bool | None = None
+        self.__keep_payloads: bool = keep_payloads
+        self.__state: DeviceState = DeviceState()
+        self.__timers_error: InvalidRequestException | None = None
+        self.__hydrated: bool = False
         self.__last_data: dict | None = {}
         self.__dev_data: dict | None = {}
         self.__settings: dict | None = {}
-        self.__icon_vent: str = ""
-        self.__icon_heat: str = ""
-        self.__icon_aux1: str = ""
-        self.__icon_aux2: str = ""
-        self.__timeout_heat: int = 0
-        self.__timeout_vent: int = 0
-        self.__timeout_aux1: int = 0
-        self.__timeout_aux2: int = 0
+        self.__settings_values: dict[tuple[str, str], Any] = {}
+        self.__output_timeouts: dict[str, int] = {}
+
+    @property
+    def snapshot(self) -> DeviceState:
+        """Returns the immutable snapshot of the parsed device state."""
+        return self.__state
+
+    @property
+    def hydrated(self) -> bool:
+        """Returns whether the device data has been loaded from the API."""
+        return self.__hydrated
+
+    @property
+    def keep_payloads(self) -> bool:
+        """Returns whether raw API payloads are kept after parsing."""
+        return self.__keep_payloads
+
+    def __update(self, **changes: Any) -> None:
+        """Replace the snapshot with one carrying the changed values."""
+        self.__state = replace(self.__state, **changes)
 
     @property
     def timeout_heat(self) -> int:
         """Returns the heater timeout in seconds."""
-        return self.__timeout_heat
+        return self.__state.timeout_heat
 
     @timeout_heat.setter
     def timeout_heat(self, value: int) -> None:
         """Sets the heater timeout in seconds."""
-        self.__timeout_heat = value
+        self.__update(timeout_heat=value)
 
     @property
     def timeout_vent(self) -> int:
         """Returns the ventilation timeout in seconds."""
-        return self.__timeout_vent
+        return self.__state.timeout_vent
 
     @timeout_vent.setter
     def timeout_vent(self, value: int) -> None:
         """Sets the ventilation timeout in seconds."""
-        self.__timeout_vent = value
+        self.__update(timeout_vent=value)
 
     @property
     def timeout_aux1(self) -> int:
         """Returns the aux1 timeout in seconds."""
-        return self.__timeout_aux1
+        return self.__state.timeout_aux1
 
     @timeout_aux1.setter
     def timeout_aux1(self, value: int) -> None:
         """Sets the aux1 timeout in seconds."""
-        self.__timeout_aux1 = value
+        self.__update(timeout_aux1=value)
 
     @property
     def timeout_aux2(self) -> int:
         """Returns the aux2 timeout in seconds."""
-        return self.__timeout_aux2
+        return self.__state.timeout_aux2
 
     @timeout_aux2.setter
     def timeout_aux2(self, value: int) -> None:
         """Sets the aux2 timeout in seconds."""
-        self.__timeout_aux2 = value
+        self.__update(timeout_aux2=value)
 
     @property
     def icon_vent(self) -> str:
         """Returns the ventilation icon."""
-        return self.__icon_vent
+        return self.__state.icon_vent
 
     @property
     def icon_heat(self) -> str:
         """Returns the heater icon."""
-        return self.__icon_heat
+        return self.__state.icon_heat
 
     @property
     def icon_aux1(self) -> str:
         """Returns the aux1 icon."""
-        return self.__icon_aux1
+        return self.__state.icon_aux1
 
     @property
     def icon_aux2(self) -> str:
         """Returns the aux2 icon."""
-        return self.__icon_aux2
+        return self.__state.icon_aux2
 
     @property
     def last_data(self) -> dict | None:
@@ -107,40 +175,51 @@ class WebastoDevice:
     @last_data.setter
     def last_data(self, value: dict | None) -> None:
         """Sets the last data dictionary."""
-        self.__last_data = value
+        self.__last_data = value if self.__keep_payloads else None
 
-        if self.__last_data is None:
+        if value is None:
             return
 
-        if self.__last_data["temperature"][-1] == "C":
-            self.__iscelcius = True
-
-        self.__temperature = int(
-            self.__last_data["temperature"][: len(self.__last_data["temperature"]) - 1]
-        )
-        self.__voltage = float(
-            self.__last_data["voltage"][: len(self.__last_data["voltage"]) - 1]
-        )
-        self.__location = self.__last_data["location"]
-        connection_lost = self.__last_data.get("connection_lost")
+        changes: dict[str, Any] = {
+            "is_celsius": self.__state.is_celsius or value["temperature"][-1] == "C",
+            "temperature": int(value["temperature"][: len(value["temperature"]) - 1]),
+            "voltage": float(value["voltage"][: len(value["voltage"]) - 1]),
+            "location": value["location"],
+        }
+        connection_lost = value.get("connection_lost")
         if isinstance(connection_lost, bool):
-            self.__connection_lost = connection_lost
-
-        for output in self.__last_data["outputs"]:
-            if output["line"] == "OUTH" or output["line"] == "OUTV":
-                self.__output_main = output
-                if output["line"] == "OUTH":
-                    self.__ventilation = False
-                    self.__icon_heat = output["icon"]
+            changes["connection_lost"] = connection_lost
+
+        for data in value["outputs"]:
+            output = OutputState.from_api_dict(data)
+            if output.line == "OUTH" or output.line == "OUTV":
+                changes["output_main"] = output
+                if output.line == "OUTH":
+                    changes["ventilation"] = False
+                    changes["icon_heat"] = output.icon
                 else:
-                    self.__ventilation = True
-                    self.__icon_vent = output["icon"]
-            elif output["line"] == "OUT1":
-                self.__output_aux1 = output
-                self.__icon_aux1 = output["icon"]
-            elif output["line"] == "OUT2":
-                self.__output_aux2 = output
-                self.__icon_aux2 = output["icon"]
+                    changes["ventilation"] = True
+                    changes["icon_vent"] = output.icon
+            elif output.line == "OUT1":
+                changes["output_aux1"] = output
+                changes["icon_aux1"] = output.icon
+            elif output.line == "OUT2":
+                changes["output_aux2"] = output
+                changes["icon_aux2"] = output.icon
+
+        if not self.__keep_payloads:
+            # Timers cannot be read from a dropped payload later on
+            self.__timers_error = None
+            try:
+                changes["timers"] = tuple(
+                    tuple(extract_simple_timers(value, line)) for line in TIMER_LINES
+                )
+            except InvalidRequestException as err:
+                self.__timers_error = err
+                changes["timers"] = None
+
+        self.__update(**changes)
+        self.__hydrated = True
 
     @property
     def dev_data(self) -> dict | None:
@@ -150,16 +229,20 @@ class WebastoDevice:
     @dev_data.setter
     def dev_data(self, value: dict | None) -> None:
         """Sets the device data dictionary."""
-        self.__dev_data = value
-        if self.__dev_data is None:
+        self.__dev_data = value if self.__keep_payloads else None
+        if value is None:
             return
 
-        self.__subscription_expiration = datetime.fromtimestamp(
-            value["subscription"]["expiration"]
-        )
+        changes: dict[str, Any] = {
+            "subscription_expiration": datetime.fromtimestamp(
+                value["subscription"]["expiration"]
+            )
+        }
         connection_lost = value.get("connection_lost")
         if isinstance(connection_lost, bool):
-            self.__connection_lost = connection_lost
+            changes["connection_lost"] = connection_lost
+
+        self.__update(**changes)
 
     @property
     def settings(self) -> dict | None:
@@ -169,51 +252,55 @@ class WebastoDevice:
     @settings.setter
     def settings(self, value: dict | None) -> None:
         """Sets the settings dictionary."""
-        self.__settings = value
+        self.__settings = value if self.__keep_payloads else None
+        self.__index_settings(value)
 
         if value is None:
             return
 
-        self.__allow_location = self.__get_value("general", "allow_GPS")
-        self.__low_voltage_cutoff = self.__get_value("general", "low_voltage_cutoff")
-        self.__temperature_compensation = self.__get_value("general", "ext_temp_comp")
+        changes: dict[str, Any] = {
+            "allow_location": self.__get_value("general", "allow_GPS"),
+            "low_voltage_cutoff": self.__get_value("general", "low_voltage_cutoff"),
+            "temperature_compensation": self.__get_value("general", "ext_temp_comp"),
+        }
 
         # self.timeout_heat = self.__get_value("settings_tab", "OUTH")
         # self.timeout_vent = self.__get_value("settings_tab", "OUTV")
         # self.timeout_aux1 = self.__get_value("settings_tab", "OUT1")
         # self.timeout_aux2 = self.__get_value("settings_tab", "OUT2")
-        self.__get_timeouts()
+        changes.update(self.__get_timeouts())
+        self.__update(**changes)
 
     @property
     def temperature(self) -> int:
         """Returns the current temperature."""
-        return self.__temperature
+        return self.__state.temperature
 
     @property
     def voltage(self) -> float:
         """Returns the current voltage."""
-        return self.__voltage
+        return self.__state.voltage
 
     @property
     def location(self) -> dict | bool:
         """Returns the current location."""
-        return self.__location if self.__location["state"] == "ON" else False
+        location = self.__state.location
+        # Devices not refreshed yet have no location at all
+        return location if location.get("state") == "ON" else False
 
     @property
     def output_main(self) -> bool:
         """Get the main output state."""
-        if "state" in self.__output_main:
-            return False if self.__output_main["state"] == "OFF" else True
-        else:
-            return False
+        return self.__is_on(self.__state.output_main)
 
     @property
     def output_main_ontime(self) -> int | None:
         """Get the unix timestamp for when the main output will stop."""
-        if self.__output_main.get("state") != "ON":
+        output = self.__state.output_main
+        if output is None or output.state != "ON":
             return None
 
-        ontime = self.__output_main.get("ontime")
+        ontime = output.ontime
         if isinstance(ontime, int | float) and ontime > 0:
             return int(ontime)
 
@@ -230,58 +317,52 @@ class WebastoDevice:
     @property
     def output_aux1(self) -> bool:
         """Get the aux output state."""
-        if "state" in self.__output_aux1:
-            return False if self.__output_aux1["state"] == "OFF" else True
-        else:
-            return False
+        return self.__is_on(self.__state.output_aux1)
 
     @property
     def output_aux2(self) -> bool:
         """Get the aux output state."""
-        if "state" in self.__output_aux2:
-            return False if self.__output_aux2["state"] == "OFF" else True
-        else:
-            return False
+        return self.__is_on(self.__state.output_aux2)
 
     @property
     def is_ventilation(self) -> bool:
         """Get the mode of the output channel."""
-        return self.__ventilation
+        return self.__state.ventilation
 
     @property
     def temperature_unit(self) -> str:
         """Get the temperature unit."""
-        return "°C" if self.__iscelcius else "°F"
+        return "°C" if self.__state.is_celsius else "°F"
 
     @property
     def hardware_version(self) -> str:
         """Get the hardware version."""
-        return self.__hardware_version
+        return self.__state.hardware_version
 
     @property
     def software_version(self) -> str:
         """Get the software version."""
-        return self.__software_version
+        return self.__state.software_version
 
     @property
     def software_variant(self) -> str:
         """Get the software variant."""
-        return self.__software_variant
+        return self.__state.software_variant
 
     @property
     def allow_location(self) -> bool:
         """Get the location setting."""
-        return self.__allow_location
+        return self.__state.allow_location
 
     @property
     def low_voltage_cutoff(self) -> float:
         """Get the low_voltage_cutoff setting."""
-        return self.__low_voltage_cutoff
+        return self.__state.low_voltage_cutoff
 
     @property
     def temperature_compensation(self) -> float:
         """Get the ext_temp_comp setting."""
-        return self.__temperature_compensation
+        return self.__state.temperature_compensation
 
     @property
     def device_id(self) -> str:
@@ -296,73 +377,135 @@ class WebastoDevice:
     @property
     def output_main_name(self) -> str | bool:
         """Get the main output name."""
-        if "name" in self.__output_main:
-            return self.__output_main["name"] or "Primary"
-        else:
-            return False
+        return self.__output_name(self.__state.output_main, "Primary")
 
     @property
     def output_aux1_name(self) -> str | bool:
         """Get the aux1 output name."""
-        if "name" in self.__output_aux1:
-            return self.__output_aux1["name"] or "Output 1"
-        else:
-            return False
+        return self.__output_name(self.__state.output_aux1, "Output 1")
 
     @property
     def output_aux2_name(self) -> str | bool:
         """Get the aux2 output name."""
-        if "name" in self.__output_aux2:
-            return self.__output_aux2["name"] or "Output 2"
-        else:
-            return False
+        return self.__output_name(self.__state.output_aux2, "Output 2")
+
+    @property
+    def timers(self) -> dict[str, list[SimpleTimer]]:
+        """Get simple timers of the main output lines from the last data."""
+        if self.__keep_payloads:
+            return {
+                line: extract_simple_timers(self.__last_data, line)
+                for line in TIMER_LINES
+            }
+
+        if self.__timers_error is not None:
+            raise self.__timers_error
+
+        timers = self.__state.timers or ((),) * len(TIMER_LINES)
+        return {line: list(parsed) for line, parsed in zip(TIMER_LINES, timers)}
 
     @property
     def subscription_expiration(self) -> datetime:
         """Get subscription expiration."""
-        return self.__subscription_expiration
+        return self.__state.subscription_expiration
 
     @property
     def connection_lost(self) -> bool | None:
         """Get the raw cloud connection state from API data."""
-        return self.__connection_lost
+        return self.__state.connection_lost
 
     @property
     def is_connected(self) -> bool | None:
         """Get whether the device currently appears connected to cloud."""
-        if self.__connection_lost is None:
+        if self.__state.connection_lost is None:
             return None
 
-        return not self.__connection_lost
+        return not self.__state.connection_lost
+
+    @property
+    def output_timeouts(self) -> dict[str, int]:
+        """Get the timeouts in seconds of all outputs, keyed by output line."""
+        return dict(self.__output_timeouts)
+
+    def get_setting(self, group: str, key: str, default: Any = None) -> Any:
+        """Get the value of a settings option, or `default` if it is missing."""
+        return self.__settings_values.get((group, key), default)
+
+    def settings_group(self, group: str) -> dict[str, Any]:
+        """Get the values of all options in a settings group."""
+        return {
+            key: value
+            for (option_group, key), value in self.__settings_values.items()
+            if option_group == group
+        }
+
+    def apply_output_state(self, line: str, state: bool) -> None:
+        """Set the state of an output locally, until a refresh confirms it."""
+        field_name = {
+            "OUTH": "output_main",
+            "OUTV": "output_main",
+            "OUT1": "output_aux1",
+            "OUT2": "output_aux2",
+        }[line]
+        output = getattr(self.__state, field_name) or OutputState(line)
+        # The stop time of the output is unknown until the next refresh
+        self.__update(
+            **{
+                field_name: replace(
+                    output, line=line, state="ON" if state else "OFF", ontime=None
+                )
+            }
+        )
 
-    def __get_value(self, group: str, key: str) -> Any:
-        """Get a value from the settings dict."""
-        if self.settings is None:
-            return None
+    def apply_ventilation_mode(self, state: bool) -> None:
+        """Set the mode of the main output locally, until a refresh confirms it."""
+        self.__update(ventilation=state)
 
-        for g in self.settings["settings_tab"]:
-            if g["group"] != group:
-                continue
+    @staticmethod
+    def __is_on(output: OutputState | None) -> bool:
+        """Get whether an output is switched on."""
+        if output is None or output.state is None:
+            return False
 
-            for o in g["options"]:
-                if o["key"] == key:
-                    return o["value"]
+        return output.state != "OFF"
 
-    def __get_timeouts(self) -> None:
-        """Get output timeouts from the settings dict."""
-        if self.settings is None:
-            return None
+    @staticmethod
+    def __output_name(output: OutputState | None, default: str) -> str | bool:
+        """Get the name of an output, or its default name when unnamed."""
+        if output is None or output.name is None:
+            return False
+
+        return output.name or default
 
-        for g in self.settings["settings_tab"]:
-            if g["group"] not in ["webasto", "outputs"]:
-                continue
+    def __index_settings(self, settings: dict | None) -> None:
+        """Index the settings payload by group and option key."""
+        self.__settings_values = {}
+        self.__output_timeouts = {}
+        if settings is None:
+            return
 
+        for g in settings["settings_tab"]:
             for o in g["options"]:
-                if o["key"] == "OUTH":
-                    self.__timeout_heat = o["timeout"]
-                elif o["key"] == "OUTV":
-                    self.__timeout_vent = o["timeout"]
-                elif o["key"] == "OUT1":
-                    self.__timeout_aux1 = o["timeout"]
-                elif o["key"] == "OUT2":
-                    self.__timeout_aux2 = o["timeout"]
+                # The first option with a key wins, as in a linear search
+                self.__settings_values.setdefault(
+                    (g["group"], o["key"]), o.get("value")
+                )
+                if g["group"] in ("webasto", "outputs") and "timeout" in o:
+                    self.__output_timeouts[o["key"]] = o["timeout"]
+
+    def __get_value(self, group: str, key: str) -> Any:
+        """Get a value from the settings dict."""
+        return self.__settings_values.get((group, key))
+
+    def __get_timeouts(self) -> dict[str, int]:
+        """Get output timeouts from the settings dict."""
+        timeouts = {}
+        for line, name in (
+            ("OUTH", "timeout_heat"),
+            ("OUTV", "timeout_vent"),
+            ("OUT1", "timeout_aux1"),
+            ("OUT2", "timeout_aux2"),
+        ):
+            if line in self.__output_timeouts:
+                timeouts[name] = self.__output_timeouts[line]
+        return timeouts
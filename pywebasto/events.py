@@ -0,0 +1,140 @@
+"""Change notifications for Webasto devices."""
+
+import logging
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from .device import WebastoDevice
+from .exceptions import InvalidRequestException
+
+LOGGER = logging.getLogger(__name__)
+
+# Device fields listeners can subscribe to
+FIELDS: dict[str, Callable[[WebastoDevice], Any]] = {
+    "temperature": lambda device: device.temperature,
+    "voltage": lambda device: device.voltage,
+    "output_main": lambda device: device.output_main,
+    "output_aux1": lambda device: device.output_aux1,
+    "output_aux2": lambda device: device.output_aux2,
+    "is_ventilation": lambda device: device.is_ventilation,
+    "is_connected": lambda device: device.is_connected,
+    "location": lambda device: device.location,
+    "low_voltage_cutoff": lambda device: device.low_voltage_cutoff,
+    "temperature_compensation": lambda device: device.temperature_compensation,
+    "timers": lambda device: device.timers,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceChange:
+    """Changed fields of a device after a refresh, as `(old, new)` pairs."""
+
+    device: WebastoDevice
+    changes: dict[str, tuple[Any, Any]]
+
+    @property
+    def device_id(self) -> str:
+        """Return the ID of the changed device."""
+        return self.device.device_id
+
+
+ChangeListener = Callable[[DeviceChange], None]
+
+
+@dataclass(slots=True, eq=False)
+class _Subscription:
+    """A registered listener and what it listens for."""
+
+    callback: ChangeListener
+    fields: frozenset[str]
+    device_id: str | None
+
+
+class ChangeNotifier:
+    """Registry of change listeners with field-level diffing."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._subscriptions: list[_Subscription] = []
+
+    def subscribe(
+        self,
+        callback: ChangeListener,
+        fields: Iterable[str] | None = None,
+        device_id: str | None = None,
+    ) -> Callable[[], None]:
+        """Register a listener and return a function that removes it again."""
+        wanted = frozenset(FIELDS if fields is None else fields)
+        if unknown := wanted - FIELDS.keys():
+            raise ValueError(f"Unknown device fields: {', '.join(sorted(unknown))}")
+
+        subscription = _Subscription(callback, wanted, device_id)
+        self._subscriptions.append(subscription)
+
+        def unsubscribe() -> None:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+        return unsubscribe
+
+    def _fields_for(self, device_id: str) -> frozenset[str]:
+        """Return the fields any listener wants for a device."""
+        fields: frozenset[str] = frozenset()
+        for subscription in self._subscriptions:
+            if subscription.device_id in (None, device_id):
+                fields |= subscription.fields
+        return fields
+
+    def snapshot(self, device: WebastoDevice, known: bool = True) -> dict[str, Any]:
+        """Capture the watched fields of a device before it is refreshed.
+
+        For a device that was never refreshed (`known=False`) all old values
+        are `None`.
+        """
+        fields = self._fields_for(device.device_id)
+        if not known:
+            return dict.fromkeys(fields)
+        return {field: self._read(device, field) for field in fields}
+
+    def notify(self, device: WebastoDevice, before: dict[str, Any]) -> None:
+        """Call listeners whose fields changed since `before` was captured."""
+        if not before:
+            return
+
+        changes = {}
+        for field, old in before.items():
+            new = self._read(device, field)
+            if new != old:
+                changes[field] = (old, new)
+
+        if not changes:
+            return
+
+        for subscription in list(self._subscriptions):
+            if subscription.device_id not in (None, device.device_id):
+                continue
+
+            wanted = {
+                field: change
+                for field, change in changes.items()
+                if field in subscription.fields
+            }
+            if not wanted:
+                continue
+
+            try:
+                subscription.callback(DeviceChange(device, wanted))
+            except Exception:
+                LOGGER.exception(
+                    "Change listener failed for device %s", device.device_id
+                )
+
+    @staticmethod
+    def _read(device: WebastoDevice, field: str) -> Any:
+        """Read one watched field from a device."""
+        try:
+            return FIELDS[field](device)
+        except (InvalidRequestException, KeyError, TypeError):
+            # Incomplete payloads should not break notifications of other fields
+            return None
@@ -19,3 +19,7 @@ class InvalidResponseException(Exception):
 
 class TooManyRequestsException(Exception):
     """Too many requests - you are being rate limited."""
+
+
+class CassetteMissException(InvalidRequestException):
+    """No recorded exchange matches the request being replayed."""
@@ -0,0 +1,250 @@
+"""Durable storage of device telemetry."""
+
+import asyncio
+import logging
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from .telemetry import OUTPUT_BITS, TelemetryBucket, TelemetrySample
+
+LOGGER = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS telemetry (
+    device_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    temperature REAL NOT NULL,
+    voltage REAL NOT NULL,
+    outputs INTEGER NOT NULL,
+    PRIMARY KEY (device_id, timestamp)
+) WITHOUT ROWID
+"""
+# Output shares of the aggregate query, in `OUTPUT_BITS` order
+_OUTPUT_SHARES = ", ".join(
+    f"AVG((outputs & {bit}) != 0)" for bit in OUTPUT_BITS.values()
+)
+
+
+class HistoryStore(ABC):
+    """Base class for stores persisting the telemetry of every device refresh.
+
+    `add()` is called on the event loop for each refreshed device and must not
+    block. Implementations buffer samples and persist them in `flush()`.
+    """
+
+    @abstractmethod
+    def add(self, device_id: str, sample: TelemetrySample) -> None:
+        """Queue a sample of a device for storage."""
+
+    @abstractmethod
+    async def flush(self) -> None:
+        """Persist all queued samples."""
+
+    async def close(self) -> None:
+        """Persist all queued samples and release the storage."""
+        await self.flush()
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """History store backed by an SQLite database.
+
+    Samples are buffered and written in one transaction once `batch_size` are
+    queued, or `flush_interval` seconds after the first one was queued. Rows
+    are keyed by `(device_id, timestamp)`, so range and aggregate queries of a
+    device read one contiguous index range. All database work runs in a
+    worker thread.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        batch_size: int = 1000,
+        flush_interval: float = 5.0,
+    ) -> None:
+        """Initialize the store, the database is opened on first use."""
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+
+        self.path = str(path) if str(path) == ":memory:" else Path(path).expanduser()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: list[tuple[str, float, float, float, int]] = []
+        self._connection: sqlite3.Connection | None = None
+        self._lock = asyncio.Lock()
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._flush_tasks: set[asyncio.Task] = set()
+
+    def add(self, device_id: str, sample: TelemetrySample) -> None:
+        """Queue a sample of a device for the next batch."""
+        self._pending.append(
+            (
+                device_id,
+                sample.timestamp,
+                sample.temperature,
+                sample.voltage,
+                sample.outputs,
+            )
+        )
+        if len(self._pending) >= self.batch_size:
+            self._start_flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._start_flush
+            )
+
+    def _start_flush(self) -> None:
+        """Write the queued samples in the background."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        task = asyncio.create_task(self._flush_in_background())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_in_background(self) -> None:
+        """Flush, keeping the samples queued when the write fails."""
+        try:
+            await self.flush()
+        except sqlite3.Error as err:
+            LOGGER.warning("Unable to write telemetry history: %s", err)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema, once."""
+        if self._connection is None:
+            if isinstance(self.path, Path):
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _write(self, rows: list[tuple[str, float, float, float, int]]) -> None:
+        """Insert rows in one transaction."""
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO telemetry VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    async def _run(self, query: Callable[..., Any] | None = None, *args: Any) -> Any:
+        """Write the queued samples, then run `query` in the worker thread."""
+        async with self._lock:
+            while self._pending:
+                rows, self._pending = self._pending, []
+                try:
+                    await asyncio.to_thread(self._write, rows)
+                except BaseException:
+                    self._pending[:0] = rows
+                    raise
+            if query is not None:
+                return await asyncio.to_thread(query, *args)
+            return None
+
+    async def flush(self) -> None:
+        """Write all queued samples."""
+        await self._run()
+
+    async def close(self) -> None:
+        """Write all queued samples and close the database."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        await self._run(self._close)
+
+    def _close(self) -> None:
+        """Close the database connection."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @staticmethod
+    def _range(start: float | None, end: float | None) -> tuple[float, float]:
+        """Return the bounds of a half-open time range."""
+        return (
+            float("-inf") if start is None else start,
+            float("inf") if end is None else end,
+        )
+
+    def _select_samples(
+        self, device_id: str, start: float, end: float, limit: int
+    ) -> list[tuple]:
+        """Read the sample rows of a device in a time range."""
+        return (
+            self._connect()
+            .execute(
+                "SELECT timestamp, temperature, voltage, outputs FROM telemetry"
+                " WHERE device_id = ? AND timestamp >= ? AND timestamp < ?"
+                " ORDER BY timestamp LIMIT ?",
+                (device_id, start, end, limit),
+            )
+            .fetchall()
+        )
+
+    async def samples(
+        self,
+        device_id: str,
+        start: float | None = None,
+        end: float | None = None,
+        limit: int | None = None,
+    ) -> list[TelemetrySample]:
+        """Return the samples of a device taken in `[start, end)`, oldest first."""
+        rows = await self._run(
+            self._select_samples,
+            device_id,
+            *self._range(start, end),
+            -1 if limit is None else limit,
+        )
+        return [TelemetrySample.from_row(*row) for row in rows]
+
+    def _select_buckets(
+        self, device_id: str, start: float, end: float, width: int
+    ) -> list[tuple]:
+        """Aggregate the sample rows of a device into buckets of `width` seconds."""
+        return (
+            self._connect()
+            .execute(
+                "SELECT CAST(timestamp / :width AS INTEGER) * :width AS bucket,"
+                " COUNT(*), MIN(temperature), MAX(temperature), AVG(temperature),"
+                f" MIN(voltage), MAX(voltage), AVG(voltage), {_OUTPUT_SHARES}"
+                " FROM telemetry"
+                " WHERE device_id = :device AND timestamp >= :start AND timestamp < :end"
+                " GROUP BY bucket ORDER BY bucket",
+                {"device": device_id, "start": start, "end": end, "width": width},
+            )
+            .fetchall()
+        )
+
+    async def buckets(
+        self,
+        device_id: str,
+        width: int = 3600,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> list[TelemetryBucket]:
+        """Return min/max/mean per `width` seconds of a device in `[start, end)`."""
+        if width < 1:
+            raise ValueError("width must be >= 1")
+
+        rows = await self._run(
+            self._select_buckets, device_id, *self._range(start, end), width
+        )
+        return [
+            TelemetryBucket(float(bucket), width, *values) for bucket, *values in rows
+        ]
+
+    def _delete_before(self, timestamp: float) -> int:
+        """Delete rows older than `timestamp`."""
+        with self._connect() as connection:
+            return connection.execute(
+                "DELETE FROM telemetry WHERE timestamp < ?", (timestamp,)
+            ).rowcount
+
+    async def prune(self, before: float) -> int:
+        """Delete all samples taken before `before` and return how many."""
+        return await self._run(self._delete_before, before)
@@ -0,0 +1,232 @@
+"""Request metrics of a Webasto Connect client."""
+
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Iterable
+
+from .enums import Request
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Upper bounds in seconds of the update lock wait histogram buckets
+DEFAULT_LOCK_WAIT_BUCKETS = (0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram of observed values."""
+
+    def __init__(self, buckets: Iterable[float]) -> None:
+        """Initialize an empty histogram."""
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add a value."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Return `(upper bound, count)` pairs, counting all values up to each bound."""
+        bounds = [repr(float(bucket)) for bucket in self.buckets] + ["+Inf"]
+        total = 0
+        pairs = []
+        for bound, count in zip(bounds, self.counts, strict=True):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def as_dict(self) -> dict:
+        """Return the histogram as plain data."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class RequestMetrics:
+    """Counters and histograms of the requests sent by `WebastoConnect`.
+
+    Requests are counted per attempt, so a retried request counts once per
+    attempt and once as a retry. Response sizes count the body bytes read,
+    after any transfer or content encoding was removed.
+    """
+
+    def __init__(
+        self,
+        latency_buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+        lock_wait_buckets: Iterable[float] = DEFAULT_LOCK_WAIT_BUCKETS,
+    ) -> None:
+        """Initialize empty metrics."""
+        self._latency_buckets = tuple(latency_buckets)
+        self._lock_wait_buckets = tuple(lock_wait_buckets)
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all observations."""
+        self.requests: Counter[Request] = Counter()
+        self.retries: Counter[Request] = Counter()
+        self.errors: Counter[Request] = Counter()
+        self.statuses: Counter[tuple[Request, int]] = Counter()
+        self.bytes_received: Counter[Request] = Counter()
+        self.latency: dict[Request, Histogram] = {}
+        self.update_cache: Counter[tuple[str, bool]] = Counter()
+        self.read_cache: Counter[tuple[Request, bool]] = Counter()
+        self.lock_wait = Histogram(self._lock_wait_buckets)
+
+    def observe_response(
+        self, api_type: Request, status: int, seconds: float, size: int
+    ) -> None:
+        """Record a response received for a request attempt."""
+        self.requests[api_type] += 1
+        self.statuses[(api_type, status)] += 1
+        self.bytes_received[api_type] += size
+        self._latency(api_type).observe(seconds)
+
+    def observe_error(self, api_type: Request, seconds: float) -> None:
+        """Record a request attempt failing without a response."""
+        self.requests[api_type] += 1
+        self.errors[api_type] += 1
+        self._latency(api_type).observe(seconds)
+
+    def observe_retry(self, api_type: Request) -> None:
+        """Record a request being retried."""
+        self.retries[api_type] += 1
+
+    def observe_update_cache(self, scope: str, hit: bool) -> None:
+        """Record whether an `update()` of `account` or `device` scope was skipped."""
+        self.update_cache[(scope, hit)] += 1
+
+    def observe_read_cache(self, api_type: Request, hit: bool) -> None:
+        """Record whether a cached read was served from the response cache."""
+        self.read_cache[(api_type, hit)] += 1
+
+    def observe_lock_wait(self, seconds: float) -> None:
+        """Record the time spent waiting for the update lock."""
+        self.lock_wait.observe(seconds)
+
+    def _latency(self, api_type: Request) -> Histogram:
+        """Return the latency histogram of a request type."""
+        if api_type not in self.latency:
+            self.latency[api_type] = Histogram(self._latency_buckets)
+        return self.latency[api_type]
+
+    def stats(self) -> dict:
+        """Return all metrics as plain data, keyed by request type name."""
+        requests = {}
+        for api_type in Request:
+            if not self.requests[api_type]:
+                continue
+            requests[api_type.name] = {
+                "count": self.requests[api_type],
+                "retries": self.retries[api_type],
+                "errors": self.errors[api_type],
+                "bytes_received": self.bytes_received[api_type],
+                "statuses": dict(
+                    sorted(
+                        (status, count)
+                        for (request, status), count in self.statuses.items()
+                        if request == api_type
+                    )
+                ),
+                "latency": self._latency(api_type).as_dict(),
+            }
+
+        return {
+            "requests": requests,
+            "update_cache": {
+                scope: {
+                    "hits": self.update_cache[(scope, True)],
+                    "misses": self.update_cache[(scope, False)],
+                }
+                for scope in ("account", "device")
+            },
+            "read_cache": {
+                api_type.name: {
+                    "hits": self.read_cache[(api_type, True)],
+                    "misses": self.read_cache[(api_type, False)],
+                }
+                for api_type in Request
+                if self.read_cache[(api_type, True)]
+                or self.read_cache[(api_type, False)]
+            },
+            "update_lock_wait": self.lock_wait.as_dict(),
+        }
+
+    def to_prometheus(self, prefix: str = "pywebasto") -> str:
+        """Export all metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+
+        def family(name: str, kind: str, description: str) -> str:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            return f"{prefix}_{name}"
+
+        def sample(name: str, labels: dict[str, object], value: float) -> None:
+            label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+            lines.append(
+                f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}"
+            )
+
+        def histogram(name: str, labels: dict[str, object], data: Histogram) -> None:
+            for bound, count in data.cumulative():
+                sample(f"{name}_bucket", {**labels, "le": bound}, count)
+            sample(f"{name}_sum", labels, data.sum)
+            sample(f"{name}_count", labels, data.count)
+
+        name = family("requests_total", "counter", "Request attempts sent to the API.")
+        for api_type, count in self.requests.items():
+            sample(name, {"request": api_type.name}, count)
+
+        name = family("request_retries_total", "counter", "Request attempts retried.")
+        for api_type, count in self.retries.items():
+            sample(name, {"request": api_type.name}, count)
+
+        name = family(
+            "request_errors_total", "counter", "Request attempts without a response."
+        )
+        for api_type, count in self.errors.items():
+            sample(name, {"request": api_type.name}, count)
+
+        name = family("responses_total", "counter", "Responses by HTTP status.")
+        for (api_type, status), count in sorted(
+            self.statuses.items(), key=lambda item: (item[0][0].name, item[0][1])
+        ):
+            sample(name, {"request": api_type.name, "status": status}, count)
+
+        name = family(
+            "response_bytes_total", "counter", "Response body bytes received."
+        )
+        for api_type, count in self.bytes_received.items():
+            sample(name, {"request": api_type.name}, count)
+
+        name = family(
+            "request_duration_seconds", "histogram", "Request attempt latency."
+        )
+        for api_type, data in self.latency.items():
+            histogram(name, {"request": api_type.name}, data)
+
+        name = family(
+            "update_cache_total", "counter", "update() calls skipped as fresh or not."
+        )
+        for (scope, hit), count in self.update_cache.items():
+            sample(name, {"scope": scope, "result": "hit" if hit else "miss"}, count)
+
+        name = family("read_cache_total", "counter", "Response cache lookups.")
+        for (api_type, hit), count in self.read_cache.items():
+            sample(
+                name,
+                {"request": api_type.name, "result": "hit" if hit else "miss"},
+                count,
+            )
+
+        name = family(
+            "update_lock_wait_seconds", "histogram", "Time waiting for the update lock."
+        )
+        histogram(name, {}, self.lock_wait)
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,194 @@
+"""Background polling of Webasto devices."""
+
+import asyncio
+import contextvars
+import logging
+from bisect import insort
+from dataclasses import dataclass
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from .device import WebastoDevice
+
+if TYPE_CHECKING:
+    from . import WebastoConnect
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class PollIntervals:
+    """Refresh intervals in seconds for the device activity states."""
+
+    active: float = 15
+    idle: float = 60
+    offline: float = 300
+    command_window: float = 120
+
+    def __post_init__(self) -> None:
+        """Validate the intervals."""
+        if min(self.active, self.idle, self.offline) <= 0:
+            raise ValueError("poll intervals must be > 0")
+        if self.command_window < 0:
+            raise ValueError("command_window must be >= 0")
+
+    def for_device(self, device: WebastoDevice, command_pending: bool) -> float:
+        """Return the interval matching the current state of a device."""
+        if device.connection_lost:
+            return self.offline
+        if command_pending or any(
+            (device.output_main, device.output_aux1, device.output_aux2)
+        ):
+            return self.active
+        return self.idle
+
+
+class DevicePoller:
+    """Background task refreshing each device at an activity-aware interval.
+
+    Devices are polled quickly while an output is on or a command was sent
+    recently, slowly while idle, and even slower while the device has lost
+    its cloud connection. Due times are kept apart so requests are spread
+    evenly instead of being sent in bursts.
+    """
+
+    def __init__(
+        self, client: "WebastoConnect", intervals: PollIntervals | None = None
+    ) -> None:
+        """Initialize the poller."""
+        self._client = client
+        self.intervals: PollIntervals = intervals or PollIntervals()
+        self._schedule: list[tuple[float, str]] = []
+        self._due: dict[str, float] = {}
+        self._failures: dict[str, int] = {}
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        """Return whether the polling task is running."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start polling in the background."""
+        if self.running:
+            return
+
+        # Run in an empty context so no session binding of the caller leaks in
+        self._task = asyncio.get_running_loop().create_task(
+            self._run(), context=contextvars.Context()
+        )
+
+    async def stop(self) -> None:
+        """Stop polling and wait for the task to finish."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def nudge(self, device_id: str) -> None:
+        """Poll a device soon, e.g. after a command was sent to it."""
+        if device_id not in self._due:
+            return
+
+        due = monotonic() + self.intervals.active
+        if due < self._due[device_id]:
+            self._unschedule(device_id)
+            self._push(device_id, due)
+            self._wakeup.set()
+
+    def interval_for(self, device_id: str) -> float:
+        """Return the next poll interval for a device."""
+        if failures := self._failures.get(device_id, 0):
+            return min(self.intervals.offline, self.intervals.active * 2**failures)
+
+        device = self._client.devices[device_id]  # type: ignore[index]
+        pending = self._client._command_pending(
+            device_id, self.intervals.command_window
+        )
+        return self.intervals.for_device(device, pending)
+
+    def _spacing(self) -> float:
+        """Return the minimum gap between two polls."""
+        return self.intervals.active / max(len(self._client.devices), 1)
+
+    def _push(self, device_id: str, due: float) -> None:
+        """Schedule a device, keeping it apart from other scheduled polls."""
+        spacing = self._spacing()
+        for other_due, _ in self._schedule:
+            if other_due > due + spacing:
+                break
+            if abs(other_due - due) < spacing:
+                due = other_due + spacing
+
+        self._due[device_id] = due
+        insort(self._schedule, (due, device_id))
+
+    def _unschedule(self, device_id: str) -> None:
+        """Remove a device from the schedule."""
+        if (due := self._due.pop(device_id, None)) is not None:
+            self._schedule.remove((due, device_id))
+
+    def _sync_devices(self) -> None:
+        """Schedule new devices and drop removed ones."""
+        device_ids = list(self._client.devices)
+        for device_id in list(self._due):
+            if device_id not in self._client.devices:
+                self._unschedule(device_id)
+                self._failures.pop(device_id, None)
+
+        new = [device_id for device_id in device_ids if device_id not in self._due]
+        if not new:
+            return
+
+        # Spread new devices evenly over the active interval
+        now = monotonic()
+        step = self.intervals.active / len(new)
+        for index, device_id in enumerate(new):
+            self._push(device_id, now + index * step)
+
+    async def _poll(self, device_id: str) -> None:
+        """Refresh one device and schedule its next poll."""
+        try:
+            await self._client.update(device_id=device_id)
+        except Exception as err:
+            # Keep polling, but back off this device until it recovers
+            self._failures[device_id] = self._failures.get(device_id, 0) + 1
+            LOGGER.debug("Polling device %s failed: %s", device_id, err)
+        else:
+            self._failures.pop(device_id, None)
+
+        if device_id in self._client.devices:
+            self._push(device_id, monotonic() + self.interval_for(device_id))
+
+    async def _run(self) -> None:
+        """Poll devices as they become due."""
+        while True:
+            self._sync_devices()
+            if not self._schedule:
+                await asyncio.sleep(self.intervals.active)
+                continue
+
+            delay = self._schedule[0][0] - monotonic()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except TimeoutError:
+                    pass
+                continue
+
+            now = monotonic()
+            due: list[str] = []
+            while self._schedule and self._schedule[0][0] <= now:
+                _, device_id = self._schedule.pop(0)
+                del self._due[device_id]
+                due.append(device_id)
+
+            # Devices due together run concurrently, bounded by the session pool
+            await asyncio.gather(*(self._poll(device_id) for device_id in due))
@@ -0,0 +1,119 @@
+"""Client-side rate limiting for Webasto Connect requests."""
+
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic
+
+from .exceptions import TooManyRequestsException
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the delay in seconds from a `Retry-After` header value."""
+    if value is None:
+        return None
+
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RateLimiter:
+    """Adaptive token bucket limiting the request rate towards the API.
+
+    The rate is halved whenever the API answers `429`, and no request is sent
+    before a received `Retry-After` delay has passed. Every successful request
+    raises the rate again by `recovery` requests per second, up to `rate`.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        min_rate: float | None = None,
+        recovery: float | None = None,
+        blocking: bool = True,
+    ) -> None:
+        """Initialize the limiter.
+
+        `rate` is the maximum sustained number of requests per second and
+        `burst` how many requests may be sent back to back. With `blocking`
+        set to `False`, `acquire` raises `TooManyRequestsException` instead of
+        waiting for a free slot.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        if burst < 1:
+            raise ValueError("burst must be >= 1")
+
+        self.max_rate: float = rate
+        self.min_rate: float = min_rate if min_rate is not None else rate / 16
+        self.recovery: float = recovery if recovery is not None else rate / 20
+        self.blocking: bool = blocking
+        self._rate: float = rate
+        self._burst: int = burst
+        self._tokens: float = float(burst)
+        self._updated: float = monotonic()
+        self._blocked_until: float = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Return the current allowed requests per second."""
+        return self._rate
+
+    def _refill(self, now: float) -> None:
+        """Add tokens for the time passed since the last refill."""
+        self._tokens = min(
+            float(self._burst), self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    def _delay(self, now: float) -> float:
+        """Return how long to wait before the next request may be sent."""
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self._rate
+
+    async def acquire(self) -> None:
+        """Take a request slot, waiting for one unless the limiter is non-blocking."""
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self._refill(now)
+                if (delay := self._delay(now)) <= 0:
+                    self._tokens -= 1
+                    return
+
+                if not self.blocking:
+                    raise TooManyRequestsException(
+                        f"Client-side rate limit reached, next slot in {delay:.1f} seconds"
+                    )
+                await asyncio.sleep(delay)
+
+    def on_success(self) -> None:
+        """Slowly raise the rate after a successful request."""
+        self._rate = min(self.max_rate, self._rate + self.recovery)
+
+    def on_throttled(self, retry_after: float | None = None) -> None:
+        """Back off after the API answered `429`."""
+        now = monotonic()
+        self._refill(now)
+        self._rate = max(self.min_rate, self._rate / 2)
+        self._tokens = 0.0
+        delay = retry_after if retry_after is not None else 1 / self._rate
+        self._blocked_until = max(self._blocked_until, now + delay)
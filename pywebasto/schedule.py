@@ -0,0 +1,281 @@
+"""Fleet-wide index of weekly timer activations."""
+
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import islice
+from time import time
+
+from .timer import SimpleTimer
+
+WEEK = 7 * 86400
+# Unix time of Monday 1970-01-05 00:00 UTC, where schedule weeks start
+_MONDAY = 4 * 86400
+
+
+@dataclass(frozen=True, slots=True)
+class Activation:
+    """One run of a timer."""
+
+    device_id: str
+    line: str
+    timer: SimpleTimer
+    start: datetime
+    end: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class TimerConflict:
+    """Two timers of a device that run at the same time every week.
+
+    `first` and `second` are the next runs that overlap, from `start` to `end`.
+    """
+
+    device_id: str
+    first: Activation
+    second: Activation
+    start: datetime
+    end: datetime
+
+
+@dataclass(slots=True, eq=False)
+class _Occurrence:
+    """Weekly run of a timer, `offset` seconds after Monday 00:00 UTC."""
+
+    device_id: str
+    line: str
+    timer: SimpleTimer
+    offset: int
+
+    def activation(self, start: float) -> Activation:
+        """Return the run starting at Unix time `start`."""
+        return Activation(
+            self.device_id,
+            self.line,
+            self.timer,
+            _datetime(start),
+            _datetime(start + self.timer.duration),
+        )
+
+
+@dataclass(slots=True, eq=False)
+class _Overlap:
+    """Weekly overlap of two occurrences, offsets may extend into the next week."""
+
+    first: _Occurrence
+    second: _Occurrence
+    second_offset: int
+    start: int
+    end: int
+
+
+def _timestamp(value: datetime | float | None) -> float:
+    """Return a datetime, Unix time or now as Unix time."""
+    if value is None:
+        return time()
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def _datetime(timestamp: float) -> datetime:
+    """Return a Unix time as UTC datetime."""
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def _week_start(timestamp: float) -> float:
+    """Return the Unix time of the Monday 00:00 UTC starting the week of `timestamp`."""
+    return timestamp - (timestamp - _MONDAY) % WEEK
+
+
+def _occurrences(
+    device_id: str, timers: Mapping[str, Sequence[SimpleTimer]]
+) -> list[_Occurrence]:
+    """Expand the enabled timers of a device into weekly occurrences."""
+    occurrences = []
+    for line, line_timers in timers.items():
+        for timer in line_timers:
+            if not timer.enabled:
+                continue
+            for day in range(7):
+                if timer.repeat & (1 << day):
+                    offset = day * 86400 + timer.start * 60
+                    occurrences.append(_Occurrence(device_id, line, timer, offset))
+    return occurrences
+
+
+def _overlaps(occurrences: list[_Occurrence]) -> list[_Overlap]:
+    """Find overlapping occurrences of different timers with a sweep."""
+    ordered = sorted(occurrences, key=lambda occurrence: occurrence.offset)
+    # Runs late on Sunday can overlap runs early next week
+    starts = [(occurrence.offset, occurrence) for occurrence in ordered]
+    starts += [(offset + WEEK, occurrence) for offset, occurrence in starts]
+
+    overlaps = []
+    for index, first in enumerate(ordered):
+        end = first.offset + first.timer.duration
+        for offset, second in islice(starts, index + 1, None):
+            if offset >= end:
+                break
+            if second.timer is first.timer:
+                continue
+            overlaps.append(
+                _Overlap(
+                    first,
+                    second,
+                    offset,
+                    offset,
+                    min(end, offset + second.timer.duration),
+                )
+            )
+    return overlaps
+
+
+class TimerSchedule:
+    """Index of the weekly timer activations of all devices.
+
+    Timers repeat on the weekdays of their `repeat` bitmask, `start` minutes
+    after midnight UTC. All runs are kept sorted by their offset into the
+    week, so the next activations and the devices running at a time are found
+    by binary search. `update()` only re-indexes a device whose timers
+    changed. Timers without weekdays (`repeat=0`) are not indexed, as the API
+    does not tell when such a timer runs.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty schedule."""
+        self._timers: dict[str, dict[str, list[SimpleTimer]]] = {}
+        self._devices: dict[str, list[_Occurrence]] = {}
+        self._offsets: list[int] = []
+        self._occurrences: list[_Occurrence] = []
+        self._durations: list[int] = []
+        self._overlaps: dict[str, list[_Overlap]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed weekly runs."""
+        return len(self._offsets)
+
+    def update(
+        self, device_id: str, timers: Mapping[str, Sequence[SimpleTimer]]
+    ) -> bool:
+        """Index the timers of a device per line, returning whether they changed."""
+        timers = {line: list(line_timers) for line, line_timers in timers.items()}
+        if self._timers.get(device_id) == timers:
+            return False
+
+        self._remove_occurrences(device_id)
+        self._timers[device_id] = timers
+        occurrences = _occurrences(device_id, timers)
+        for occurrence in occurrences:
+            index = bisect_right(self._offsets, occurrence.offset)
+            self._offsets.insert(index, occurrence.offset)
+            self._occurrences.insert(index, occurrence)
+            insort(self._durations, occurrence.timer.duration)
+        self._devices[device_id] = occurrences
+        self._overlaps[device_id] = _overlaps(occurrences)
+        return True
+
+    def remove(self, device_id: str) -> None:
+        """Remove the timers of a device."""
+        self._remove_occurrences(device_id)
+        self._timers.pop(device_id, None)
+        self._overlaps.pop(device_id, None)
+
+    def _remove_occurrences(self, device_id: str) -> None:
+        """Remove the indexed runs of a device."""
+        for occurrence in self._devices.pop(device_id, ()):
+            index = bisect_left(self._offsets, occurrence.offset)
+            while self._occurrences[index] is not occurrence:
+                index += 1
+            del self._offsets[index]
+            del self._occurrences[index]
+            del self._durations[bisect_left(self._durations, occurrence.timer.duration)]
+
+    def upcoming(
+        self,
+        limit: int | None = 10,
+        after: datetime | float | None = None,
+        before: datetime | float | None = None,
+    ) -> list[Activation]:
+        """Return the next activations starting at or after `after` (default now).
+
+        At most `limit` activations are returned, and only those starting
+        before `before` when it is set.
+        """
+        if limit is None and before is None:
+            raise ValueError("limit or before must be set")
+        if not self._offsets:
+            return []
+
+        now = _timestamp(after)
+        end = float("inf") if before is None else _timestamp(before)
+        week = _week_start(now)
+        index = bisect_left(self._offsets, now - week)
+        activations: list[Activation] = []
+        while limit is None or len(activations) < limit:
+            if index == len(self._offsets):
+                index = 0
+                week += WEEK
+            start = week + self._offsets[index]
+            if start >= end:
+                break
+            activations.append(self._occurrences[index].activation(start))
+            index += 1
+        return activations
+
+    def active(self, at: datetime | float | None = None) -> list[Activation]:
+        """Return the activations running at `at` (default now)."""
+        if not self._offsets:
+            return []
+
+        now = _timestamp(at)
+        week = _week_start(now)
+        offset = now - week
+        # Only runs starting within the longest duration before `at` can still run
+        earliest = offset - min(self._durations[-1], WEEK)
+        ranges = [(max(earliest, 0), offset, week)]
+        if earliest < 0:
+            ranges.insert(0, (earliest + WEEK, WEEK, week - WEEK))
+
+        activations = []
+        for low, high, base in ranges:
+            first = bisect_right(self._offsets, low)
+            last = bisect_right(self._offsets, high)
+            for occurrence in self._occurrences[first:last]:
+                start = base + occurrence.offset
+                if start <= now < start + occurrence.timer.duration:
+                    activations.append(occurrence.activation(start))
+        return activations
+
+    def conflicts(
+        self, device_id: str | None = None, after: datetime | float | None = None
+    ) -> list[TimerConflict]:
+        """Return the overlapping timers of one or all devices.
+
+        Each weekly overlap is returned once, as its next run ending after
+        `after` (default now), ordered by start.
+        """
+        now = _timestamp(after)
+        week = _week_start(now)
+        if device_id is None:
+            overlaps = [item for items in self._overlaps.values() for item in items]
+        else:
+            overlaps = self._overlaps.get(device_id, [])
+
+        conflicts = []
+        for overlap in overlaps:
+            # Overlaps of runs late on Sunday can still last into this week
+            base = week - WEEK
+            while base + overlap.end <= now:
+                base += WEEK
+            conflicts.append(
+                TimerConflict(
+                    overlap.first.device_id,
+                    overlap.first.activation(base + overlap.first.offset),
+                    overlap.second.activation(base + overlap.second_offset),
+                    _datetime(base + overlap.start),
+                    _datetime(base + overlap.end),
+                )
+            )
+        return sorted(conflicts, key=lambda conflict: conflict.start)
@@ -0,0 +1,140 @@
+"""API session handling for Webasto Connect."""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http.cookies import Morsel
+
+
+@dataclass(slots=True, eq=False)
+class ApiSession:
+    """One logged-in API session with its own cookies and active device."""
+
+    index: int
+    hssess: str | None = None
+    hssess_webclient: str | None = None
+    active_device: str | None = None
+    logged_in_at: float | None = None
+    expires_at: float | None = None
+
+    @property
+    def logged_in(self) -> bool:
+        """Return whether a session cookie has been received."""
+        return self.hssess is not None or self.hssess_webclient is not None
+
+    def cookie_header(self) -> dict:
+        """Return the cookie header for this session, if any."""
+        if self.hssess_webclient is not None:
+            return {"Cookie": f"hssess-webclient={self.hssess_webclient};"}
+        if self.hssess is not None:
+            return {"Cookie": f"hssess={self.hssess};"}
+        return {}
+
+    def cookies(self) -> dict[str, str | None]:
+        """Return the cookies of this session for persisting them."""
+        return {"hssess": self.hssess, "hssess_webclient": self.hssess_webclient}
+
+    def restore(self, cookies: dict[str, str | None]) -> None:
+        """Restore persisted cookies; the active device is unknown afterwards."""
+        self.hssess = cookies.get("hssess")
+        self.hssess_webclient = cookies.get("hssess_webclient")
+        self.active_device = None
+        self.logged_in_at = None
+        self.expires_at = None
+
+    def reset(self) -> None:
+        """Forget the cookies and active device of this session."""
+        self.restore({})
+
+
+def cookie_lifetime(cookie: object) -> float | None:
+    """Return the seconds until a response cookie expires, if the server said.
+
+    Cookies that have already expired, as sent to delete a cookie, have no
+    usable lifetime and return `None`.
+    """
+    if not isinstance(cookie, Morsel):
+        return None
+
+    lifetime = None
+    if max_age := cookie.get("max-age"):
+        try:
+            lifetime = float(max_age)
+        except ValueError:
+            pass
+
+    if lifetime is None and (expires := cookie.get("expires")):
+        try:
+            expires_at = parsedate_to_datetime(expires)
+        except (TypeError, ValueError):
+            return None
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        lifetime = (expires_at - datetime.now(timezone.utc)).total_seconds()
+
+    if lifetime is None or lifetime <= 0:
+        return None
+    return lifetime
+
+
+class SessionPool:
+    """Pool of API sessions, each holding its own server-side active device."""
+
+    def __init__(self, size: int = 1) -> None:
+        """Initialize the pool."""
+        if size < 1:
+            raise ValueError("session pool size must be >= 1")
+
+        self.sessions: list[ApiSession] = [ApiSession(index) for index in range(size)]
+        self._busy: set[int] = set()
+        self._condition = asyncio.Condition()
+
+    @property
+    def primary(self) -> ApiSession:
+        """Return the primary session used for account-level requests."""
+        return self.sessions[0]
+
+    @property
+    def size(self) -> int:
+        """Return the number of sessions in the pool."""
+        return len(self.sessions)
+
+    def _pick(self, device_id: str | None) -> ApiSession | None:
+        """Pick an idle session, preferring one already on `device_id`."""
+        idle = [s for s in self.sessions if s.index not in self._busy]
+        if not idle:
+            return None
+
+        for session in idle:
+            if device_id is not None and session.active_device == device_id:
+                return session
+
+        # Prefer sessions that have no device selected, so warm device
+        # contexts on other sessions survive as long as possible.
+        for session in idle:
+            if session.active_device is None:
+                return session
+
+        return idle[0]
+
+    async def acquire(self, device_id: str | None = None) -> ApiSession:
+        """Wait for an idle session and mark it busy."""
+        async with self._condition:
+            while (session := self._pick(device_id)) is None:
+                await self._condition.wait()
+            self._busy.add(session.index)
+            return session
+
+    async def acquire_session(self, session: ApiSession) -> None:
+        """Wait until a specific session is idle and mark it busy."""
+        async with self._condition:
+            while session.index in self._busy:
+                await self._condition.wait()
+            self._busy.add(session.index)
+
+    async def release(self, session: ApiSession) -> None:
+        """Return a session to the pool."""
+        async with self._condition:
+            self._busy.discard(session.index)
+            self._condition.notify_all()
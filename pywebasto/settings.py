@@ -0,0 +1,167 @@
+"""Batched settings changes for Webasto devices."""
+
+from typing import Any
+
+from .device import WebastoDevice
+from .enums import Outputs
+
+
+def _hours_minutes(seconds: int) -> tuple[int, int]:
+    """Split a timeout in seconds into hours and minutes within a day."""
+    seconds = seconds % (24 * 3600)
+    return seconds // 3600, (seconds % 3600) // 60
+
+
+class SettingsTransaction:
+    """Collects settings changes of one device into a single `POST_SETTING`.
+
+    Changes are merged in the order they are made, so a later change of the
+    same setting wins. Nothing is sent until the transaction is committed by
+    `WebastoConnect.settings`.
+    """
+
+    def __init__(self, device: WebastoDevice) -> None:
+        """Initialize an empty transaction."""
+        self.device = device
+        self._device_settings: dict[str, Any] = {}
+        self._service_settings: dict[str, Any] = {}
+        self._main_changed = False
+        self._heater_timeout: int | None = None
+        self._ventilation_timeout: int | None = None
+        self._ventilation: bool | None = None
+        self._aux_timeouts: dict[Outputs, int] = {}
+
+    def __bool__(self) -> bool:
+        """Return whether the transaction holds any changes."""
+        return bool(
+            self._device_settings or self._service_settings or self._main_changed
+        )
+
+    def set_low_voltage_cutoff(self, value: float) -> "SettingsTransaction":
+        """Set the low voltage cutoff value."""
+        self._device_settings["low_voltage_cutoff"] = value
+        return self
+
+    def set_temperature_compensation(self, value: float) -> "SettingsTransaction":
+        """Set the temperature compensation value."""
+        self._device_settings["ext_temp_comp"] = value
+        return self
+
+    def set_aux_timeout(
+        self, timeout: int, aux: Outputs = Outputs.AUX1
+    ) -> "SettingsTransaction":
+        """Set the timeout of an AUX port in seconds."""
+        if aux in (Outputs.AUX1, Outputs.AUX2):
+            self._aux_timeouts[aux] = timeout
+
+        hours, minutes = _hours_minutes(timeout)
+        self._device_settings.update(
+            {
+                f"{aux.value}_function": "enabled",
+                f"{aux.value}_timeout_on": True,
+                f"{aux.value}_timeout_h": hours,
+                f"{aux.value}_timeout_min": minutes,
+            }
+        )
+        self._service_settings.update(
+            {
+                f"{aux.value}_on": True,
+                f"{aux.value}_name": (
+                    self.device.output_aux1_name
+                    if aux == Outputs.AUX1
+                    else self.device.output_aux2_name
+                ),
+                f"{aux.value}_icon": (
+                    self.device.icon_aux1
+                    if aux == Outputs.AUX1
+                    else self.device.icon_aux2
+                ),
+            }
+        )
+        return self
+
+    def set_main_timeout(
+        self, heater: int | None = None, ventilation: int | None = None
+    ) -> "SettingsTransaction":
+        """Set the timeouts of the main output port in seconds."""
+        if heater is not None:
+            self._heater_timeout = heater
+        if ventilation is not None:
+            self._ventilation_timeout = ventilation
+        self._main_changed = True
+        return self
+
+    def ventilation_mode(self, state: bool) -> "SettingsTransaction":
+        """Switch the main output to ventilation mode or heater mode."""
+        self._ventilation = state
+        self._main_changed = True
+        return self
+
+    def apply(self) -> None:
+        """Apply the changes to the local device state, once they were sent."""
+        if self._heater_timeout is not None:
+            self.device.timeout_heat = self._heater_timeout
+        if self._ventilation_timeout is not None:
+            self.device.timeout_vent = self._ventilation_timeout
+        if Outputs.AUX1 in self._aux_timeouts:
+            self.device.timeout_aux1 = self._aux_timeouts[Outputs.AUX1]
+        if Outputs.AUX2 in self._aux_timeouts:
+            self.device.timeout_aux2 = self._aux_timeouts[Outputs.AUX2]
+        if self._ventilation is not None:
+            self.device.apply_ventilation_mode(self._ventilation)
+
+    def payload(self) -> dict:
+        """Build the merged `POST_SETTING` payload."""
+        device_settings: dict[str, Any] = {}
+        service_settings: dict[str, Any] = {}
+        if self._main_changed:
+            device_settings, service_settings = self._main_settings()
+
+        device_settings.update(self._device_settings)
+        service_settings.update(self._service_settings)
+        return {
+            "device_settings": device_settings,
+            "service_settings": service_settings,
+            "location_events": None,
+            "air_heater": {},
+        }
+
+    def _main_settings(self) -> tuple[dict[str, Any], dict[str, Any]]:
+        """Build the main output settings, which are always sent together."""
+        heater_timeout = (
+            self.device.timeout_heat
+            if self._heater_timeout is None
+            else self._heater_timeout
+        )
+        ventilation_timeout = (
+            self.device.timeout_vent
+            if self._ventilation_timeout is None
+            else self._ventilation_timeout
+        )
+        state = (
+            self.device.is_ventilation
+            if self._ventilation is None
+            else self._ventilation
+        )
+        vent_h, vent_m = _hours_minutes(ventilation_timeout)
+        heat_h, heat_m = _hours_minutes(heater_timeout)
+        return (
+            {
+                "webasto_emul_mode": "thermoconnect",
+                "OUTV_timeout_on": True,
+                "OUTV_timeout_h": vent_h,
+                "OUTV_timeout_min": vent_m,
+                "OUTH_timeout_on": True,
+                "OUTH_timeout_h": heat_h,
+                "OUTH_timeout_min": heat_m,
+            },
+            {
+                "OUTH_on": not state,
+                "OUTV_on": state,
+                "heater_mode": 1 if state else 0,
+                "OUTV_name": "Ventilation",
+                "OUTV_icon": "car_vent",
+                "OUTH_name": "Heater",
+                "OUTH_icon": "car_heat",
+            },
+        )
@@ -0,0 +1,448 @@
+"""Local simulator of the Webasto Connect API.
+
+The simulator serves the endpoints used by `WebastoConnect` on a local port,
+so the client can be tested and benchmarked without network access:
+
+    async with WebastoSimulator(devices=100, latency=0.05) as simulator:
+        webasto = WebastoConnect("user", "pass", api_url=simulator.api_url)
+        await webasto.connect()
+
+It keeps one active device per session cookie like the real API, and can add
+latency, random server errors, `429` throttling and session expiry. Run
+`python -m pywebasto.simulator` to serve it standalone.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import secrets
+from collections import Counter
+from dataclasses import dataclass, field
+from time import monotonic, time
+from typing import Any
+
+from aiohttp import web
+
+LOGGER = logging.getLogger(__name__)
+
+# Command strings mapped to the output line and state they set
+COMMANDS = {
+    "OUT H ON": ("OUTH", "ON"),
+    "OUT H OFF": ("OUTH", "OFF"),
+    "OUT V ON": ("OUTV", "ON"),
+    "OUT V OFF": ("OUTV", "OFF"),
+    "OUT 1 ON": ("OUT1", "ON"),
+    "OUT 1 OFF": ("OUT1", "OFF"),
+    "OUT 2 ON": ("OUT2", "ON"),
+    "OUT 2 OFF": ("OUT2", "OFF"),
+}
+OUTPUT_ICONS = {"OUTH": "car_heat", "OUTV": "car_vent", "OUT1": "light", "OUT2": "aux"}
+
+
+@dataclass(slots=True)
+class SimulatedDevice:
+    """State of one simulated device."""
+
+    device_id: str
+    name: str
+    temperature: int = 18
+    voltage: float = 12.4
+    ventilation: bool = False
+    low_voltage_cutoff: float = 11.5
+    temperature_compensation: float = 0.0
+    connection_lost: bool = False
+    outputs: dict[str, str] = field(
+        default_factory=lambda: dict.fromkeys(("OUTH", "OUTV", "OUT1", "OUT2"), "OFF")
+    )
+    timeouts: dict[str, int] = field(
+        default_factory=lambda: {"OUTH": 1800, "OUTV": 1800, "OUT1": 600, "OUT2": 600}
+    )
+    ontimes: dict[str, int] = field(default_factory=dict)
+    timers: dict[str, list[dict]] = field(
+        default_factory=lambda: {"OUTH": [], "OUTV": []}
+    )
+
+    @property
+    def main_line(self) -> str:
+        """Return the line of the main output in the current mode."""
+        return "OUTV" if self.ventilation else "OUTH"
+
+    def _output(self, line: str) -> dict:
+        """Build the API shape of one output."""
+        output = {
+            "line": line,
+            "state": self.outputs[line],
+            "name": "",
+            "icon": OUTPUT_ICONS[line],
+            "timers": self.timers.get(line, []),
+        }
+        if self.outputs[line] == "ON" and line in self.ontimes:
+            output["ontime"] = self.ontimes[line]
+        return output
+
+    def service_data(self) -> dict:
+        """Build the `get_service_data` payload of this device."""
+        idle = "OUTH" if self.ventilation else "OUTV"
+        return {
+            "temperature": f"{self.temperature}C",
+            "voltage": f"{self.voltage}V",
+            "location": {"state": "OFF"},
+            "connection_lost": self.connection_lost,
+            "subscription": {"expiration": 1893456000},
+            "outputs": [
+                self._output(line) for line in (self.main_line, "OUT1", "OUT2")
+            ],
+            "disabled_outputs": [self._output(idle)],
+        }
+
+    def settings(self) -> dict:
+        """Build the `get_settings` payload of this device."""
+        return {
+            "settings_tab": [
+                {
+                    "group": "general",
+                    "options": [
+                        {"key": "allow_GPS", "value": False},
+                        {"key": "low_voltage_cutoff", "value": self.low_voltage_cutoff},
+                        {
+                            "key": "ext_temp_comp",
+                            "value": self.temperature_compensation,
+                        },
+                    ],
+                },
+                {
+                    "group": "webasto",
+                    "options": [
+                        {"key": line, "value": self.outputs[line], "timeout": timeout}
+                        for line, timeout in self.timeouts.items()
+                        if line in ("OUTH", "OUTV")
+                    ],
+                },
+                {
+                    "group": "outputs",
+                    "options": [
+                        {"key": line, "value": self.outputs[line], "timeout": timeout}
+                        for line, timeout in self.timeouts.items()
+                        if line in ("OUT1", "OUT2")
+                    ],
+                },
+            ]
+        }
+
+    def command(self, command: str) -> bool:
+        """Apply an output command, returning whether it is known."""
+        if command not in COMMANDS:
+            return False
+
+        line, state = COMMANDS[command]
+        self.outputs[line] = state
+        if state == "ON":
+            self.ontimes[line] = int(time()) + self.timeouts[line]
+        return True
+
+    def apply_settings(self, payload: dict) -> None:
+        """Apply a `post_settings` payload."""
+        device_settings = payload.get("device_settings") or {}
+        service_settings = payload.get("service_settings") or {}
+        if "low_voltage_cutoff" in device_settings:
+            self.low_voltage_cutoff = float(device_settings["low_voltage_cutoff"])
+        if "ext_temp_comp" in device_settings:
+            self.temperature_compensation = float(device_settings["ext_temp_comp"])
+        for line in self.timeouts:
+            if f"{line}_timeout_h" in device_settings:
+                self.timeouts[line] = (
+                    int(device_settings[f"{line}_timeout_h"]) * 3600
+                    + int(device_settings.get(f"{line}_timeout_min", 0)) * 60
+                )
+        if "heater_mode" in service_settings:
+            self.ventilation = service_settings["heater_mode"] == 1
+
+
+@dataclass(slots=True)
+class _Session:
+    """One logged-in simulated session."""
+
+    created: float
+    active_device: str
+
+
+class WebastoSimulator:
+    """aiohttp server imitating the Webasto Connect API for a fleet of devices.
+
+    `latency` (plus up to `jitter`) seconds are added to every response.
+    `error_rate` is the share of requests answered with a `500`. With
+    `rate_limit` set, requests beyond that many per second (after a burst of
+    `burst`) are answered with `429` and a `Retry-After` header. Sessions
+    expire after `session_lifetime` seconds, if set.
+    """
+
+    def __init__(
+        self,
+        devices: int = 1,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: float | None = None,
+        burst: int = 10,
+        session_lifetime: float | None = None,
+        username: str | None = None,
+        password: str | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize the simulator."""
+        if devices < 1:
+            raise ValueError("devices must be >= 1")
+        if not 0 <= error_rate <= 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        if rate_limit is not None and rate_limit <= 0:
+            raise ValueError("rate_limit must be > 0")
+
+        self.devices: dict[str, SimulatedDevice] = {}
+        for index in range(devices):
+            device_id = f"{9254659033752365 + index}"
+            self.devices[device_id] = SimulatedDevice(device_id, f"Heater {index + 1}")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.session_lifetime = session_lifetime
+        self.username = username
+        self.password = password
+        self.host = host
+        self.port = port
+        self.requests: Counter[str] = Counter()
+        self.responses: Counter[int] = Counter()
+        self._random = random.Random(seed)
+        self._sessions: dict[str, _Session] = {}
+        self._tokens = float(burst)
+        self._refilled = monotonic()
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def api_url(self) -> str:
+        """Return the base URL to pass as `api_url` to `WebastoConnect`."""
+        return f"http://{self.host}:{self.port}/webapi"
+
+    def reset_counters(self) -> None:
+        """Reset the request and response counters."""
+        self.requests.clear()
+        self.responses.clear()
+
+    def expire_sessions(self) -> None:
+        """Invalidate all sessions, as the API does after a while."""
+        self._sessions.clear()
+
+    def build_app(self) -> web.Application:
+        """Build the aiohttp application serving the API."""
+        app = web.Application(middlewares=[self._middleware])
+        routes = {
+            "login": self._login,
+            "change_device": self._change_device,
+            "get_service_data": self._get_service_data,
+            "get_settings": self._get_settings,
+            "post_settings": self._post_settings,
+            "save_timers": self._save_timers,
+            "command": self._command,
+        }
+        for path, handler in routes.items():
+            app.router.add_post(f"/webapi/{path}", handler)
+        return app
+
+    async def start(self) -> None:
+        """Start serving on `host` and `port`, picking a free port for `0`."""
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        LOGGER.debug("Simulator listening on %s", self.api_url)
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "WebastoSimulator":
+        """Start the simulator for the duration of a block."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        """Stop the simulator."""
+        await self.stop()
+
+    def _throttled(self) -> float | None:
+        """Take a request slot, returning the seconds to wait when there is none."""
+        if self.rate_limit is None:
+            return None
+
+        now = monotonic()
+        self._tokens = min(
+            float(self.burst), self._tokens + (now - self._refilled) * self.rate_limit
+        )
+        self._refilled = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return None
+        return (1 - self._tokens) / self.rate_limit
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> web.Response:
+        """Count requests and add latency, throttling and random errors."""
+        self.requests[request.path_qs.removeprefix("/webapi")] += 1
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if (retry_after := self._throttled()) is not None:
+            response = web.Response(
+                status=429, headers={"Retry-After": str(max(1, round(retry_after)))}
+            )
+        elif self.error_rate and self._random.random() < self.error_rate:
+            response = web.Response(status=500, text="Simulated server error")
+        else:
+            try:
+                response = await handler(request)
+            except web.HTTPException as err:
+                response = web.Response(status=err.status, text=err.text)
+
+        self.responses[response.status] += 1
+        return response
+
+    def _session(self, request: web.Request) -> _Session | None:
+        """Return the session of the request cookie, if it is still valid."""
+        token = request.cookies.get("hssess-webclient") or request.cookies.get("hssess")
+        session = self._sessions.get(token) if token else None
+        if session is None:
+            return None
+        if (
+            self.session_lifetime is not None
+            and monotonic() - session.created > self.session_lifetime
+        ):
+            del self._sessions[token]  # type: ignore[arg-type]
+            return None
+        return session
+
+    def _device(self, request: web.Request) -> SimulatedDevice:
+        """Return the active device of the request session, or raise `401`."""
+        session = self._session(request)
+        if session is None:
+            raise web.HTTPUnauthorized(text="Session expired")
+        return self.devices[session.active_device]
+
+    async def _login(self, request: web.Request) -> web.Response:
+        """Handle `/login`."""
+        form = await request.post()
+        if (self.username is not None and form.get("username") != self.username) or (
+            self.password is not None and form.get("password") != self.password
+        ):
+            raise web.HTTPUnauthorized(text="Username or password incorrect")
+
+        token = secrets.token_hex(16)
+        self._sessions[token] = _Session(monotonic(), next(iter(self.devices)))
+        response = web.Response()
+        response.set_cookie("hssess", token)
+        return response
+
+    async def _change_device(self, request: web.Request) -> web.Response:
+        """Handle `/change_device`."""
+        session = self._session(request)
+        if session is None:
+            raise web.HTTPUnauthorized(text="Session expired")
+
+        device_id = (await request.post()).get("device")
+        if device_id not in self.devices:
+            raise web.HTTPBadRequest(text="Unknown device")
+        session.active_device = str(device_id)
+        return web.Response()
+
+    async def _get_service_data(self, request: web.Request) -> web.Response:
+        """Handle `/get_service_data`, including the account info without poll."""
+        device = self._device(request)
+        data = device.service_data()
+        if request.query.get("poll") == "false":
+            data["account_info"] = {
+                "devices": [
+                    [item.device_id, item.name] for item in self.devices.values()
+                ]
+            }
+        return web.json_response(data)
+
+    async def _get_settings(self, request: web.Request) -> web.Response:
+        """Handle `/get_settings`."""
+        return web.json_response(self._device(request).settings())
+
+    async def _post_settings(self, request: web.Request) -> web.Response:
+        """Handle `/post_settings`."""
+        device = self._device(request)
+        try:
+            payload = json.loads(await request.text())
+        except ValueError as err:
+            raise web.HTTPBadRequest(text="Invalid settings payload") from err
+        device.apply_settings(payload)
+        return web.Response()
+
+    async def _save_timers(self, request: web.Request) -> web.Response:
+        """Handle `/save_timers`."""
+        device = self._device(request)
+        try:
+            payload = json.loads(await request.text())
+            line = payload["line"]
+            timers = list(payload["timers"])
+        except (KeyError, TypeError, ValueError) as err:
+            raise web.HTTPBadRequest(text="Invalid timers payload") from err
+        if line not in device.timers:
+            raise web.HTTPBadRequest(text="Unsupported line")
+        device.timers[line] = timers
+        return web.Response()
+
+    async def _command(self, request: web.Request) -> web.Response:
+        """Handle `/command`."""
+        device = self._device(request)
+        if not device.command(await request.text()):
+            raise web.HTTPBadRequest(text="Unknown command")
+        return web.Response()
+
+
+def main() -> None:
+    """Serve the simulator until interrupted."""
+    parser = argparse.ArgumentParser(description="Webasto Connect API simulator")
+    parser.add_argument("--devices", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--session-lifetime", type=float, default=None)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        simulator = WebastoSimulator(
+            devices=args.devices,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+            session_lifetime=args.session_lifetime,
+            host=args.host,
+            port=args.port,
+        )
+        async with simulator:
+            print(f"Serving {args.devices} device(s) on {simulator.api_url}")
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Coalescing of concurrent identical operations."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class SingleFlight:
+    """Run one operation per key at a time and share its outcome.
+
+    The first caller for a key runs the operation itself. Callers
+    arriving while it is in flight wait for and receive the same result or
+    exception instead of starting their own.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the in-flight registry."""
+        self._flights: dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Return whether an operation for `key` is currently running."""
+        return key in self._flights
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `func` for `key`, or join the run already in flight."""
+        while (future := self._flights.get(key)) is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled, not us; take over the operation
+
+        future = asyncio.get_running_loop().create_future()
+        self._flights[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            # Mark as retrieved, there may be no one else waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
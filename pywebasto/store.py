@@ -0,0 +1,94 @@
+"""Persistent storage of API session cookies."""
+
+import asyncio
+import hashlib
+import json
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+# Expanded when a store is created, importing must not need a home directory
+DEFAULT_SESSION_FILE = "~/.cache/pywebasto/sessions.json"
+
+# Cookies of one session, keyed by cookie name
+StoredSession = dict[str, str | None]
+
+
+class SessionStore(ABC):
+    """Base class for stores keeping session cookies between process runs.
+
+    Sessions are stored per account. Implementations only need to persist
+    what they are given, the client decides when stored sessions are stale.
+    """
+
+    @abstractmethod
+    async def load(self, account: str) -> list[StoredSession]:
+        """Return the stored sessions of an account, or an empty list."""
+
+    @abstractmethod
+    async def save(self, account: str, sessions: list[StoredSession]) -> None:
+        """Store the sessions of an account."""
+
+    @abstractmethod
+    async def clear(self, account: str) -> None:
+        """Forget the stored sessions of an account."""
+
+
+class FileSessionStore(SessionStore):
+    """Session store backed by a JSON file readable by the owner only."""
+
+    def __init__(self, path: str | os.PathLike | None = None) -> None:
+        """Initialize the store."""
+        self.path = Path(DEFAULT_SESSION_FILE if path is None else path).expanduser()
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(account: str) -> str:
+        """Return the file key of an account, without storing the username."""
+        return hashlib.sha256(account.encode()).hexdigest()
+
+    def _read(self) -> dict[str, list[StoredSession]]:
+        """Read all stored accounts."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            # A corrupt file is treated as empty and replaced on the next save
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data: dict[str, list[StoredSession]]) -> None:
+        """Atomically replace the file with `data`."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(f"{self.path.name}.tmp")
+        fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temp, self.path)
+
+    def _update(self, account: str, sessions: list[StoredSession] | None) -> None:
+        """Store or remove the sessions of one account."""
+        data = self._read()
+        if sessions:
+            data[self._key(account)] = sessions
+        else:
+            data.pop(self._key(account), None)
+        self._write(data)
+
+    async def load(self, account: str) -> list[StoredSession]:
+        """Return the stored sessions of an account, or an empty list."""
+        async with self._lock:
+            data = await asyncio.to_thread(self._read)
+        sessions = data.get(self._key(account))
+        return sessions if isinstance(sessions, list) else []
+
+    async def save(self, account: str, sessions: list[StoredSession]) -> None:
+        """Store the sessions of an account."""
+        async with self._lock:
+            await asyncio.to_thread(self._update, account, sessions)
+
+    async def clear(self, account: str) -> None:
+        """Forget the stored sessions of an account."""
+        async with self._lock:
+            await asyncio.to_thread(self._update, account, None)
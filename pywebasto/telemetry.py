@@ -0,0 +1,317 @@
+"""Fixed-memory telemetry history of Webasto devices."""
+
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass
+from time import time
+
+from .device import WebastoDevice
+
+# Bits of the output states in a stored sample
+OUTPUT_BITS = {"output_main": 1, "output_aux1": 2, "output_aux2": 4}
+# Bucket widths in seconds of the downsampled resolutions
+RESOLUTIONS = {"minute": 60, "hour": 3600}
+
+
+@dataclass(frozen=True, slots=True)
+class TelemetrySample:
+    """Values of a device at one refresh."""
+
+    timestamp: float
+    temperature: float
+    voltage: float
+    output_main: bool
+    output_aux1: bool
+    output_aux2: bool
+
+    @classmethod
+    def from_device(cls, device: WebastoDevice, timestamp: float) -> "TelemetrySample":
+        """Take a sample of the current values of a device."""
+        return cls(
+            timestamp,
+            device.temperature,
+            device.voltage,
+            device.output_main,
+            device.output_aux1,
+            device.output_aux2,
+        )
+
+    @classmethod
+    def from_row(
+        cls, timestamp: float, temperature: float, voltage: float, outputs: int
+    ) -> "TelemetrySample":
+        """Create a sample from stored values with an `outputs` bitmask."""
+        return cls(
+            timestamp,
+            temperature,
+            voltage,
+            *(bool(int(outputs) & bit) for bit in OUTPUT_BITS.values()),
+        )
+
+    @property
+    def outputs(self) -> int:
+        """Return the output states as a bitmask, see `OUTPUT_BITS`."""
+        return sum(bit for name, bit in OUTPUT_BITS.items() if getattr(self, name))
+
+
+@dataclass(frozen=True, slots=True)
+class TelemetryBucket:
+    """Aggregated samples of one time bucket.
+
+    `*_on` is the share of samples in the bucket with that output on.
+    """
+
+    start: float
+    width: int
+    count: int
+    temperature_min: float
+    temperature_max: float
+    temperature_mean: float
+    voltage_min: float
+    voltage_max: float
+    voltage_mean: float
+    output_main_on: float
+    output_aux1_on: float
+    output_aux2_on: float
+
+
+class _Ring:
+    """Circular table of float columns with at most `capacity` rows.
+
+    Columns grow as rows are added, so memory is only used for rows kept.
+    """
+
+    def __init__(self, capacity: int, columns: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self._columns = [array("d") for _ in range(columns)]
+        self._start = 0
+        self.size = 0
+
+    def append(self, row: tuple[float, ...]) -> None:
+        """Add a row, replacing the oldest one when full."""
+        if self.size < self.capacity:
+            # Not wrapped yet, so the oldest row is the first one
+            for column, value in zip(self._columns, row, strict=True):
+                column.append(value)
+            self.size += 1
+            return
+
+        index = self._start
+        self._start = (self._start + 1) % self.capacity
+        for column, value in zip(self._columns, row, strict=True):
+            column[index] = value
+
+    def last(self) -> tuple[float, ...]:
+        """Return the newest row."""
+        index = (self._start + self.size - 1) % self.capacity
+        return tuple(column[index] for column in self._columns)
+
+    def replace_last(self, row: tuple[float, ...]) -> None:
+        """Overwrite the newest row."""
+        index = (self._start + self.size - 1) % self.capacity
+        for column, value in zip(self._columns, row, strict=True):
+            column[index] = value
+
+    def rows(self) -> Iterator[tuple[float, ...]]:
+        """Yield the rows from oldest to newest."""
+        for offset in range(self.size):
+            index = (self._start + offset) % self.capacity
+            yield tuple(column[index] for column in self._columns)
+
+    def first_value(self) -> float:
+        """Return the first column of the oldest row."""
+        return self._columns[0][self._start]
+
+
+class _Downsampler:
+    """Aggregates samples into fixed-width buckets kept in a ring."""
+
+    # start, count, temperature min/max/sum, voltage min/max/sum, outputs on
+    COLUMNS = 11
+
+    def __init__(self, width: int, capacity: int) -> None:
+        self.width = width
+        self._ring = _Ring(capacity, self.COLUMNS)
+
+    def add(self, sample: TelemetrySample) -> None:
+        """Add a sample to its bucket."""
+        start = sample.timestamp - sample.timestamp % self.width
+        on = [float(getattr(sample, name)) for name in OUTPUT_BITS]
+        if self._ring.size:
+            last = self._ring.last()
+            if start < last[0]:
+                # Samples older than the current bucket are not aggregated
+                return
+            if start == last[0]:
+                self._ring.replace_last(
+                    (
+                        start,
+                        last[1] + 1,
+                        min(last[2], sample.temperature),
+                        max(last[3], sample.temperature),
+                        last[4] + sample.temperature,
+                        min(last[5], sample.voltage),
+                        max(last[6], sample.voltage),
+                        last[7] + sample.voltage,
+                        last[8] + on[0],
+                        last[9] + on[1],
+                        last[10] + on[2],
+                    )
+                )
+                return
+
+        self._ring.append(
+            (
+                start,
+                1,
+                sample.temperature,
+                sample.temperature,
+                sample.temperature,
+                sample.voltage,
+                sample.voltage,
+                sample.voltage,
+                *on,
+            )
+        )
+
+    def buckets(self, since: float | None = None) -> list[TelemetryBucket]:
+        """Return the buckets ending after `since`, oldest first."""
+        buckets = []
+        for row in self._ring.rows():
+            if since is not None and row[0] + self.width <= since:
+                continue
+            count = row[1]
+            buckets.append(
+                TelemetryBucket(
+                    start=row[0],
+                    width=self.width,
+                    count=int(count),
+                    temperature_min=row[2],
+                    temperature_max=row[3],
+                    temperature_mean=row[4] / count,
+                    voltage_min=row[5],
+                    voltage_max=row[6],
+                    voltage_mean=row[7] / count,
+                    output_main_on=row[8] / count,
+                    output_aux1_on=row[9] / count,
+                    output_aux2_on=row[10] / count,
+                )
+            )
+        return buckets
+
+    def oldest(self) -> float | None:
+        """Return the start of the oldest bucket."""
+        return self._ring.first_value() if self._ring.size else None
+
+
+def _slope(points: list[tuple[float, float]]) -> float | None:
+    """Return the least squares slope of `(x, y)` points."""
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+class DeviceHistory:
+    """Telemetry history of one device in a fixed amount of memory.
+
+    The last `samples` refreshes are kept as they are. All refreshes are also
+    aggregated into per-minute and per-hour buckets, of which the last
+    `minutes` and `hours` are kept, `0` turns a resolution off. Memory grows
+    with the rows kept, up to about 32 bytes per sample and 88 bytes per
+    bucket, and not with uptime.
+    """
+
+    def __init__(self, samples: int = 240, minutes: int = 60, hours: int = 24) -> None:
+        """Initialize an empty history."""
+        self._samples = _Ring(samples, 4)
+        self._resolutions = {
+            name: _Downsampler(RESOLUTIONS[name], capacity)
+            for name, capacity in (("minute", minutes), ("hour", hours))
+            if capacity
+        }
+
+    def __len__(self) -> int:
+        """Return the number of samples kept as they are."""
+        return self._samples.size
+
+    def add(self, sample: TelemetrySample) -> None:
+        """Add a sample."""
+        self._samples.append(
+            (sample.timestamp, sample.temperature, sample.voltage, sample.outputs)
+        )
+        for downsampler in self._resolutions.values():
+            downsampler.add(sample)
+
+    def samples(self, since: float | None = None) -> list[TelemetrySample]:
+        """Return the kept samples taken at or after `since`, oldest first."""
+        return [
+            TelemetrySample.from_row(*row)
+            for row in self._samples.rows()
+            if since is None or row[0] >= since
+        ]
+
+    def buckets(
+        self, resolution: str = "minute", since: float | None = None
+    ) -> list[TelemetryBucket]:
+        """Return the `minute` or `hour` buckets ending after `since`, oldest first."""
+        if resolution not in self._resolutions:
+            kept = ", ".join(self._resolutions) or "none"
+            raise ValueError(f"resolution must be one of the kept ones: {kept}")
+        return self._resolutions[resolution].buckets(since)
+
+    def trend(
+        self, field: str, window: float, now: float | None = None
+    ) -> float | None:
+        """Return the change per hour of `temperature` or `voltage` over `window` seconds.
+
+        The finest resolution covering the window is used: raw samples, then
+        minute buckets, then hour buckets. While none does, the one reaching
+        back furthest is used. `None` is returned for fewer than two points.
+        """
+        if field not in ("temperature", "voltage"):
+            raise ValueError("field must be 'temperature' or 'voltage'")
+
+        since = (time() if now is None else now) - window
+        oldest = {
+            "sample": self._samples.first_value() if self._samples.size else None,
+            **{
+                name: downsampler.oldest()
+                for name, downsampler in self._resolutions.items()
+            },
+        }
+        available = {name: start for name, start in oldest.items() if start is not None}
+        if not available:
+            return None
+        resolution = next(
+            (name for name, start in available.items() if start <= since),
+            min(available, key=available.__getitem__),
+        )
+
+        if resolution == "sample":
+            points = [
+                (sample.timestamp, getattr(sample, field))
+                for sample in self.samples(since)
+            ]
+        else:
+            points = [
+                (bucket.start + bucket.width / 2, getattr(bucket, f"{field}_mean"))
+                for bucket in self.buckets(resolution, since)
+            ]
+
+        slope = _slope(points)
+        return None if slope is None else slope * 3600
+
+    def drain_rate(self, window: float, now: float | None = None) -> float | None:
+        """Return the battery voltage lost per hour over `window` seconds.
+
+        Positive values mean the battery is draining.
+        """
+        trend = self.trend("voltage", window, now)
+        return None if trend is None else -trend
@@ -2,6 +2,8 @@
 
 from dataclasses import dataclass
 
+from .exceptions import InvalidRequestException
+
 
 @dataclass(slots=True)
 class SimpleTimer:
@@ -68,3 +70,40 @@ class SimpleTimer:
         )
         timer.validate()
         return timer
+
+
+def extract_simple_timers(data: dict | None, line: str) -> list[SimpleTimer]:
+    """Extract simple timers for a specific output line from API data."""
+    if not isinstance(data, dict):
+        return []
+
+    timers: list[SimpleTimer] = []
+    for section in ("outputs", "disabled_outputs"):
+        outputs = data.get(section)
+        if not isinstance(outputs, list):
+            continue
+
+        for output in outputs:
+            if not isinstance(output, dict):
+                continue
+            if output.get("line") != line:
+                continue
+
+            output_timers = output.get("timers")
+            if not isinstance(output_timers, list):
+                continue
+
+            for timer_data in output_timers:
+                if not isinstance(timer_data, dict):
+                    continue
+                if timer_data.get("type") != "simple":
+                    continue
+
+                try:
+                    timers.append(SimpleTimer.from_api_dict(timer_data))
+                except (KeyError, TypeError, ValueError) as err:
+                    raise InvalidRequestException(
+                        f"Invalid simple timer data in response: {err}"
+                    ) from err
+
+    return timers
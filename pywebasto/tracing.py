@@ -0,0 +1,220 @@
+"""Tracing of Webasto Connect operations as nested spans."""
+
+from collections import deque
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import monotonic
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+
+@dataclass(slots=True, eq=False)
+class Span:
+    """One timed step of an operation, with the steps it consists of."""
+
+    name: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    parent: "Span | None" = None
+    start: float = field(default_factory=monotonic)
+    end: float | None = None
+    error: str | None = None
+    children: list["Span"] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float | None:
+        """Return the duration in seconds, or `None` while the span is open."""
+        return None if self.end is None else self.end - self.start
+
+    def walk(self) -> Iterator["Span"]:
+        """Yield this span and all spans below it, depth first."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def find(self, name: str) -> list["Span"]:
+        """Return all spans named `name` in this tree."""
+        return [span for span in self.walk() if span.name == name]
+
+
+class TraceHook:
+    """Base class for receivers of spans.
+
+    Hooks are called synchronously and should return quickly.
+    """
+
+    def on_span_start(self, span: Span) -> None:
+        """Handle a span being started."""
+
+    def on_span_end(self, span: Span) -> None:
+        """Handle a span being finished."""
+
+
+class SpanCollector(TraceHook):
+    """In-process hook keeping the last `max_spans` finished spans."""
+
+    def __init__(self, max_spans: int | None = 10_000) -> None:
+        """Initialize an empty collector."""
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+
+    def on_span_end(self, span: Span) -> None:
+        """Keep a finished span."""
+        self.spans.append(span)
+
+    def roots(self) -> list[Span]:
+        """Return the finished top-level spans."""
+        return [span for span in self.spans if span.parent is None]
+
+    def find(self, name: str, **attributes: Any) -> list[Span]:
+        """Return the finished spans named `name` with matching attributes."""
+        return [
+            span
+            for span in self.spans
+            if span.name == name
+            and all(
+                span.attributes.get(key) == value for key, value in attributes.items()
+            )
+        ]
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Return the count, total and maximum duration per span name."""
+        summary: dict[str, dict[str, float]] = {}
+        for span in self.spans:
+            entry = summary.setdefault(
+                span.name, {"count": 0, "total": 0.0, "max": 0.0}
+            )
+            entry["count"] += 1
+            entry["total"] += span.duration or 0.0
+            entry["max"] = max(entry["max"], span.duration or 0.0)
+        return summary
+
+    def clear(self) -> None:
+        """Drop all collected spans."""
+        self.spans.clear()
+
+
+class Tracer:
+    """Creates nested spans for the current task and passes them to hooks.
+
+    Without hooks no spans are created, so tracing costs next to nothing
+    when it is not used.
+    """
+
+    def __init__(self, hooks: Iterable[TraceHook] = ()) -> None:
+        """Initialize the tracer."""
+        self.hooks = list(hooks)
+        self._current: ContextVar[Span | None] = ContextVar(
+            f"pywebasto_span_{id(self)}", default=None
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether any hook receives spans."""
+        return bool(self.hooks)
+
+    @property
+    def current(self) -> Span | None:
+        """Return the innermost open span of the current task."""
+        return self._current.get()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | None]:
+        """Run a block as a span nested in the current one."""
+        if not self.hooks:
+            yield None
+            return
+
+        parent = self._current.get()
+        span = Span(name, attributes, parent)
+        if parent is not None:
+            parent.children.append(span)
+        token = self._current.set(span)
+        for hook in self.hooks:
+            hook.on_span_start(span)
+        try:
+            yield span
+        except BaseException as err:
+            span.error = type(err).__name__
+            raise
+        finally:
+            span.end = monotonic()
+            self._current.reset(token)
+            for hook in self.hooks:
+                hook.on_span_end(span)
+
+    def annotate(self, **attributes: Any) -> None:
+        """Add attributes to the current span, if any."""
+        if (span := self._current.get()) is not None:
+            span.attributes.update(attributes)
+
+    def record(self, name: str, start: float, **attributes: Any) -> None:
+        """Add a span that started at `start` and ends now to the current span."""
+        if not self.hooks:
+            return
+
+        parent = self._current.get()
+        span = Span(name, attributes, parent, start)
+        if parent is not None:
+            parent.children.append(span)
+        for hook in self.hooks:
+            hook.on_span_start(span)
+        span.end = monotonic()
+        for hook in self.hooks:
+            hook.on_span_end(span)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Return an aiohttp trace config adding connection phases as spans.
+
+        Each HTTP request gets `dns` and `connection` spans when a new connection
+        is opened, and a `ttfb` span until the response headers arrived.
+        """
+
+        async def on_request_start(
+            _: aiohttp.ClientSession, context: SimpleNamespace, __: object
+        ) -> None:
+            context.start = monotonic()
+
+        async def on_dns_start(
+            _: aiohttp.ClientSession, context: SimpleNamespace, __: object
+        ) -> None:
+            context.dns_start = monotonic()
+
+        async def on_dns_end(
+            _: aiohttp.ClientSession,
+            context: SimpleNamespace,
+            params: aiohttp.TraceDnsResolveHostEndParams,
+        ) -> None:
+            self.record("dns", context.dns_start, host=params.host)
+
+        async def on_connect_start(
+            _: aiohttp.ClientSession, context: SimpleNamespace, __: object
+        ) -> None:
+            context.connect_start = monotonic()
+
+        async def on_connect_end(
+            _: aiohttp.ClientSession, context: SimpleNamespace, __: object
+        ) -> None:
+            self.record("connection", context.connect_start)
+
+        async def on_connection_reused(
+            _: aiohttp.ClientSession, __: SimpleNamespace, ___: object
+        ) -> None:
+            self.annotate(connection_reused=True)
+
+        async def on_request_end(
+            _: aiohttp.ClientSession, context: SimpleNamespace, __: object
+        ) -> None:
+            self.record("ttfb", context.start)
+
+        config = aiohttp.TraceConfig()
+        config.on_request_start.append(on_request_start)
+        config.on_dns_resolvehost_start.append(on_dns_start)
+        config.on_dns_resolvehost_end.append(on_dns_end)
+        config.on_connection_create_start.append(on_connect_start)
+        config.on_connection_create_end.append(on_connect_end)
+        config.on_connection_reuseconn.append(on_connection_reused)
+        config.on_request_end.append(on_request_end)
+        return config
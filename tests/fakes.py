@@ -0,0 +1,191 @@
+"""Fake aiohttp session answering like the Webasto Connect API.
+
+Shared by the client tests that need more control than `WebastoSimulator`
+gives, such as latency per endpoint, scripted failures or expiring sessions
+at a chosen moment.
+"""
+
+import asyncio
+import json
+from collections import Counter
+from http.cookies import SimpleCookie
+
+from pywebasto.consts import API_URL
+
+
+class FakeResponse:
+    """Minimal aiohttp response-like object."""
+
+    def __init__(
+        self,
+        status: int = 200,
+        json_data: dict | None = None,
+        text: str = "",
+        cookies: SimpleCookie | None = None,
+        headers: dict | None = None,
+    ) -> None:
+        self.status = status
+        self._json_data = json_data
+        self._text = text
+        self.cookies = cookies if cookies is not None else SimpleCookie()
+        self.headers = headers or {}
+
+    async def read(self) -> bytes:
+        if self._json_data is not None:
+            return json.dumps(self._json_data).encode()
+        return self._text.encode()
+
+    async def json(self, **_: object) -> dict | None:
+        return self._json_data
+
+    async def text(self) -> str:
+        return self._text
+
+
+class _FakeExchange:
+    """Async context manager answering one request once its delay passed."""
+
+    def __init__(
+        self,
+        api: "FakeApi",
+        path: str,
+        cookie: str | None,
+        data: object,
+        response: FakeResponse | None,
+    ) -> None:
+        self._api = api
+        self._path = path
+        self._cookie = cookie
+        self._data = data
+        self._response = response
+
+    async def __aenter__(self) -> FakeResponse:
+        api = self._api
+        api.in_flight += 1
+        api.max_in_flight = max(api.max_in_flight, api.in_flight)
+        try:
+            if delay := api.delays.get(self._path, api.delay):
+                await asyncio.sleep(delay)
+        finally:
+            api.in_flight -= 1
+
+        if self._response is not None:
+            return self._response
+        return api.answer(self._path, self._cookie, self._data)
+
+    async def __aexit__(self, *_: object) -> None:
+        return None
+
+
+class FakeApi:
+    """Fake aiohttp session with a fleet of devices, recording every request.
+
+    Logins hand out `token-<n>` cookies. Requests carrying a cookie that was
+    not handed out, or was invalidated with `expire()`, are rejected with
+    `401`; requests without any cookie are answered, so tests can skip the
+    login. Like the real API, each cookie has its own active device, which
+    `change_device` selects once its answer arrives.
+
+    `devices` maps device IDs to their temperature. Responses queued with
+    `script()` are sent before the normal answers, exceptions in the script
+    are raised when the request is sent.
+    """
+
+    def __init__(
+        self,
+        devices: dict[str, int] | None = None,
+        delay: float = 0.01,
+        delays: dict[str, float] | None = None,
+        valid: set[str] | None = None,
+        cookie_attributes: dict[str, str] | None = None,
+    ) -> None:
+        self.devices = devices or {"1": 18}
+        self.delay = delay
+        self.delays = delays or {}
+        self.valid = valid or set()
+        self.cookie_attributes = cookie_attributes or {}
+        self.reject_all = False
+        self.active: dict[str | None, str] = {}
+        self.logins = 0
+        self.requests: list[tuple[str, object]] = []
+        self.paths: Counter[str] = Counter()
+        self.answered: list[tuple[str, str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.closed = False
+        self._script: list[FakeResponse | Exception] = []
+
+    def script(self, *outcomes: FakeResponse | Exception) -> None:
+        """Queue responses or exceptions for the next requests."""
+        self._script.extend(outcomes)
+
+    def expire(self) -> None:
+        """Invalidate all cookies handed out so far."""
+        self.valid.clear()
+
+    def post(
+        self, url: str, headers: dict | None = None, data: object = None
+    ) -> _FakeExchange:
+        path = url.removeprefix(API_URL)
+        self.requests.append((path, data))
+        self.paths[path] += 1
+        response = None
+        if self._script:
+            outcome = self._script.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            response = outcome
+        return _FakeExchange(self, path, _cookie(headers or {}), data, response)
+
+    def answer(self, path: str, cookie: str | None, data: object) -> FakeResponse:
+        """Answer a request that reached the API."""
+        if path == "/login":
+            self.logins += 1
+            token = f"token-{self.logins}"
+            self.valid.add(token)
+            cookies: SimpleCookie = SimpleCookie()
+            cookies["hssess"] = token
+            for key, value in self.cookie_attributes.items():
+                cookies["hssess"][key] = value
+            return FakeResponse(cookies=cookies)
+
+        if cookie is not None and (self.reject_all or cookie not in self.valid):
+            return FakeResponse(401)
+
+        device_id = self.active.get(cookie, next(iter(self.devices)))
+        if path == "/change_device":
+            device_id = self.active[cookie] = data["device"]  # type: ignore[index]
+        self.answered.append((path, device_id))
+
+        if path == "/get_settings":
+            return FakeResponse(json_data={"settings_tab": []})
+        if path.startswith("/get_service_data"):
+            return FakeResponse(json_data=self._service_data(path, device_id))
+        return FakeResponse()
+
+    def _service_data(self, path: str, device_id: str) -> dict:
+        """Build the `get_service_data` payload of a device."""
+        data = {
+            "temperature": f"{self.devices.get(device_id, 18)}C",
+            "voltage": "12.4V",
+            "location": {"state": "OFF"},
+            "subscription": {"expiration": 1766325670},
+            "outputs": [{"line": "OUTV", "state": "OFF", "icon": "car_vent"}],
+        }
+        if path.endswith("poll=false"):
+            data["account_info"] = {
+                "devices": [[item, f"Heater {item}"] for item in self.devices]
+            }
+        return data
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def _cookie(headers: dict) -> str | None:
+    """Return the session token sent in the request headers, if any."""
+    cookies: SimpleCookie = SimpleCookie(headers.get("Cookie", ""))
+    for name in ("hssess-webclient", "hssess"):
+        if name in cookies:
+            return cookies[name].value
+    return None
@@ -0,0 +1,148 @@
+"""Tests for recording and replaying API exchanges."""
+
+import gzip
+import json
+import tempfile
+from pathlib import Path
+from time import monotonic
+from unittest import IsolatedAsyncioTestCase
+
+from pywebasto import Cassette, WebastoConnect
+from pywebasto.exceptions import CassetteMissException
+from pywebasto.simulator import WebastoSimulator
+
+
+class TestCassette(IsolatedAsyncioTestCase):
+    """Record traffic against the simulator and replay it offline."""
+
+    async def asyncSetUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "traffic.jsonl.gz"
+
+    async def asyncTearDown(self) -> None:
+        self._tmp.cleanup()
+
+    async def _record(
+        self, sessions: int = 1, **simulator_options: object
+    ) -> WebastoSimulator:
+        """Record a connect, a command and a refresh to the cassette."""
+        async with WebastoSimulator(devices=2, **simulator_options) as simulator:
+            webasto = WebastoConnect(
+                "user",
+                "secret",
+                refresh_interval=0,
+                sessions=sessions,
+                api_url=simulator.api_url,
+                cassette=Cassette(self.path, mode="record"),
+            )
+            try:
+                await webasto.connect()
+                first, second = webasto.devices.values()
+                await webasto.set_output_aux1(second, True)
+                await webasto.update(force=True)
+            finally:
+                await webasto.close()
+        return simulator
+
+    async def test_replay_reproduces_session_offline(self) -> None:
+        simulator = await self._record()
+
+        cassette = Cassette(self.path)
+        webasto = WebastoConnect(
+            "user", "secret", refresh_interval=0, cassette=cassette
+        )
+        try:
+            await webasto.connect()
+            first, second = webasto.devices.values()
+            await webasto.set_output_aux1(second, True)
+            await webasto.update(force=True)
+        finally:
+            await webasto.close()
+
+        self.assertEqual(len(cassette.exchanges), sum(simulator.requests.values()))
+        self.assertTrue(second.output_aux1)
+        self.assertFalse(first.output_aux1)
+        replayed = sum(data["count"] for data in webasto.stats()["requests"].values())
+        self.assertEqual(replayed, len(cassette.exchanges))
+
+    async def test_replay_with_another_session_count(self) -> None:
+        await self._record(sessions=2)
+
+        for sessions in (1, 3):
+            with self.subTest(sessions=sessions):
+                webasto = WebastoConnect(
+                    "user",
+                    "secret",
+                    refresh_interval=0,
+                    sessions=sessions,
+                    cassette=Cassette(self.path),
+                )
+                try:
+                    await webasto.connect()
+                    first, second = webasto.devices.values()
+                    await webasto.set_output_aux1(second, True)
+                    await webasto.update(force=True)
+                finally:
+                    await webasto.close()
+
+                self.assertTrue(second.output_aux1)
+                self.assertFalse(first.output_aux1)
+                cookies = {session.hssess for session in webasto._pool.sessions}
+                self.assertEqual(len(cookies), sessions)
+
+    async def test_cassette_is_compact_and_has_no_secrets(self) -> None:
+        simulator = await self._record(sessions=2)
+
+        with gzip.open(self.path, "rt", encoding="utf-8") as file:
+            content = file.read()
+        lines = [json.loads(line) for line in content.splitlines()]
+
+        login = lines[0]
+        self.assertEqual(login["request"], "LOGIN")
+        self.assertEqual(login["payload"], {"username": "user", "password": "***"})
+        self.assertEqual(
+            sorted(line["cookies"]["hssess"]["value"] for line in lines[:2]),
+            ["session-1", "session-2"],
+        )
+        for token in simulator._sessions:
+            self.assertNotIn(token, content)
+        self.assertNotIn("secret", self.path.read_bytes().decode("latin-1"))
+        self.assertEqual(self.path.stat().st_mode & 0o777, 0o600)
+        self.assertTrue(
+            {"request", "payload", "device", "status", "body", "elapsed"}
+            <= set(lines[1])
+        )
+
+    async def test_realtime_replay_keeps_recorded_latency(self) -> None:
+        await self._record(latency=0.02)
+
+        durations = {}
+        for realtime in (False, True):
+            webasto = WebastoConnect(
+                "user", "secret", cassette=Cassette(self.path, realtime=realtime)
+            )
+            start = monotonic()
+            try:
+                await webasto.connect()
+            finally:
+                await webasto.close()
+            durations[realtime] = monotonic() - start
+
+        self.assertLess(durations[False], 0.1)
+        self.assertGreaterEqual(durations[True], 0.02 * 7)
+
+    async def test_unrecorded_request_is_a_miss(self) -> None:
+        await self._record()
+
+        webasto = WebastoConnect("user", "secret", cassette=Cassette(self.path))
+        try:
+            await webasto.connect()
+            device = next(iter(webasto.devices.values()))
+            with self.assertRaises(CassetteMissException):
+                await webasto.set_low_voltage_cutoff(device, 11.0)
+        finally:
+            await webasto.close()
+
+    def test_invalid_mode_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            Cassette(self.path, mode="rewind")
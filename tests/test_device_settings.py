@@ -0,0 +1,69 @@
+"""Tests for indexed settings lookup on devices."""
+
+from unittest import TestCase
+
+from pywebasto.device import WebastoDevice
+
+
+def _settings() -> dict:
+    return {
+        "settings_tab": [
+            {
+                "group": "general",
+                "options": [
+                    {"key": "allow_GPS", "value": True},
+                    {"key": "low_voltage_cutoff", "value": 11.5},
+                    {"key": "ext_temp_comp", "value": -1.0},
+                ],
+            },
+            {
+                "group": "webasto",
+                "options": [{"key": "OUTH", "value": "ON", "timeout": 1800}],
+            },
+            {
+                "group": "outputs",
+                "options": [
+                    {"key": "OUT1", "value": "OFF", "timeout": 600},
+                    {"key": "OUT2", "value": "OFF", "timeout": 0},
+                    {"key": "OUT2_label", "value": "Lights"},
+                ],
+            },
+        ]
+    }
+
+
+class TestSettingsIndex(TestCase):
+    """Validate settings parsing through the (group, key) index."""
+
+    def test_known_settings_are_parsed(self) -> None:
+        device = WebastoDevice("1", "Heater")
+        device.settings = _settings()
+
+        self.assertTrue(device.allow_location)
+        self.assertEqual(device.low_voltage_cutoff, 11.5)
+        self.assertEqual(device.temperature_compensation, -1.0)
+        self.assertEqual(device.timeout_heat, 1800)
+        self.assertEqual(device.timeout_aux1, 600)
+        self.assertEqual(device.timeout_aux2, 0)
+
+    def test_typed_accessors(self) -> None:
+        device = WebastoDevice("1", "Heater")
+        device.settings = _settings()
+
+        self.assertEqual(device.get_setting("general", "low_voltage_cutoff"), 11.5)
+        self.assertEqual(device.get_setting("general", "missing", 3), 3)
+        self.assertEqual(device.get_setting("outputs", "allow_GPS"), None)
+        self.assertEqual(
+            device.settings_group("outputs"),
+            {"OUT1": "OFF", "OUT2": "OFF", "OUT2_label": "Lights"},
+        )
+        self.assertEqual(device.output_timeouts, {"OUTH": 1800, "OUT1": 600, "OUT2": 0})
+
+    def test_reassignment_rebuilds_the_index(self) -> None:
+        device = WebastoDevice("1", "Heater")
+        device.settings = _settings()
+
+        device.settings = None
+
+        self.assertIsNone(device.get_setting("general", "allow_GPS"))
+        self.assertEqual(device.output_timeouts, {})
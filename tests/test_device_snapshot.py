@@ -0,0 +1,142 @@
+"""Tests for parsed device snapshots and payload retention."""
+
+from dataclasses import FrozenInstanceError
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import AsyncMock
+
+from pywebasto import WebastoConnect
+from pywebasto.device import WebastoDevice
+from pywebasto.exceptions import InvalidRequestException
+
+PROPERTIES = (
+    "temperature",
+    "voltage",
+    "location",
+    "output_main",
+    "output_main_name",
+    "output_main_ontime",
+    "output_aux1",
+    "output_aux1_name",
+    "output_aux2",
+    "output_aux2_name",
+    "is_ventilation",
+    "temperature_unit",
+    "icon_heat",
+    "icon_aux1",
+    "allow_location",
+    "low_voltage_cutoff",
+    "timeout_heat",
+    "timeout_aux1",
+    "subscription_expiration",
+    "is_connected",
+    "timers",
+    "output_timeouts",
+)
+
+
+def _last_data(timer_start: int = 420) -> dict:
+    return {
+        "temperature": "18C",
+        "voltage": "12.4V",
+        "location": {"state": "ON", "lat": "55.0", "lon": "12.0"},
+        "connection_lost": False,
+        "outputs": [
+            {
+                "line": "OUTH",
+                "state": "ON",
+                "name": "",
+                "icon": "car_heat",
+                "ontime": 1766325670,
+                "timers": [
+                    {
+                        "type": "simple",
+                        "start": timer_start,
+                        "duration": 1800,
+                        "repeat": 31,
+                    }
+                ],
+            },
+            {"line": "OUT1", "state": "OFF", "name": "Lights", "icon": "light"},
+        ],
+    }
+
+
+def _settings() -> dict:
+    return {
+        "settings_tab": [
+            {
+                "group": "general",
+                "options": [
+                    {"key": "allow_GPS", "value": True},
+                    {"key": "low_voltage_cutoff", "value": 11.5},
+                ],
+            },
+            {
+                "group": "outputs",
+                "options": [{"key": "OUT1", "value": "OFF", "timeout": 600}],
+            },
+        ]
+    }
+
+
+def _device(keep_payloads: bool) -> WebastoDevice:
+    device = WebastoDevice("1", "Heater", keep_payloads)
+    device.settings = _settings()
+    device.last_data = _last_data()
+    device.dev_data = {"subscription": {"expiration": 1766325670}}
+    return device
+
+
+class TestDeviceSnapshot(TestCase):
+    """Validate the compact device representation."""
+
+    def test_compact_device_matches_full_device(self) -> None:
+        full = _device(keep_payloads=True)
+        compact = _device(keep_payloads=False)
+
+        for name in PROPERTIES:
+            with self.subTest(name):
+                self.assertEqual(getattr(compact, name), getattr(full, name))
+
+    def test_compact_device_drops_payloads(self) -> None:
+        device = _device(keep_payloads=False)
+
+        self.assertIsNone(device.last_data)
+        self.assertIsNone(device.dev_data)
+        self.assertIsNone(device.settings)
+        self.assertEqual(device.get_setting("general", "low_voltage_cutoff"), 11.5)
+
+    def test_snapshot_is_immutable_and_replaced_on_update(self) -> None:
+        device = _device(keep_payloads=False)
+        before = device.snapshot
+
+        device.timeout_heat = 7200
+
+        self.assertEqual(before.timeout_heat, 0)
+        self.assertEqual(device.snapshot.timeout_heat, 7200)
+        with self.assertRaises(FrozenInstanceError):
+            device.snapshot.temperature = 20  # type: ignore[misc]
+
+    def test_invalid_timers_raise_on_access(self) -> None:
+        device = WebastoDevice("1", "Heater", keep_payloads=False)
+
+        device.last_data = _last_data(timer_start=0)
+
+        self.assertEqual(device.temperature, 18)
+        with self.assertRaises(InvalidRequestException):
+            device.timers
+
+
+class TestClientPayloadRetention(IsolatedAsyncioTestCase):
+    """Validate the client option for payload retention."""
+
+    async def test_new_devices_use_client_setting(self) -> None:
+        cloud = WebastoConnect("user", "pass", keep_payloads=False)
+        cloud._call = AsyncMock(  # type: ignore[method-assign]
+            return_value={"account_info": {"devices": [["1", "Heater"]]}}
+        )
+        cloud._update_device_data = AsyncMock()  # type: ignore[method-assign]
+
+        await cloud.update()
+
+        self.assertFalse(cloud.devices["1"].keep_payloads)
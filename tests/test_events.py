@@ -0,0 +1,130 @@
+"""Tests for device change notifications."""
+
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import AsyncMock, Mock
+
+from pywebasto import DeviceChange, WebastoConnect
+from pywebasto.device import WebastoDevice
+from pywebasto.enums import Request
+from pywebasto.events import ChangeNotifier
+
+
+def _last_data(temperature: int, main: str = "OFF") -> dict:
+    return {
+        "temperature": f"{temperature}C",
+        "voltage": "12.4V",
+        "location": {"state": "OFF"},
+        "outputs": [{"line": "OUTH", "state": main, "icon": "car_heat"}],
+    }
+
+
+class TestChangeNotifier(TestCase):
+    """Validate field-level diffing."""
+
+    def test_only_changed_subscribed_fields_are_reported(self) -> None:
+        notifier = ChangeNotifier()
+        listener = Mock()
+        notifier.subscribe(listener, ["temperature", "voltage"])
+        device = WebastoDevice("1", "Heater")
+        device.last_data = _last_data(18)
+
+        before = notifier.snapshot(device)
+        device.last_data = _last_data(21, main="ON")
+        notifier.notify(device, before)
+
+        change: DeviceChange = listener.call_args.args[0]
+        self.assertEqual(change.device_id, "1")
+        self.assertEqual(change.changes, {"temperature": (18, 21)})
+
+    def test_listener_is_not_called_without_changes(self) -> None:
+        notifier = ChangeNotifier()
+        listener = Mock()
+        notifier.subscribe(listener)
+        device = WebastoDevice("1", "Heater")
+        device.last_data = _last_data(18)
+
+        before = notifier.snapshot(device)
+        device.last_data = _last_data(18)
+        notifier.notify(device, before)
+
+        listener.assert_not_called()
+
+    def test_device_filter_and_unsubscribe(self) -> None:
+        notifier = ChangeNotifier()
+        other = Mock()
+        mine = Mock()
+        notifier.subscribe(other, ["temperature"], device_id="2")
+        unsubscribe = notifier.subscribe(mine, ["temperature"], device_id="1")
+        device = WebastoDevice("1", "Heater")
+
+        before = notifier.snapshot(device)
+        device.last_data = _last_data(18)
+        notifier.notify(device, before)
+        unsubscribe()
+        before = notifier.snapshot(device)
+        device.last_data = _last_data(19)
+        notifier.notify(device, before)
+
+        other.assert_not_called()
+        mine.assert_called_once()
+
+    def test_failing_listener_does_not_stop_others(self) -> None:
+        notifier = ChangeNotifier()
+        healthy = Mock()
+        notifier.subscribe(Mock(side_effect=RuntimeError("bug")), ["temperature"])
+        notifier.subscribe(healthy, ["temperature"])
+        device = WebastoDevice("1", "Heater")
+
+        before = notifier.snapshot(device)
+        device.last_data = _last_data(18)
+        with self.assertLogs("pywebasto.events", level="ERROR"):
+            notifier.notify(device, before)
+
+        healthy.assert_called_once()
+
+    def test_rejects_unknown_fields(self) -> None:
+        with self.assertRaises(ValueError):
+            ChangeNotifier().subscribe(Mock(), ["colour"])
+
+
+class TestClientNotifications(IsolatedAsyncioTestCase):
+    """Validate notifications from client refreshes."""
+
+    async def test_refreshes_report_old_and_new_values(self) -> None:
+        cloud = WebastoConnect("user", "pass", refresh_interval=0)
+        cloud.devices["1"] = WebastoDevice("1", "Heater")  # type: ignore[index]
+        temperatures = iter([18, 18, 25])
+
+        async def call(api_type: Request, *_: object) -> dict | None:
+            if api_type == Request.GET_SETTINGS:
+                return {"settings_tab": []}
+            if api_type == Request.GET_DATA:
+                return _last_data(next(temperatures))
+            if api_type == Request.GET_DATA_NOPOLL:
+                return {"subscription": {"expiration": 1766325670}}
+            return None
+
+        cloud._call = AsyncMock(side_effect=call)  # type: ignore[method-assign]
+        listener = Mock()
+        cloud.subscribe(listener, ["temperature"])
+
+        for _ in range(3):
+            await cloud.update(device_id="1")
+
+        self.assertEqual(
+            [c.args[0].changes for c in listener.call_args_list],
+            [{"temperature": (None, 18)}, {"temperature": (18, 25)}],
+        )
+
+    async def test_full_update_keeps_device_objects(self) -> None:
+        cloud = WebastoConnect("user", "pass", refresh_interval=0)
+        device = WebastoDevice("1", "Heater")
+        cloud.devices["1"] = device  # type: ignore[index]
+        cloud._call = AsyncMock(  # type: ignore[method-assign]
+            return_value={"account_info": {"devices": [["1", "Heater"]]}}
+        )
+        cloud._update_device_data = AsyncMock()  # type: ignore[method-assign]
+
+        await cloud.update()
+
+        self.assertIs(cloud.devices["1"], device)
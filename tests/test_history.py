@@ -0,0 +1,162 @@
+"""Tests for the SQLite telemetry history store."""
+
+import asyncio
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase
+
+from pywebasto import HistoryStore, SQLiteHistoryStore, TelemetrySample, WebastoConnect
+from pywebasto.simulator import WebastoSimulator
+
+START = 1_699_999_200.0  # Start of an hour
+
+
+def _sample(
+    timestamp: float, temperature: float = 20, voltage: float = 12.6, main: bool = False
+) -> TelemetrySample:
+    return TelemetrySample(timestamp, temperature, voltage, main, False, True)
+
+
+class TestSQLiteHistoryStore(IsolatedAsyncioTestCase):
+    """Batched writes and indexed queries."""
+
+    async def asyncSetUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "history" / "telemetry.db"
+
+    async def asyncTearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _stored_rows(self) -> int:
+        """Count the rows committed to the database file."""
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute("SELECT COUNT(*) FROM telemetry").fetchone()[0]
+
+    async def test_samples_are_written_in_batches(self) -> None:
+        store = SQLiteHistoryStore(self.path, batch_size=3, flush_interval=0.05)
+        try:
+            for index in range(3):
+                store.add("1", _sample(START + index))
+            self.assertFalse(self.path.exists())
+
+            await asyncio.gather(*store._flush_tasks)
+            self.assertEqual(self._stored_rows(), 3)
+
+            # Samples short of a batch are written once the flush interval passed
+            store.add("1", _sample(START + 3))
+            self.assertEqual(self._stored_rows(), 3)
+            await asyncio.sleep(0.1)
+            self.assertEqual(self._stored_rows(), 4)
+        finally:
+            await store.close()
+
+    async def test_range_and_aggregate_queries(self) -> None:
+        store = SQLiteHistoryStore(self.path)
+        try:
+            for index in range(8):
+                store.add(
+                    "1",
+                    _sample(
+                        START + index * 15,
+                        temperature=10 + index,
+                        voltage=12.0 + index / 10,
+                        main=index < 2,
+                    ),
+                )
+                store.add("2", _sample(START + index * 15, temperature=-5))
+
+            # Queued samples are written before a query runs
+            samples = await store.samples("1", start=START + 30, end=START + 75)
+            self.assertEqual(
+                [sample.timestamp for sample in samples],
+                [START + 30, START + 45, START + 60],
+            )
+            self.assertEqual(samples[0], _sample(START + 30, 12, 12.2))
+            self.assertEqual(len(await store.samples("1", limit=2)), 2)
+
+            first, second = await store.buckets("1", width=60)
+            self.assertEqual((first.start, first.width, first.count), (START, 60, 4))
+            self.assertEqual(
+                (first.temperature_min, first.temperature_max, first.temperature_mean),
+                (10, 13, 11.5),
+            )
+            self.assertAlmostEqual(second.voltage_mean, 12.55)
+            self.assertEqual((first.output_main_on, second.output_main_on), (0.5, 0.0))
+            self.assertEqual(first.output_aux2_on, 1.0)
+
+            (hour,) = await store.buckets("2")
+            self.assertEqual(
+                (hour.start, hour.count, hour.temperature_max), (START, 8, -5)
+            )
+
+            self.assertEqual(await store.prune(START + 60), 8)
+            self.assertEqual(len(await store.samples("1")), 4)
+        finally:
+            await store.close()
+
+    async def test_device_range_queries_use_the_primary_key(self) -> None:
+        store = SQLiteHistoryStore(self.path)
+        try:
+            store.add("1", _sample(START))
+            await store.flush()
+            plan = store._connection.execute(
+                "EXPLAIN QUERY PLAN " + "SELECT * FROM telemetry"
+                " WHERE device_id = ? AND timestamp >= ? AND timestamp < ?",
+                ("1", 0, 1),
+            ).fetchall()
+        finally:
+            await store.close()
+
+        self.assertIn("USING PRIMARY KEY", plan[0][-1])
+
+    async def test_large_fleet_is_written_without_blocking(self) -> None:
+        store = SQLiteHistoryStore(self.path)
+        try:
+            for cycle in range(5):
+                for device in range(1000):
+                    store.add(str(device), _sample(START + cycle * 15))
+                # A full batch is written by one background task
+                self.assertEqual(len(store._flush_tasks), 1)
+                await asyncio.gather(*store._flush_tasks)
+                self.assertEqual(self._stored_rows(), 1000 * (cycle + 1))
+        finally:
+            await store.close()
+
+    def test_incomplete_store_cannot_be_created(self) -> None:
+        class FlushOnlyStore(HistoryStore):
+            async def flush(self) -> None:
+                return None
+
+        with self.assertRaises(TypeError):
+            FlushOnlyStore()  # type: ignore[abstract]
+
+
+class TestClientHistoryStore(IsolatedAsyncioTestCase):
+    """History store attached to the refresh pipeline."""
+
+    async def test_refreshes_are_persisted(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "telemetry.db"
+            async with WebastoSimulator(devices=2) as simulator:
+                webasto = WebastoConnect(
+                    "user",
+                    "pass",
+                    refresh_interval=0,
+                    api_url=simulator.api_url,
+                    history_store=path,
+                )
+                try:
+                    await webasto.connect()
+                    await webasto.update(force=True)
+                finally:
+                    await webasto.close()
+
+            store = SQLiteHistoryStore(path)
+            try:
+                for device_id, device in webasto.devices.items():
+                    samples = await store.samples(device_id)
+                    self.assertEqual(len(samples), 2)
+                    self.assertEqual(samples[-1].voltage, device.voltage)
+            finally:
+                await store.close()
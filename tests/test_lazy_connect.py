@@ -0,0 +1,77 @@
+"""Tests for lazy connect and device hydration."""
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from fakes import FakeApi
+
+from pywebasto import WebastoConnect
+
+DEVICES = {str(index): 18 for index in range(5)}
+
+
+class TestLazyConnect(IsolatedAsyncioTestCase):
+    """Validate connecting without refreshing every device."""
+
+    async def _connect(self, **kwargs: bool) -> tuple[WebastoConnect, FakeApi]:
+        cloud = WebastoConnect("user", "pass")
+        api = FakeApi(DEVICES)
+        cloud._session = api  # type: ignore[assignment]
+        await cloud.connect(**kwargs)
+        return cloud, api
+
+    async def test_lazy_connect_only_lists_devices(self) -> None:
+        cloud, api = await self._connect(lazy=True)
+
+        self.assertEqual(sum(api.paths.values()), 2)
+        self.assertEqual(list(cloud.devices), list(DEVICES))
+        self.assertFalse(any(device.hydrated for device in cloud.devices.values()))
+
+    async def test_unhydrated_devices_can_be_read(self) -> None:
+        cloud, _ = await self._connect(lazy=True)
+        device = cloud.devices["1"]
+        names = [
+            name
+            for name, value in vars(type(device)).items()
+            if isinstance(value, property) and not name.startswith("_")
+        ]
+
+        for name in names:
+            with self.subTest(property=name):
+                getattr(device, name)
+        self.assertFalse(device.location)
+        self.assertFalse(device.hydrated)
+
+    async def test_get_device_hydrates_once(self) -> None:
+        cloud, api = await self._connect(lazy=True)
+
+        device = await cloud.get_device("3")
+        await cloud.get_device("3")
+
+        self.assertTrue(device.hydrated)
+        self.assertEqual(device.temperature, 18)
+        self.assertEqual(api.paths["/get_settings"], 1)
+        self.assertEqual(api.paths["/change_device"], 1)
+
+    async def test_writes_hydrate_the_device_first(self) -> None:
+        cloud, api = await self._connect(lazy=True)
+
+        await cloud.set_output_main(cloud.devices["1"], True)
+
+        # The device is in ventilation mode, which is only known after hydration
+        self.assertEqual(api.paths["/command"], 1)
+        self.assertTrue(cloud.devices["1"].is_ventilation)
+
+    async def test_background_hydration_fills_all_devices(self) -> None:
+        cloud, _ = await self._connect(lazy=True, hydrate=True)
+
+        await asyncio.wait_for(cloud._hydration_task, 1)  # type: ignore[arg-type]
+
+        self.assertTrue(all(device.hydrated for device in cloud.devices.values()))
+        await cloud.close()
+
+    async def test_eager_connect_hydrates_everything(self) -> None:
+        cloud, _ = await self._connect()
+
+        self.assertTrue(all(device.hydrated for device in cloud.devices.values()))
+        self.assertIsNone(cloud._hydration_task)
@@ -0,0 +1,172 @@
+"""Tests for request metrics."""
+
+import json
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from aiohttp import web
+
+from pywebasto import RequestMetrics, WebastoConnect
+from pywebasto.enums import Request
+from pywebasto.simulator import WebastoSimulator
+
+
+class TestRequestMetrics(TestCase):
+    """Unit tests for the metrics collector."""
+
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        metrics = RequestMetrics(latency_buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.5, 0.7, 3.0):
+            metrics.observe_response(Request.GET_DATA, 200, seconds, 100)
+
+        latency = metrics.stats()["requests"]["GET_DATA"]["latency"]
+
+        self.assertEqual(latency["buckets"], {"0.1": 1, "1.0": 3, "+Inf": 4})
+        self.assertEqual(latency["count"], 4)
+        self.assertAlmostEqual(latency["sum"], 4.25)
+
+    def test_stats_group_counts_by_request_type(self) -> None:
+        metrics = RequestMetrics()
+        metrics.observe_response(Request.GET_DATA, 500, 0.1, 0)
+        metrics.observe_retry(Request.GET_DATA)
+        metrics.observe_error(Request.GET_DATA, 0.2)
+        metrics.observe_retry(Request.GET_DATA)
+        metrics.observe_response(Request.GET_DATA, 200, 0.1, 512)
+        metrics.observe_response(Request.COMMAND, 200, 0.1, 0)
+
+        stats = metrics.stats()["requests"]
+
+        self.assertEqual(
+            stats["GET_DATA"] | {"latency": None},
+            {
+                "count": 3,
+                "retries": 2,
+                "errors": 1,
+                "bytes_received": 512,
+                "statuses": {200: 1, 500: 1},
+                "latency": None,
+            },
+        )
+        self.assertEqual(stats["COMMAND"]["count"], 1)
+        self.assertNotIn("LOGIN", stats)
+
+    def test_prometheus_export(self) -> None:
+        metrics = RequestMetrics(latency_buckets=(1.0,))
+        metrics.observe_response(Request.LOGIN, 200, 0.5, 10)
+        metrics.observe_update_cache("device", True)
+        metrics.observe_lock_wait(0.0)
+
+        text = metrics.to_prometheus()
+
+        self.assertIn("# TYPE pywebasto_requests_total counter", text)
+        self.assertIn('pywebasto_requests_total{request="LOGIN"} 1', text)
+        self.assertIn('pywebasto_responses_total{request="LOGIN",status="200"} 1', text)
+        self.assertIn(
+            'pywebasto_request_duration_seconds_bucket{request="LOGIN",le="+Inf"} 1',
+            text,
+        )
+        self.assertIn('pywebasto_response_bytes_total{request="LOGIN"} 10', text)
+        self.assertIn(
+            'pywebasto_update_cache_total{scope="device",result="hit"} 1', text
+        )
+        self.assertIn("pywebasto_update_lock_wait_seconds_count 1", text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_reset_drops_observations(self) -> None:
+        metrics = RequestMetrics()
+        metrics.observe_response(Request.LOGIN, 200, 0.5, 10)
+
+        metrics.reset()
+
+        self.assertEqual(metrics.stats()["requests"], {})
+
+
+class TestClientMetrics(IsolatedAsyncioTestCase):
+    """Metrics recorded by the client against the simulator."""
+
+    async def test_requests_and_update_cache_are_counted(self) -> None:
+        async with WebastoSimulator(devices=2) as simulator:
+            webasto = WebastoConnect("user", "pass", api_url=simulator.api_url)
+            try:
+                await webasto.connect()
+                await webasto.update()
+                device_id = next(iter(webasto.devices))
+                await webasto.update(device_id=device_id)
+            finally:
+                await webasto.close()
+
+        stats = webasto.stats()
+        self.assertEqual(stats["requests"]["LOGIN"]["count"], 1)
+        self.assertEqual(stats["requests"]["GET_SETTINGS"]["count"], 2)
+        self.assertGreater(stats["requests"]["GET_SETTINGS"]["bytes_received"], 0)
+        self.assertEqual(stats["update_cache"]["account"], {"hits": 1, "misses": 0})
+        self.assertEqual(stats["update_cache"]["device"], {"hits": 1, "misses": 0})
+        self.assertEqual(stats["update_lock_wait"]["count"], 3)
+
+    async def test_compressed_chunked_bodies_are_counted(self) -> None:
+        body = json.dumps({"settings_tab": [{"group": "general"}] * 100}).encode()
+
+        async def settings(request: web.Request) -> web.StreamResponse:
+            response = web.StreamResponse()
+            response.enable_compression()
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            await response.write(body)
+            await response.write_eof()
+            return response
+
+        app = web.Application()
+        app.router.add_post("/webapi/get_settings", settings)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        webasto = WebastoConnect(
+            "user", "pass", api_url=f"http://127.0.0.1:{port}/webapi"
+        )
+        try:
+            await webasto._call(Request.GET_SETTINGS)
+        finally:
+            await webasto.close()
+            await runner.cleanup()
+
+        stats = webasto.stats()["requests"]["GET_SETTINGS"]
+        self.assertEqual(stats["bytes_received"], len(body))
+
+    async def test_retries_and_statuses_are_counted(self) -> None:
+        async with WebastoSimulator(error_rate=0.3, seed=1) as simulator:
+            webasto = WebastoConnect("user", "pass", api_url=simulator.api_url)
+            webasto._backoff_seconds = lambda attempt: 0
+            try:
+                await webasto.connect()
+            finally:
+                await webasto.close()
+
+        requests = webasto.metrics.stats()["requests"]
+        errors = sum(data["statuses"].get(500, 0) for data in requests.values())
+        retries = sum(data["retries"] for data in requests.values())
+        self.assertEqual(errors, simulator.responses[500])
+        self.assertEqual(retries, errors)
+        self.assertEqual(
+            sum(data["count"] for data in requests.values()),
+            sum(simulator.requests.values()),
+        )
+
+    async def test_response_cache_lookups_are_counted(self) -> None:
+        async with WebastoSimulator() as simulator:
+            webasto = WebastoConnect(
+                "user",
+                "pass",
+                refresh_interval=0,
+                cache_ttls={Request.GET_SETTINGS: 3600},
+                api_url=simulator.api_url,
+            )
+            try:
+                await webasto.connect()
+                await webasto.update()
+            finally:
+                await webasto.close()
+
+        self.assertEqual(
+            webasto.stats()["read_cache"], {"GET_SETTINGS": {"hits": 1, "misses": 1}}
+        )
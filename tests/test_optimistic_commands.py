@@ -0,0 +1,108 @@
+"""Tests for optimistic command handling."""
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, Mock
+
+from pywebasto import WebastoConnect
+from pywebasto.device import WebastoDevice
+from pywebasto.enums import Request
+
+
+def _device() -> WebastoDevice:
+    device = WebastoDevice("1", "Heater")
+    device.last_data = {
+        "temperature": "18C",
+        "voltage": "12.4V",
+        "location": {"state": "OFF"},
+        "outputs": [
+            {"line": "OUTH", "state": "OFF", "name": "", "icon": "car_heat"},
+            {"line": "OUT1", "state": "OFF", "name": "", "icon": "light"},
+        ],
+    }
+    return device
+
+
+class TestOptimisticCommands(IsolatedAsyncioTestCase):
+    """Validate local state updates and debounced confirmations."""
+
+    def _client(self, delay: float = 0.05) -> WebastoConnect:
+        cloud = WebastoConnect("user", "pass", optimistic_delay=delay)
+        cloud.devices["1"] = _device()  # type: ignore[index]
+        cloud._call = AsyncMock(return_value=None)  # type: ignore[method-assign]
+        cloud._update_device_data = AsyncMock()  # type: ignore[method-assign]
+        return cloud
+
+    async def test_command_applies_state_without_blocking_refresh(self) -> None:
+        cloud = self._client()
+        device = cloud.devices["1"]
+
+        await cloud.set_output_main(device, True)
+
+        self.assertTrue(device.output_main)
+        self.assertEqual(device.output_main_name, "Primary")
+        cloud._update_device_data.assert_not_awaited()
+        await cloud.close()
+
+    async def test_rapid_commands_share_one_confirmation(self) -> None:
+        cloud = self._client()
+        device = cloud.devices["1"]
+
+        await cloud.set_output_main(device, True)
+        await cloud.set_output_aux1(device, True)
+        await cloud.set_output_aux1(device, False)
+        await asyncio.sleep(0.1)
+
+        self.assertTrue(device.output_main)
+        self.assertFalse(device.output_aux1)
+        cloud._update_device_data.assert_awaited_once_with("1")
+        commands = [
+            call.args[1]
+            for call in cloud._call.await_args_list
+            if call.args[0] == Request.COMMAND
+        ]
+        self.assertEqual(commands, ["OUT H ON", "OUT 1 ON", "OUT 1 OFF"])
+
+    async def test_ventilation_mode_is_applied_locally(self) -> None:
+        cloud = self._client()
+        device = cloud.devices["1"]
+
+        await cloud.ventilation_mode(device, True)
+
+        self.assertTrue(device.is_ventilation)
+        cloud._update_device_data.assert_not_awaited()
+        await cloud.close()
+
+    async def test_failed_command_keeps_state(self) -> None:
+        cloud = self._client()
+        device = cloud.devices["1"]
+        cloud._call = AsyncMock(  # type: ignore[method-assign]
+            side_effect=[None, RuntimeError("down")]
+        )
+
+        with self.assertRaises(RuntimeError):
+            await cloud.set_output_aux1(device, True)
+
+        self.assertFalse(device.output_aux1)
+        self.assertEqual(cloud._confirm_tasks, {})
+
+    async def test_listeners_see_the_optimistic_change(self) -> None:
+        cloud = self._client()
+        listener = Mock()
+        cloud.subscribe(listener, ["output_aux1"])
+
+        await cloud.set_output_aux1(cloud.devices["1"], True)
+
+        self.assertEqual(
+            listener.call_args.args[0].changes, {"output_aux1": (False, True)}
+        )
+        await cloud.close()
+
+    async def test_close_cancels_pending_confirmations(self) -> None:
+        cloud = self._client(delay=10)
+
+        await cloud.set_output_aux1(cloud.devices["1"], True)
+        await cloud.close()
+
+        self.assertEqual(cloud._confirm_tasks, {})
+        cloud._update_device_data.assert_not_awaited()
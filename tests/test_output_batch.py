@@ -0,0 +1,57 @@
+"""Tests for batched output commands."""
+
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+
+from pywebasto import WebastoConnect
+from pywebasto.device import WebastoDevice
+from pywebasto.enums import Outputs, Request
+
+
+class TestOutputBatch(IsolatedAsyncioTestCase):
+    """Validate switching several outputs of one device at once."""
+
+    def _client(self) -> WebastoConnect:
+        cloud = WebastoConnect("user", "pass")
+        cloud._call = AsyncMock(return_value=None)  # type: ignore[method-assign]
+        cloud._update_device_data = AsyncMock()  # type: ignore[method-assign]
+        return cloud
+
+    async def test_batch_selects_device_once_and_refreshes_once(self) -> None:
+        cloud = self._client()
+        device = WebastoDevice("123", "Heater")
+
+        await cloud.set_outputs(
+            device, {Outputs.HEATER: True, Outputs.AUX1: True, Outputs.AUX2: False}
+        )
+
+        self.assertEqual(
+            [call.args[:2] for call in cloud._call.await_args_list],
+            [
+                (Request.CHANGE_DEVICE, {"device": "123"}),
+                (Request.COMMAND, "OUT H ON"),
+                (Request.COMMAND, "OUT 1 ON"),
+                (Request.COMMAND, "OUT 2 OFF"),
+            ],
+        )
+        cloud._update_device_data.assert_awaited_once_with("123", switch_device=False)
+
+    async def test_pairs_keep_the_last_state_per_output(self) -> None:
+        cloud = self._client()
+        device = WebastoDevice("123", "Heater")
+
+        await cloud.set_outputs(
+            device,
+            [(Outputs.AUX1, True), (Outputs.VENTILATION, True), (Outputs.AUX1, False)],
+        )
+
+        commands = [call.args[1] for call in cloud._call.await_args_list[1:]]
+        self.assertEqual(commands, ["OUT 1 OFF", "OUT V ON"])
+
+    async def test_empty_batch_sends_nothing(self) -> None:
+        cloud = self._client()
+
+        await cloud.set_outputs(WebastoDevice("123", "Heater"), {})
+
+        cloud._call.assert_not_awaited()
+        cloud._update_device_data.assert_not_awaited()
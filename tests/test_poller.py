@@ -0,0 +1,104 @@
+"""Tests for background device polling."""
+
+import asyncio
+from itertools import pairwise
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import AsyncMock
+
+from pywebasto import PollIntervals, WebastoConnect
+from pywebasto.device import WebastoDevice
+from pywebasto.enums import Request
+from pywebasto.exceptions import InvalidRequestException
+from pywebasto.poller import DevicePoller
+
+
+def _device(
+    device_id: str, main: str = "OFF", connection_lost: bool = False
+) -> WebastoDevice:
+    device = WebastoDevice(device_id, "Heater")
+    device.last_data = {
+        "temperature": "18C",
+        "voltage": "12.4V",
+        "location": {"state": "OFF"},
+        "connection_lost": connection_lost,
+        "outputs": [{"line": "OUTH", "state": main, "icon": "car_heat"}],
+    }
+    return device
+
+
+class TestPollIntervals(TestCase):
+    """Validate interval selection from device state."""
+
+    def test_selects_interval_from_activity(self) -> None:
+        intervals = PollIntervals(active=10, idle=60, offline=600)
+
+        self.assertEqual(intervals.for_device(_device("1", "ON"), False), 10)
+        self.assertEqual(intervals.for_device(_device("1"), False), 60)
+        self.assertEqual(intervals.for_device(_device("1"), True), 10)
+        self.assertEqual(
+            intervals.for_device(_device("1", "ON", connection_lost=True), False), 600
+        )
+
+    def test_rejects_non_positive_intervals(self) -> None:
+        with self.assertRaises(ValueError):
+            PollIntervals(active=0)
+
+
+class TestDevicePoller(IsolatedAsyncioTestCase):
+    """Validate scheduling of background polls."""
+
+    def _client(self, count: int) -> WebastoConnect:
+        cloud = WebastoConnect("user", "pass", refresh_interval=0)
+        for index in range(count):
+            device_id = str(index)
+            cloud.devices[device_id] = _device(device_id)  # type: ignore[index]
+        cloud.update = AsyncMock()  # type: ignore[method-assign]
+        return cloud
+
+    async def test_initial_polls_are_staggered(self) -> None:
+        cloud = self._client(4)
+        poller = DevicePoller(cloud, PollIntervals(active=8))
+
+        poller._sync_devices()
+
+        due = [due for due, _ in poller._schedule]
+        gaps = [later - earlier for earlier, later in pairwise(due)]
+        for gap in gaps:
+            self.assertAlmostEqual(gap, 2.0)
+
+    async def test_polls_every_device_in_the_background(self) -> None:
+        cloud = self._client(3)
+
+        cloud.start_polling(PollIntervals(active=0.03, idle=0.03))
+        self.assertTrue(cloud.polling)
+        await asyncio.sleep(0.1)
+        await cloud.stop_polling()
+
+        self.assertFalse(cloud.polling)
+        polled = {call.kwargs["device_id"] for call in cloud.update.await_args_list}
+        self.assertEqual(polled, {"0", "1", "2"})
+
+    async def test_failures_back_off_up_to_offline_interval(self) -> None:
+        cloud = self._client(1)
+        cloud.update = AsyncMock(  # type: ignore[method-assign]
+            side_effect=InvalidRequestException("down")
+        )
+        poller = DevicePoller(cloud, PollIntervals(active=10, idle=60, offline=100))
+
+        await poller._poll("0")
+        self.assertEqual(poller.interval_for("0"), 20)
+        for _ in range(5):
+            await poller._poll("0")
+
+        self.assertEqual(poller.interval_for("0"), 100)
+
+    async def test_write_pulls_next_poll_in(self) -> None:
+        cloud = self._client(1)
+        cloud._poller = DevicePoller(cloud, PollIntervals(active=10, idle=600))
+        cloud._poller._push("0", 10_000_000.0)
+        cloud._pool.primary.active_device = "0"
+
+        cloud._record_write(Request.COMMAND, cloud._pool.primary)
+
+        self.assertLess(cloud._poller._due["0"], 10_000_000.0)
+        self.assertEqual(cloud._poller.interval_for("0"), 10)
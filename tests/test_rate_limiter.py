@@ -0,0 +1,101 @@
+"""Tests for client-side rate limiting."""
+
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+
+from fakes import FakeApi, FakeResponse
+
+from pywebasto import RateLimiter, WebastoConnect
+from pywebasto.enums import Request
+from pywebasto.exceptions import TooManyRequestsException
+from pywebasto.ratelimit import parse_retry_after
+
+
+class _FakeClock:
+    """Controllable replacement for `monotonic` and `asyncio.sleep`."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class TestParseRetryAfter(TestCase):
+    """Validate `Retry-After` parsing."""
+
+    def test_parses_delay_seconds(self) -> None:
+        self.assertEqual(parse_retry_after("30"), 30.0)
+
+    def test_parses_http_date_in_the_past_as_zero(self) -> None:
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+    def test_ignores_missing_or_invalid_values(self) -> None:
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+class TestRateLimiter(IsolatedAsyncioTestCase):
+    """Validate token bucket behavior."""
+
+    async def asyncSetUp(self) -> None:
+        self.clock = _FakeClock()
+        patches = [
+            patch("pywebasto.ratelimit.monotonic", new=self.clock.monotonic),
+            patch("pywebasto.ratelimit.asyncio.sleep", new=self.clock.sleep),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_burst_is_served_then_rate_applies(self) -> None:
+        limiter = RateLimiter(rate=2, burst=2)
+
+        for _ in range(3):
+            await limiter.acquire()
+
+        self.assertEqual(self.clock.sleeps, [0.5])
+
+    async def test_non_blocking_limiter_fails_fast(self) -> None:
+        limiter = RateLimiter(rate=1, blocking=False)
+        await limiter.acquire()
+
+        with self.assertRaises(TooManyRequestsException):
+            await limiter.acquire()
+
+    async def test_throttling_halves_rate_and_honours_retry_after(self) -> None:
+        limiter = RateLimiter(rate=4, burst=4)
+
+        limiter.on_throttled(retry_after=30)
+        await limiter.acquire()
+
+        self.assertEqual(limiter.rate, 2)
+        self.assertEqual(self.clock.sleeps, [30])
+
+    async def test_successes_recover_rate_up_to_maximum(self) -> None:
+        limiter = RateLimiter(rate=4, recovery=1)
+        limiter.on_throttled()
+
+        for _ in range(5):
+            limiter.on_success()
+
+        self.assertEqual(limiter.rate, 4)
+
+    async def test_client_applies_retry_after_from_429(self) -> None:
+        limiter = RateLimiter(rate=10, burst=10)
+        cloud = WebastoConnect("user", "pass", rate_limiter=limiter)
+        api = FakeApi(delay=0)
+        api.script(FakeResponse(429, headers={"Retry-After": "12"}))
+        cloud._session = api  # type: ignore[assignment]
+
+        with self.assertRaises(TooManyRequestsException):
+            await cloud._call(Request.GET_DATA)
+        await cloud._call(Request.GET_DATA)
+
+        self.assertEqual(self.clock.sleeps, [12])
+        self.assertLess(limiter.rate, 10)
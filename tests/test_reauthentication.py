@@ -0,0 +1,169 @@
+"""Tests for automatic re-authentication."""
+
+import asyncio
+from http.cookies import SimpleCookie
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+
+from fakes import FakeApi
+
+from pywebasto import WebastoConnect
+from pywebasto.enums import Request
+from pywebasto.exceptions import UnauthorizedException
+from pywebasto.session import cookie_lifetime
+
+
+class TestCookieLifetime(TestCase):
+    """Validate expiry parsing of response cookies."""
+
+    def test_reads_max_age_and_ignores_other_objects(self) -> None:
+        cookies: SimpleCookie = SimpleCookie()
+        cookies["hssess"] = "abc"
+        cookies["hssess"]["max-age"] = "3600"
+
+        self.assertEqual(cookie_lifetime(cookies["hssess"]), 3600)
+        self.assertIsNone(cookie_lifetime(SimpleNamespace(value="abc")))
+
+    def test_expired_cookies_have_no_lifetime(self) -> None:
+        cookies: SimpleCookie = SimpleCookie()
+        cookies["hssess"] = "abc"
+        cookies["hssess"]["max-age"] = "0"
+        cookies["hssess-webclient"] = "abc"
+        cookies["hssess-webclient"]["expires"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+
+        self.assertIsNone(cookie_lifetime(cookies["hssess"]))
+        self.assertIsNone(cookie_lifetime(cookies["hssess-webclient"]))
+
+
+class TestReauthentication(IsolatedAsyncioTestCase):
+    """Validate transparent re-login on rejected sessions."""
+
+    async def _client(self, api: FakeApi, **kwargs: object) -> WebastoConnect:
+        cloud = WebastoConnect("user", "pass", **kwargs)  # type: ignore[arg-type]
+        cloud._session = api  # type: ignore[assignment]
+        await cloud._login(cloud._pool.primary)
+        return cloud
+
+    async def test_rejected_request_is_replayed_after_login(self) -> None:
+        api = FakeApi()
+        cloud = await self._client(api)
+        api.expire()
+
+        data = await cloud._call(Request.GET_SETTINGS)
+
+        self.assertEqual(data, {"settings_tab": []})
+        self.assertEqual(api.logins, 2)
+        self.assertEqual(cloud._hssess, "token-2")
+        # Rejections right after a login do not count as the session lifetime
+        self.assertIsNone(cloud._session_lifetime)
+
+    async def test_concurrent_rejections_share_one_login(self) -> None:
+        api = FakeApi()
+        cloud = await self._client(api)
+        api.expire()
+
+        await asyncio.gather(
+            cloud._call(Request.GET_SETTINGS),
+            cloud._call(Request.GET_DATA),
+            cloud._call(Request.GET_DATA_NOPOLL),
+        )
+
+        self.assertEqual(api.logins, 2)
+
+    async def test_selected_device_is_restored_before_replay(self) -> None:
+        api = FakeApi()
+        cloud = await self._client(api)
+        await cloud._change_device("42")
+        api.expire()
+        api.requests.clear()
+
+        await cloud._call(Request.COMMAND, "OUT 1 ON")
+
+        self.assertEqual(
+            [path for path, _ in api.requests],
+            ["/command", "/login", "/change_device", "/command"],
+        )
+
+    async def test_late_rejection_selects_the_operation_device(self) -> None:
+        # The data read is rejected after the shared login finished, while the
+        # settings read is still selecting the device again
+        api = FakeApi(
+            delays={"/get_service_data?poll=true": 0.05, "/change_device": 0.1}
+        )
+        cloud = await self._client(api)
+
+        async with cloud._device_session("42"):
+            api.expire()
+            await asyncio.gather(
+                cloud._call(Request.GET_SETTINGS), cloud._call(Request.GET_DATA)
+            )
+
+        self.assertEqual(api.logins, 2)
+        reads = [device for path, device in api.answered if path != "/change_device"]
+        self.assertEqual(reads, ["42", "42"])
+
+    async def test_second_rejection_is_raised(self) -> None:
+        api = FakeApi()
+        cloud = await self._client(api)
+        api.reject_all = True
+
+        with self.assertRaises(UnauthorizedException):
+            await cloud._call(Request.GET_SETTINGS)
+
+        self.assertEqual(api.logins, 2)
+
+    async def test_auto_login_can_be_disabled(self) -> None:
+        api = FakeApi()
+        cloud = await self._client(api, auto_login=False)
+        api.expire()
+
+        with self.assertRaises(UnauthorizedException):
+            await cloud._call(Request.GET_SETTINGS)
+
+        self.assertEqual(api.logins, 1)
+
+    async def test_rejection_teaches_the_session_lifetime(self) -> None:
+        api = FakeApi()
+        cloud = await self._client(api)
+        cloud._pool.primary.logged_in_at -= 3600  # type: ignore[operator]
+        api.expire()
+
+        await cloud._call(Request.GET_SETTINGS)
+
+        self.assertAlmostEqual(cloud._session_lifetime, 3600, delta=1)  # type: ignore[arg-type]
+        self.assertIn(0, cloud._renewal_tasks)
+        await cloud.close()
+
+    async def test_session_is_renewed_before_it_expires(self) -> None:
+        api = FakeApi()
+        with patch("pywebasto.MIN_LEARNED_SESSION_LIFETIME", 0):
+            cloud = await self._client(api, session_lifetime=0.1)
+
+        await asyncio.sleep(0.15)
+        requests = len(api.requests)
+        await cloud._call(Request.GET_SETTINGS)
+
+        self.assertEqual(api.logins, 2)
+        self.assertEqual(len(api.requests), requests + 1)
+        await cloud.close()
+        self.assertEqual(cloud._renewal_tasks, {})
+
+    async def test_expired_login_cookie_does_not_renew_in_a_loop(self) -> None:
+        api = FakeApi(cookie_attributes={"max-age": "0"})
+        cloud = await self._client(api)
+
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(api.logins, 1)
+        self.assertIsNone(cloud._pool.primary.expires_at)
+        await cloud.close()
+
+    async def test_short_lifetime_is_not_renewed_right_after_login(self) -> None:
+        api = FakeApi()
+        cloud = await self._client(api, session_lifetime=0.01)
+
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(api.logins, 1)
+        await cloud.close()
@@ -0,0 +1,144 @@
+"""Tests for per-endpoint response caching."""
+
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+
+from fakes import FakeApi
+
+from pywebasto import WebastoConnect
+from pywebasto.cache import ResponseCache
+from pywebasto.device import WebastoDevice
+from pywebasto.enums import Request
+
+
+class TestResponseCache(TestCase):
+    """Validate cache entry lifetime."""
+
+    def test_only_configured_request_types_are_cached(self) -> None:
+        cache = ResponseCache({Request.GET_SETTINGS: 60})
+        cache.set("1", Request.GET_SETTINGS, {"a": 1})
+        cache.set("1", Request.GET_DATA, {"b": 2})
+
+        self.assertEqual(cache.get("1", Request.GET_SETTINGS), (True, {"a": 1}))
+        self.assertEqual(cache.get("1", Request.GET_DATA), (False, None))
+
+    def test_entries_expire_after_their_ttl(self) -> None:
+        cache = ResponseCache({Request.GET_SETTINGS: 60, Request.GET_DATA: 5})
+        with patch("pywebasto.cache.monotonic", return_value=100.0):
+            cache.set("1", Request.GET_SETTINGS, {"a": 1})
+            cache.set("1", Request.GET_DATA, {"b": 2})
+
+        with patch("pywebasto.cache.monotonic", return_value=110.0):
+            self.assertTrue(cache.get("1", Request.GET_SETTINGS)[0])
+            self.assertFalse(cache.get("1", Request.GET_DATA)[0])
+
+    def test_invalidate_only_drops_requested_entries(self) -> None:
+        cache = ResponseCache({Request.GET_SETTINGS: 60, Request.GET_DATA: 60})
+        cache.set("1", Request.GET_SETTINGS, {})
+        cache.set("1", Request.GET_DATA, {})
+        cache.set("2", Request.GET_DATA, {})
+
+        cache.invalidate("1", {Request.GET_DATA})
+
+        self.assertTrue(cache.get("1", Request.GET_SETTINGS)[0])
+        self.assertFalse(cache.get("1", Request.GET_DATA)[0])
+        self.assertTrue(cache.get("2", Request.GET_DATA)[0])
+
+
+class TestClientCaching(IsolatedAsyncioTestCase):
+    """Validate that refreshes only download what may have changed."""
+
+    def _client(self) -> tuple[WebastoConnect, FakeApi]:
+        cloud = WebastoConnect(
+            "user",
+            "pass",
+            refresh_interval=0,
+            cache_ttls={
+                Request.GET_SETTINGS: 3600,
+                Request.GET_DATA: 3600,
+                Request.GET_DATA_NOPOLL: 3600,
+            },
+        )
+        api = FakeApi({"1": 18, "2": 18})
+        cloud._session = api  # type: ignore[assignment]
+        cloud.devices["1"] = WebastoDevice("1", "Heater")  # type: ignore[index]
+        return cloud, api
+
+    async def test_refresh_reuses_fresh_responses(self) -> None:
+        cloud, api = self._client()
+
+        await cloud.update(device_id="1")
+        await cloud.update(device_id="1")
+
+        self.assertEqual(api.paths["/get_settings"], 1)
+        self.assertEqual(api.paths["/get_service_data?poll=true"], 1)
+
+    async def test_command_invalidates_data_but_not_settings(self) -> None:
+        cloud, api = self._client()
+        await cloud.update(device_id="1")
+
+        await cloud.set_output_aux1(cloud.devices["1"], True)
+
+        self.assertEqual(api.paths["/get_settings"], 1)
+        self.assertEqual(api.paths["/get_service_data?poll=true"], 2)
+        self.assertEqual(api.paths["/get_service_data?poll=false"], 2)
+
+    async def test_post_setting_invalidates_settings(self) -> None:
+        cloud, api = self._client()
+        await cloud.update(device_id="1")
+
+        await cloud.set_low_voltage_cutoff(cloud.devices["1"], 11.5)
+
+        self.assertEqual(api.paths["/get_settings"], 2)
+
+    async def test_force_update_bypasses_cache(self) -> None:
+        cloud, api = self._client()
+        await cloud.update(device_id="1")
+
+        await cloud.update(device_id="1", force=True)
+
+        self.assertEqual(api.paths["/get_settings"], 2)
+
+
+class TestRefreshCycle(IsolatedAsyncioTestCase):
+    """Validate read deduplication within one full refresh."""
+
+    async def test_account_payload_is_reused_for_selected_device(self) -> None:
+        cloud = WebastoConnect("user", "pass")
+        api = FakeApi({"1": 18, "2": 18})
+        cloud._session = api  # type: ignore[assignment]
+        await cloud.update()
+        self.assertEqual(api.paths["/get_service_data?poll=false"], 3)
+        selected = cloud._pool.primary.active_device
+        api.paths.clear()
+
+        await cloud.update(force=True)
+
+        # One account read plus one read for the device that was not selected
+        self.assertEqual(api.paths["/get_service_data?poll=false"], 2)
+        self.assertEqual(api.paths["/change_device"], 1)
+        self.assertEqual(api.paths["/get_settings"], 2)
+        self.assertIsNotNone(cloud.devices[selected].dev_data)
+
+    async def test_unknown_selection_does_not_reuse_account_payload(self) -> None:
+        cloud = WebastoConnect("user", "pass")
+        api = FakeApi({"1": 18, "2": 18})
+        cloud._session = api  # type: ignore[assignment]
+
+        await cloud.update()
+
+        self.assertEqual(api.paths["/get_service_data?poll=false"], 3)
+
+    async def test_duplicate_devices_are_refreshed_once(self) -> None:
+        cloud = WebastoConnect("user", "pass")
+        api = FakeApi({"1": 18, "2": 18})
+        cloud._session = api  # type: ignore[assignment]
+        cloud._list_devices = lambda: [  # type: ignore[method-assign]
+            {"id": "1", "name": "Heater"},
+            {"id": "1", "name": "Heater"},
+        ]
+
+        await cloud.update()
+
+        self.assertEqual(api.paths["/get_settings"], 1)
+        self.assertEqual(api.paths["/get_service_data?poll=true"], 1)
@@ -0,0 +1,141 @@
+"""Tests for the fleet-wide timer schedule index."""
+
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from pywebasto import SimpleTimer, TimerSchedule, WebastoConnect
+from pywebasto.simulator import WebastoSimulator
+
+MONDAY = datetime(2024, 1, 1, tzinfo=timezone.utc)
+WEEKDAYS = 31
+SUNDAY = 64
+
+
+def _at(days: float = 0, hours: float = 0, minutes: float = 0) -> datetime:
+    return MONDAY + timedelta(days=days, hours=hours, minutes=minutes)
+
+
+class TestTimerSchedule(TestCase):
+    """Next activations, active devices and conflicts."""
+
+    def setUp(self) -> None:
+        self.morning = SimpleTimer(start=420, duration=1800, repeat=WEEKDAYS)
+        self.sunday = SimpleTimer(start=450, duration=1800, repeat=SUNDAY)
+        self.schedule = TimerSchedule()
+        self.schedule.update("1", {"OUTH": [self.morning]})
+        self.schedule.update("2", {"OUTH": [self.sunday], "OUTV": []})
+
+    def test_upcoming_activations_wrap_around_the_week(self) -> None:
+        activations = self.schedule.upcoming(3, after=_at(hours=6))
+        self.assertEqual(
+            [activation.start for activation in activations],
+            [_at(0, 7), _at(1, 7), _at(2, 7)],
+        )
+        self.assertEqual(activations[0].end, _at(0, 7, 30))
+        self.assertEqual(activations[0].timer, self.morning)
+        self.assertEqual(activations[0].line, "OUTH")
+
+        activations = self.schedule.upcoming(2, after=_at(4, 8))
+        self.assertEqual(
+            [(activation.device_id, activation.start) for activation in activations],
+            [("2", _at(6, 7, 30)), ("1", _at(7, 7))],
+        )
+
+        within_hour = self.schedule.upcoming(
+            None, after=_at(hours=6, minutes=30), before=_at(hours=7, minutes=30)
+        )
+        self.assertEqual([activation.device_id for activation in within_hour], ["1"])
+        with self.assertRaises(ValueError):
+            self.schedule.upcoming(None)
+
+    def test_active_devices_at_a_time(self) -> None:
+        self.assertEqual(
+            [
+                activation.device_id
+                for activation in self.schedule.active(_at(0, 7, 10))
+            ],
+            ["1"],
+        )
+        self.assertEqual(self.schedule.active(_at(0, 7, 30)), [])
+        self.assertEqual(self.schedule.active(_at(5, 7, 10)), [])
+
+        late = SimpleTimer(start=1410, duration=3600, repeat=SUNDAY)
+        self.schedule.update("3", {"OUTH": [late]})
+        (activation,) = self.schedule.active(_at(7, 0, 10))
+        self.assertEqual(
+            (activation.device_id, activation.start), ("3", _at(6, 23, 30))
+        )
+
+    def test_conflicts_between_timers_of_a_device(self) -> None:
+        heater = SimpleTimer(start=420, duration=3600, repeat=1)
+        ventilation = SimpleTimer(start=450, duration=3600, repeat=3)
+        late = SimpleTimer(start=1410, duration=7200, repeat=SUNDAY)
+        early = SimpleTimer(start=30, duration=1800, repeat=1)
+        self.schedule.update(
+            "3", {"OUTH": [heater, late, early], "OUTV": [ventilation]}
+        )
+
+        conflicts = self.schedule.conflicts("3", after=_at(hours=-1))
+        self.assertEqual(
+            [(conflict.start, conflict.end) for conflict in conflicts],
+            [(_at(0, 0, 30), _at(0, 1)), (_at(0, 7, 30), _at(0, 8))],
+        )
+        self.assertEqual(
+            (conflicts[0].first.timer, conflicts[0].second.timer), (late, early)
+        )
+        self.assertEqual(conflicts[0].first.start, _at(-1, 23, 30))
+        self.assertEqual(conflicts[1].second.line, "OUTV")
+
+        # Past overlaps are reported as their run next week
+        conflicts = self.schedule.conflicts(after=_at(0, 9))
+        self.assertEqual(
+            [(conflict.device_id, conflict.start) for conflict in conflicts],
+            [("3", _at(7, 0, 30)), ("3", _at(7, 7, 30))],
+        )
+        self.assertEqual(self.schedule.conflicts("1"), [])
+
+    def test_updates_only_reindex_changed_devices(self) -> None:
+        self.assertEqual(len(self.schedule), 6)
+        self.assertFalse(
+            self.schedule.update("1", {"OUTH": [SimpleTimer(420, 1800, WEEKDAYS)]})
+        )
+
+        disabled = SimpleTimer(start=420, duration=1800, repeat=WEEKDAYS, enabled=False)
+        once = SimpleTimer(start=420, duration=1800, repeat=0)
+        self.assertTrue(self.schedule.update("1", {"OUTH": [disabled, once]}))
+        self.assertEqual(len(self.schedule), 1)
+        self.assertEqual(
+            [activation.device_id for activation in self.schedule.upcoming(2, _at())],
+            ["2", "2"],
+        )
+
+        self.schedule.remove("2")
+        self.assertEqual(len(self.schedule), 0)
+        self.assertEqual(self.schedule.upcoming(after=_at()), [])
+        self.assertEqual(self.schedule.active(_at(6, 7, 40)), [])
+
+
+class TestClientSchedule(IsolatedAsyncioTestCase):
+    """Timers indexed by the client on each refresh."""
+
+    async def test_saved_timers_are_indexed(self) -> None:
+        async with WebastoSimulator(devices=2) as simulator:
+            webasto = WebastoConnect(
+                "user", "pass", refresh_interval=0, api_url=simulator.api_url
+            )
+            try:
+                await webasto.connect()
+                self.assertEqual(len(webasto.schedule), 0)
+
+                first, second = webasto.devices.values()
+                await webasto.save_timers(
+                    second, [SimpleTimer(start=420, duration=1800, repeat=SUNDAY)]
+                )
+            finally:
+                await webasto.close()
+
+        (activation,) = webasto.schedule.upcoming(None, _at(), _at(7))
+        self.assertEqual(
+            (activation.device_id, activation.start),
+            (second.device_id, _at(6, 7)),
+        )
@@ -0,0 +1,223 @@
+"""Tests for pooled API sessions."""
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+
+from fakes import FakeApi
+
+from pywebasto import WebastoConnect
+from pywebasto.device import WebastoDevice
+from pywebasto.enums import Request
+from pywebasto.exceptions import InvalidRequestException
+from pywebasto.session import SessionPool
+
+
+class TestSessionPool(IsolatedAsyncioTestCase):
+    """Validate session selection in the pool."""
+
+    async def test_rejects_empty_pool(self) -> None:
+        with self.assertRaises(ValueError):
+            WebastoConnect("user", "pass", sessions=0)
+
+    async def test_acquire_prefers_session_on_requested_device(self) -> None:
+        pool = SessionPool(3)
+        pool.sessions[2].active_device = "b"
+
+        session = await pool.acquire("b")
+
+        self.assertIs(session, pool.sessions[2])
+
+    async def test_acquire_waits_for_release_when_all_busy(self) -> None:
+        pool = SessionPool(1)
+        held = await pool.acquire("a")
+        waiter = asyncio.create_task(pool.acquire("b"))
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+
+        await pool.release(held)
+
+        self.assertIs(await waiter, held)
+
+
+class TestPooledClient(IsolatedAsyncioTestCase):
+    """Validate that pooled sessions keep separate device contexts."""
+
+    async def test_connect_logs_in_every_session(self) -> None:
+        api = FakeApi({"1": 18})
+        cloud = WebastoConnect("user", "pass", sessions=3)
+        cloud._session = api  # type: ignore[assignment]
+
+        await cloud.connect()
+
+        self.assertEqual(api.logins, 3)
+        cookies = {session.hssess for session in cloud._pool.sessions}
+        self.assertEqual(len(cookies), 3)
+
+    async def test_full_update_refreshes_devices_concurrently(self) -> None:
+        api = FakeApi({"1": 11, "2": 12, "3": 13, "4": 14})
+        cloud = WebastoConnect("user", "pass", sessions=2, concurrent_reads=False)
+        cloud._session = api  # type: ignore[assignment]
+
+        await cloud.connect()
+
+        self.assertEqual(api.max_in_flight, 2)
+        for device_id, temperature in api.devices.items():
+            self.assertEqual(cloud.devices[device_id].temperature, temperature)
+
+    async def test_device_updates_run_concurrently(self) -> None:
+        api = FakeApi({"1": 11, "2": 12, "3": 13, "4": 14})
+        cloud = WebastoConnect("user", "pass", sessions=4, concurrent_reads=False)
+        cloud._session = api  # type: ignore[assignment]
+        await cloud.connect()
+        api.max_in_flight = 0
+
+        await asyncio.gather(
+            *(
+                cloud.update(device_id=device_id, force=True)
+                for device_id in api.devices
+            )
+        )
+
+        self.assertEqual(api.max_in_flight, 4)
+
+    async def test_commands_for_different_devices_keep_their_context(self) -> None:
+        api = FakeApi({"1": 11, "2": 12})
+        cloud = WebastoConnect("user", "pass", sessions=2)
+        cloud._session = api  # type: ignore[assignment]
+        await cloud.connect()
+
+        await asyncio.gather(
+            cloud.set_output_aux1(cloud.devices["1"], True),
+            cloud.set_output_aux1(cloud.devices["2"], True),
+        )
+
+        self.assertEqual(cloud.devices["1"].temperature, 11)
+        self.assertEqual(cloud.devices["2"].temperature, 12)
+
+
+class TestActiveDeviceTracking(IsolatedAsyncioTestCase):
+    """Validate that CHANGE_DEVICE is only sent when the device changes."""
+
+    async def test_repeated_commands_select_device_once(self) -> None:
+        cloud = WebastoConnect("user", "pass")
+        device = WebastoDevice("123", "Heater")
+        cloud._call = AsyncMock(return_value=None)  # type: ignore[method-assign]
+        cloud._update_device_data = AsyncMock()  # type: ignore[method-assign]
+
+        await cloud.set_output_aux1(device, True)
+        await cloud.set_output_aux2(device, True)
+
+        requests = [call.args[0] for call in cloud._call.call_args_list]
+        self.assertEqual(requests.count(Request.CHANGE_DEVICE), 1)
+
+    async def test_switching_device_sends_change_device(self) -> None:
+        cloud = WebastoConnect("user", "pass")
+        cloud._call = AsyncMock(return_value=None)  # type: ignore[method-assign]
+        cloud._update_device_data = AsyncMock()  # type: ignore[method-assign]
+
+        await cloud.set_output_aux1(WebastoDevice("1", "One"), True)
+        await cloud.set_output_aux1(WebastoDevice("2", "Two"), True)
+        await cloud.set_output_aux1(WebastoDevice("2", "Two"), False)
+
+        self.assertEqual(
+            [
+                call.args[1]
+                for call in cloud._call.call_args_list
+                if call.args[0] == Request.CHANGE_DEVICE
+            ],
+            [{"device": "1"}, {"device": "2"}],
+        )
+
+    async def test_error_invalidates_selected_device(self) -> None:
+        cloud = WebastoConnect("user", "pass")
+        device = WebastoDevice("123", "Heater")
+        cloud._call = AsyncMock(  # type: ignore[method-assign]
+            side_effect=[None, InvalidRequestException("boom"), None, None]
+        )
+        cloud._update_device_data = AsyncMock()  # type: ignore[method-assign]
+
+        with self.assertRaises(InvalidRequestException):
+            await cloud.set_output_aux1(device, True)
+        self.assertIsNone(cloud._pool.primary.active_device)
+
+        await cloud.set_output_aux1(device, True)
+
+        requests = [call.args[0] for call in cloud._call.call_args_list]
+        self.assertEqual(requests.count(Request.CHANGE_DEVICE), 2)
+
+    async def test_login_resets_selected_device(self) -> None:
+        api = FakeApi({"1": 11})
+        cloud = WebastoConnect("user", "pass")
+        cloud._session = api  # type: ignore[assignment]
+        await cloud.connect()
+        self.assertEqual(cloud._pool.primary.active_device, "1")
+
+        await cloud._login(cloud._pool.primary)
+
+        self.assertIsNone(cloud._pool.primary.active_device)
+
+
+class TestConcurrentReads(IsolatedAsyncioTestCase):
+    """Validate the read pipeline of a device refresh."""
+
+    async def test_device_refresh_sends_reads_concurrently(self) -> None:
+        api = FakeApi({"1": 11})
+        cloud = WebastoConnect("user", "pass")
+        cloud._session = api  # type: ignore[assignment]
+        cloud.devices["1"] = WebastoDevice("1", "Heater")  # type: ignore[index]
+
+        await cloud.update(device_id="1")
+
+        self.assertEqual(api.max_in_flight, 3)
+        self.assertEqual(cloud.devices["1"].temperature, 11)
+
+    async def test_sequential_reads_can_be_configured(self) -> None:
+        api = FakeApi({"1": 11})
+        cloud = WebastoConnect("user", "pass", concurrent_reads=False)
+        cloud._session = api  # type: ignore[assignment]
+        cloud.devices["1"] = WebastoDevice("1", "Heater")  # type: ignore[index]
+
+        await cloud.update(device_id="1")
+
+        self.assertEqual(api.max_in_flight, 1)
+
+    async def test_failed_read_cancels_remaining_reads(self) -> None:
+        cloud = WebastoConnect("user", "pass")
+        cloud.devices["1"] = WebastoDevice("1", "Heater")  # type: ignore[index]
+        slow_read_cancelled = asyncio.Event()
+
+        async def call(api_type: Request, *_: object) -> dict | None:
+            if api_type == Request.GET_SETTINGS:
+                raise InvalidRequestException("boom")
+            if api_type == Request.GET_DATA:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    slow_read_cancelled.set()
+                    raise
+            return None
+
+        cloud._call = AsyncMock(side_effect=call)  # type: ignore[method-assign]
+
+        with self.assertRaises(InvalidRequestException):
+            await cloud.update(device_id="1")
+
+        self.assertTrue(slow_read_cancelled.is_set())
+
+    async def test_failed_read_is_raised_while_earlier_read_is_pending(self) -> None:
+        cloud = WebastoConnect("user", "pass")
+        cloud.devices["1"] = WebastoDevice("1", "Heater")  # type: ignore[index]
+
+        async def call(api_type: Request, *_: object) -> dict | None:
+            if api_type == Request.GET_SETTINGS:
+                await asyncio.sleep(10)
+            if api_type == Request.GET_DATA:
+                raise InvalidRequestException("boom")
+            return None
+
+        cloud._call = AsyncMock(side_effect=call)  # type: ignore[method-assign]
+
+        # The cancelled settings read must not mask the failed data read
+        with self.assertRaises(InvalidRequestException):
+            await cloud.update(device_id="1", force=True)
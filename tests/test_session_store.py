@@ -0,0 +1,117 @@
+"""Tests for persisted API sessions."""
+
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase
+
+from fakes import FakeApi
+
+from pywebasto import FileSessionStore, SessionStore, WebastoConnect
+
+
+class TestFileSessionStore(IsolatedAsyncioTestCase):
+    """Validate the file backed session store."""
+
+    async def test_round_trip_per_account(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "nested" / "sessions.json"
+            store = FileSessionStore(path)
+
+            await store.save("a@example.com", [{"hssess": "1"}])
+            await store.save("b@example.com", [{"hssess": "2"}])
+            await store.clear("b@example.com")
+
+            self.assertEqual(
+                await FileSessionStore(path).load("a@example.com"), [{"hssess": "1"}]
+            )
+            self.assertEqual(await store.load("b@example.com"), [])
+            self.assertNotIn("example.com", path.read_text())
+            if os.name == "posix":
+                self.assertEqual(stat.S_IMODE(path.stat().st_mode), 0o600)
+
+    async def test_missing_or_corrupt_file_is_empty(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "sessions.json"
+            self.assertEqual(await FileSessionStore(path).load("a"), [])
+
+            path.write_text("{not json")
+
+            self.assertEqual(await FileSessionStore(path).load("a"), [])
+
+    def test_import_does_not_need_a_home_directory(self) -> None:
+        # Without HOME or a passwd entry, "~" cannot be expanded
+        code = "import os.path; os.path.expanduser = str; import pywebasto"
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).resolve().parents[1],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(
+            FileSessionStore().path,
+            Path.home() / ".cache" / "pywebasto" / "sessions.json",
+        )
+
+    def test_incomplete_store_cannot_be_created(self) -> None:
+        class LoadOnlyStore(SessionStore):
+            async def load(self, account: str) -> list:
+                return []
+
+        with self.assertRaises(TypeError):
+            LoadOnlyStore()  # type: ignore[abstract]
+
+
+class TestClientSessionStore(IsolatedAsyncioTestCase):
+    """Validate session reuse on connect."""
+
+    async def asyncSetUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = Path(self._directory.name) / "sessions.json"
+
+    async def asyncTearDown(self) -> None:
+        self._directory.cleanup()
+
+    def _client(self, api: FakeApi) -> WebastoConnect:
+        cloud = WebastoConnect("user", "pass", session_store=self.path)
+        cloud._session = api  # type: ignore[assignment]
+        return cloud
+
+    async def test_stored_session_skips_login(self) -> None:
+        first = FakeApi()
+        await self._client(first).connect()
+        second = FakeApi(valid=set(first.valid))
+
+        cloud = self._client(second)
+        await cloud.connect()
+
+        self.assertEqual(first.logins, 1)
+        self.assertEqual(second.logins, 0)
+        self.assertEqual(cloud._hssess, "token-1")
+
+    async def test_rejected_session_falls_back_to_login(self) -> None:
+        await self._client(FakeApi()).connect()
+        api = FakeApi()
+        api.logins = 10
+
+        cloud = self._client(api)
+        await cloud.connect()
+
+        self.assertEqual(api.logins, 11)
+        stored = await FileSessionStore(self.path).load("user")
+        self.assertEqual(stored[0]["hssess"], "token-11")
+
+    async def test_without_store_always_logs_in(self) -> None:
+        api = FakeApi(valid={"token-1"})
+        cloud = WebastoConnect("user", "pass")
+        cloud._session = api  # type: ignore[assignment]
+
+        await cloud.connect()
+
+        self.assertEqual(api.logins, 1)
@@ -0,0 +1,148 @@
+"""Tests for batched settings changes."""
+
+import json
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import AsyncMock
+
+from pywebasto import SettingsTransaction, WebastoConnect
+from pywebasto.device import WebastoDevice
+from pywebasto.enums import Outputs, Request
+
+
+def _device() -> WebastoDevice:
+    device = WebastoDevice("1", "Heater")
+    device.timeout_heat = 3600
+    device.timeout_vent = 1800
+    return device
+
+
+class TestSettingsTransaction(TestCase):
+    """Validate merging of settings changes."""
+
+    def test_changes_are_merged_into_one_payload(self) -> None:
+        transaction = SettingsTransaction(_device())
+
+        transaction.set_low_voltage_cutoff(11.5)
+        transaction.set_temperature_compensation(-1.0)
+        transaction.set_aux_timeout(900, Outputs.AUX2)
+        payload = transaction.payload()
+
+        self.assertEqual(
+            payload["device_settings"],
+            {
+                "low_voltage_cutoff": 11.5,
+                "ext_temp_comp": -1.0,
+                "OUT2_function": "enabled",
+                "OUT2_timeout_on": True,
+                "OUT2_timeout_h": 0,
+                "OUT2_timeout_min": 15,
+            },
+        )
+        self.assertTrue(payload["service_settings"]["OUT2_on"])
+        self.assertIsNone(payload["location_events"])
+
+    def test_later_changes_win(self) -> None:
+        transaction = SettingsTransaction(_device())
+
+        transaction.set_low_voltage_cutoff(11.5).set_low_voltage_cutoff(11.8)
+
+        self.assertEqual(
+            transaction.payload()["device_settings"], {"low_voltage_cutoff": 11.8}
+        )
+
+    def test_main_timeout_uses_pending_ventilation_mode(self) -> None:
+        device = _device()
+        transaction = SettingsTransaction(device)
+
+        transaction.ventilation_mode(True)
+        transaction.set_main_timeout(heater=7200)
+        payload = transaction.payload()
+
+        # Building the payload leaves the device alone, apply() changes it
+        self.assertEqual(device.timeout_heat, 3600)
+        self.assertEqual(payload["device_settings"]["OUTH_timeout_h"], 2)
+        self.assertEqual(payload["device_settings"]["OUTV_timeout_min"], 30)
+        self.assertTrue(payload["service_settings"]["OUTV_on"])
+        self.assertFalse(payload["service_settings"]["OUTH_on"])
+        transaction.apply()
+        self.assertEqual(device.timeout_heat, 7200)
+        self.assertTrue(device.is_ventilation)
+
+    def test_empty_transaction_is_false(self) -> None:
+        self.assertFalse(SettingsTransaction(_device()))
+
+
+class TestClientSettings(IsolatedAsyncioTestCase):
+    """Validate committing settings transactions."""
+
+    def _client(self) -> WebastoConnect:
+        cloud = WebastoConnect("user", "pass")
+        cloud.devices["1"] = _device()  # type: ignore[index]
+        cloud._call = AsyncMock(return_value=None)  # type: ignore[method-assign]
+        cloud._update_device_data = AsyncMock()  # type: ignore[method-assign]
+        return cloud
+
+    async def test_commit_sends_one_post_and_one_refresh(self) -> None:
+        cloud = self._client()
+
+        async with cloud.settings(cloud.devices["1"]) as transaction:
+            transaction.set_low_voltage_cutoff(11.5)
+            transaction.set_temperature_compensation(-1.0)
+            transaction.set_main_timeout(heater=7200)
+
+        requests = [call.args[0] for call in cloud._call.await_args_list]
+        self.assertEqual(requests, [Request.CHANGE_DEVICE, Request.POST_SETTING])
+        payload = json.loads(cloud._call.await_args_list[1].args[1])
+        self.assertEqual(payload["device_settings"]["low_voltage_cutoff"], 11.5)
+        self.assertEqual(payload["device_settings"]["OUTH_timeout_h"], 2)
+        cloud._update_device_data.assert_awaited_once_with("1", switch_device=False)
+
+    async def test_nothing_is_sent_on_error_or_without_changes(self) -> None:
+        cloud = self._client()
+
+        device = cloud.devices["1"]
+        device.timeout_aux1 = 600
+        with self.assertRaises(RuntimeError):
+            async with cloud.settings(device) as transaction:
+                transaction.set_low_voltage_cutoff(11.5)
+                transaction.set_aux_timeout(7200, Outputs.AUX1)
+                transaction.set_main_timeout(heater=7200)
+                raise RuntimeError("abort")
+        async with cloud.settings(cloud.devices["1"]):
+            pass
+
+        cloud._call.assert_not_awaited()
+        cloud._update_device_data.assert_not_awaited()
+        self.assertEqual((device.timeout_aux1, device.timeout_heat), (600, 3600))
+
+    async def test_timeouts_are_applied_once_sent(self) -> None:
+        cloud = self._client()
+        device = cloud.devices["1"]
+
+        async with cloud.settings(device) as transaction:
+            transaction.set_aux_timeout(7200, Outputs.AUX2)
+            transaction.set_main_timeout(ventilation=900)
+            self.assertEqual((device.timeout_aux2, device.timeout_vent), (0, 1800))
+
+        self.assertEqual((device.timeout_aux2, device.timeout_vent), (7200, 900))
+
+        cloud._call.side_effect = RuntimeError("rejected")
+        with self.assertRaises(RuntimeError):
+            await cloud.set_aux_timeout(device, 60, Outputs.AUX2)
+        self.assertEqual(device.timeout_aux2, 7200)
+
+    async def test_single_setters_keep_their_payload(self) -> None:
+        cloud = self._client()
+
+        await cloud.set_temperature_compensation(cloud.devices["1"], -2.0)
+
+        payload = json.loads(cloud._call.await_args_list[-1].args[1])
+        self.assertEqual(
+            payload,
+            {
+                "device_settings": {"ext_temp_comp": -2.0},
+                "service_settings": {},
+                "location_events": None,
+                "air_heater": {},
+            },
+        )
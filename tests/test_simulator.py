@@ -0,0 +1,108 @@
+"""Tests for the local API simulator."""
+
+from unittest import IsolatedAsyncioTestCase
+
+from pywebasto import SimpleTimer, WebastoConnect
+from pywebasto.exceptions import TooManyRequestsException, UnauthorizedException
+from pywebasto.simulator import WebastoSimulator
+
+
+class TestSimulator(IsolatedAsyncioTestCase):
+    """Run the client against the simulator over HTTP."""
+
+    async def asyncSetUp(self) -> None:
+        self.simulator = WebastoSimulator(devices=3, username="user", password="pass")
+        await self.simulator.start()
+        self.webasto = WebastoConnect(
+            "user", "pass", refresh_interval=0, api_url=self.simulator.api_url
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.webasto.close()
+        await self.simulator.stop()
+
+    async def test_connect_discovers_fleet(self) -> None:
+        await self.webasto.connect()
+
+        self.assertEqual(len(self.webasto.devices), 3)
+        device = next(iter(self.webasto.devices.values()))
+        self.assertEqual(device.temperature, 18)
+        self.assertEqual(device.voltage, 12.4)
+        self.assertEqual(device.timeout_heat, 1800)
+        self.assertFalse(device.output_main)
+
+    async def test_commands_act_on_the_session_device(self) -> None:
+        await self.webasto.connect()
+        first, second = list(self.webasto.devices.values())[:2]
+
+        await self.webasto.set_output_main(second, True)
+        await self.webasto.set_output_aux1(first, True)
+
+        self.assertEqual(self.simulator.devices[second.device_id].outputs["OUTH"], "ON")
+        self.assertEqual(self.simulator.devices[first.device_id].outputs["OUTH"], "OFF")
+        self.assertTrue(second.output_main)
+        self.assertIsNotNone(second.output_main_ontime)
+        self.assertTrue(first.output_aux1)
+
+    async def test_settings_and_timers_round_trip(self) -> None:
+        await self.webasto.connect()
+        device = next(iter(self.webasto.devices.values()))
+
+        await self.webasto.ventilation_mode(device, True)
+        await self.webasto.set_low_voltage_cutoff(device, 11.8)
+        await self.webasto.save_timers(
+            device, [SimpleTimer(start=420, duration=1800, repeat=31)]
+        )
+
+        self.assertTrue(device.is_ventilation)
+        self.assertEqual(device.low_voltage_cutoff, 11.8)
+        timers = await self.webasto.get_simple_timers(device)
+        self.assertEqual(timers[0].start, 420)
+
+    async def test_wrong_credentials_are_rejected(self) -> None:
+        webasto = WebastoConnect("user", "wrong", api_url=self.simulator.api_url)
+        with self.assertRaises(UnauthorizedException):
+            await webasto.connect()
+        await webasto.close()
+
+    async def test_expired_sessions_are_logged_in_again(self) -> None:
+        await self.webasto.connect()
+        self.simulator.expire_sessions()
+        self.simulator.reset_counters()
+
+        await self.webasto.update(force=True)
+
+        self.assertEqual(self.simulator.requests["/login"], 1)
+        self.assertEqual(self.simulator.responses[401], 1)
+
+    async def test_throttling_answers_429(self) -> None:
+        await self.webasto.connect()
+        self.simulator.rate_limit = 0.1
+        self.simulator.burst = 0
+        self.simulator._tokens = 0
+
+        with self.assertRaises(TooManyRequestsException):
+            await self.webasto.update(force=True)
+        self.assertEqual(self.simulator.responses[429], 1)
+
+
+class TestSimulatorFaults(IsolatedAsyncioTestCase):
+    """Fault injection of the simulator."""
+
+    async def test_error_rate_is_retried_for_reads(self) -> None:
+        async with WebastoSimulator(error_rate=0.3, seed=1) as simulator:
+            webasto = WebastoConnect("user", "pass", api_url=simulator.api_url)
+            webasto._backoff_seconds = lambda attempt: 0
+            try:
+                await webasto.connect()
+            finally:
+                await webasto.close()
+
+        self.assertGreater(simulator.responses[500], 0)
+        self.assertEqual(len(webasto.devices), 1)
+
+    def test_invalid_options_are_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            WebastoSimulator(devices=0)
+        with self.assertRaises(ValueError):
+            WebastoSimulator(error_rate=2)
@@ -0,0 +1,119 @@
+"""Tests for coalescing of concurrent identical requests."""
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+
+from pywebasto import WebastoConnect
+from pywebasto.device import WebastoDevice
+from pywebasto.enums import Request
+from pywebasto.exceptions import InvalidRequestException
+from pywebasto.singleflight import SingleFlight
+
+
+class TestSingleFlight(IsolatedAsyncioTestCase):
+    """Validate the in-flight registry."""
+
+    async def test_concurrent_callers_share_one_run(self) -> None:
+        flights = SingleFlight()
+
+        async def work() -> str:
+            await asyncio.sleep(0.01)
+            return "done"
+
+        func = AsyncMock(side_effect=work)
+
+        results = await asyncio.gather(*(flights.do("key", func) for _ in range(5)))
+
+        self.assertEqual(results, ["done"] * 5)
+        func.assert_awaited_once()
+        self.assertFalse(flights.in_flight("key"))
+
+    async def test_exception_is_shared_with_waiting_callers(self) -> None:
+        flights = SingleFlight()
+
+        async def fail() -> None:
+            await asyncio.sleep(0.01)
+            raise InvalidRequestException("boom")
+
+        results = await asyncio.gather(
+            flights.do("key", fail), flights.do("key", fail), return_exceptions=True
+        )
+
+        self.assertTrue(all(isinstance(r, InvalidRequestException) for r in results))
+
+    async def test_waiting_caller_takes_over_when_leader_is_cancelled(self) -> None:
+        flights = SingleFlight()
+        calls = 0
+
+        async def work() -> int:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        leader = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        self.assertEqual(await follower, 2)
+
+
+class TestClientCoalescing(IsolatedAsyncioTestCase):
+    """Validate that concurrent identical reads share one network result."""
+
+    def _client(self, call_delay: float = 0.01) -> WebastoConnect:
+        cloud = WebastoConnect("user", "pass", refresh_interval=0)
+        cloud.devices["1"] = WebastoDevice("1", "Heater")  # type: ignore[index]
+
+        async def call(api_type: Request, *_: object, **__: object) -> dict | None:
+            await asyncio.sleep(call_delay)
+            if api_type == Request.GET_SETTINGS:
+                return {"settings_tab": []}
+            if api_type == Request.GET_DATA:
+                return {
+                    "temperature": "18C",
+                    "voltage": "12.4V",
+                    "location": {"state": "OFF"},
+                    "outputs": [],
+                }
+            if api_type == Request.GET_DATA_NOPOLL:
+                return {"subscription": {"expiration": 1766325670}, "outputs": []}
+            return None
+
+        cloud._call = AsyncMock(side_effect=call)  # type: ignore[method-assign]
+        return cloud
+
+    async def test_concurrent_get_timers_share_one_read(self) -> None:
+        cloud = self._client()
+        device = cloud.devices["1"]
+
+        await asyncio.gather(*(cloud.get_timers(device) for _ in range(10)))
+
+        self.assertEqual(
+            [call.args[0] for call in cloud._call.call_args_list],
+            [Request.CHANGE_DEVICE, Request.GET_DATA_NOPOLL],
+        )
+
+    async def test_concurrent_device_updates_share_one_refresh(self) -> None:
+        cloud = self._client()
+
+        await asyncio.gather(*(cloud.update(device_id="1") for _ in range(10)))
+
+        self.assertEqual(cloud._call.await_count, 4)
+
+    async def test_reads_after_a_write_do_not_join_older_reads(self) -> None:
+        cloud = self._client(call_delay=0.05)
+        device = cloud.devices["1"]
+        first = asyncio.create_task(cloud.get_timers(device))
+        # Let the first read pass CHANGE_DEVICE and go in flight
+        await asyncio.sleep(0.07)
+
+        cloud._record_write(Request.SAVE_TIMERS, cloud._pool.primary)
+        second = asyncio.create_task(cloud.get_timers(device))
+        await asyncio.gather(first, second)
+
+        requests = [call.args[0] for call in cloud._call.call_args_list]
+        self.assertEqual(requests.count(Request.GET_DATA_NOPOLL), 2)
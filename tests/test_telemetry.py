@@ -0,0 +1,153 @@
+"""Tests for the fixed-memory telemetry history."""
+
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from pywebasto import DeviceHistory, TelemetrySample, WebastoConnect
+from pywebasto.simulator import WebastoSimulator
+
+START = 1_699_999_200.0  # Start of an hour
+
+
+def _sample(
+    timestamp: float, temperature: float = 20, voltage: float = 12.6, main: bool = False
+) -> TelemetrySample:
+    return TelemetrySample(timestamp, temperature, voltage, main, False, True)
+
+
+class TestDeviceHistory(TestCase):
+    """Ring buffer, downsampling and trend queries."""
+
+    def test_samples_are_kept_in_a_fixed_size_ring(self) -> None:
+        history = DeviceHistory(samples=5)
+        for index in range(12):
+            history.add(_sample(START + index * 15, temperature=index))
+
+        samples = history.samples()
+        self.assertEqual(len(history), 5)
+        self.assertEqual([sample.temperature for sample in samples], [7, 8, 9, 10, 11])
+        self.assertEqual(samples[-1], _sample(START + 11 * 15, temperature=11))
+        self.assertEqual(
+            [sample.timestamp for sample in history.samples(since=START + 150)],
+            [START + 150, START + 165],
+        )
+
+    def test_samples_are_aggregated_per_minute_and_hour(self) -> None:
+        history = DeviceHistory(samples=2)
+        for index in range(8):
+            history.add(
+                _sample(
+                    START + index * 15,
+                    temperature=10 + index,
+                    voltage=12.0 + index / 10,
+                    main=index < 2,
+                )
+            )
+
+        first, second = history.buckets("minute")
+        self.assertEqual((first.start, first.width, first.count), (START, 60, 4))
+        self.assertEqual(second.start, START + 60)
+        self.assertEqual(
+            (first.temperature_min, first.temperature_max, first.temperature_mean),
+            (10, 13, 11.5),
+        )
+        self.assertAlmostEqual(second.voltage_mean, 12.55)
+        self.assertEqual((first.output_main_on, second.output_main_on), (0.5, 0.0))
+        self.assertEqual(first.output_aux2_on, 1.0)
+
+        (hour,) = history.buckets("hour")
+        self.assertEqual((hour.start, hour.count, hour.temperature_max), (START, 8, 17))
+        self.assertEqual(history.buckets("minute", since=START + 60), [second])
+        with self.assertRaises(ValueError):
+            history.buckets("day")
+
+    def test_bucket_rings_are_bounded(self) -> None:
+        history = DeviceHistory(samples=1, minutes=3, hours=2)
+        for minute in range(180):
+            history.add(_sample(START + minute * 60))
+
+        self.assertEqual(
+            [bucket.start for bucket in history.buckets("minute")],
+            [START + 177 * 60, START + 178 * 60, START + 179 * 60],
+        )
+        self.assertEqual(
+            [bucket.start for bucket in history.buckets("hour")],
+            [START + 3600, START + 7200],
+        )
+
+    def test_drain_rate_uses_coarser_buckets_for_long_windows(self) -> None:
+        history = DeviceHistory(samples=10)
+        # 0.1 V lost per hour, sampled every 15 seconds for 6 hours
+        for index in range(6 * 240):
+            history.add(_sample(START + index * 15, voltage=12.6 - index / 2400))
+        now = START + 6 * 3600
+
+        self.assertAlmostEqual(history.drain_rate(120, now=now), 0.1)
+        self.assertAlmostEqual(history.drain_rate(3 * 3600, now=now), 0.1)
+        self.assertAlmostEqual(history.trend("temperature", 3600, now=now), 0.0)
+        with self.assertRaises(ValueError):
+            history.trend("humidity", 60)
+
+    def test_memory_grows_with_kept_rows_only(self) -> None:
+        history = DeviceHistory(samples=1000, minutes=1000, hours=1000)
+        for index in range(3):
+            history.add(_sample(START + index * 15))
+
+        self.assertEqual(len(history._samples._columns[0]), 3)
+        self.assertEqual(len(history._resolutions["minute"]._ring._columns[0]), 1)
+
+    def test_resolutions_can_be_turned_off(self) -> None:
+        history = DeviceHistory(samples=10, minutes=0, hours=0)
+        for index in range(20):
+            history.add(_sample(START + index * 15, voltage=12.6 - index / 100))
+
+        with self.assertRaises(ValueError):
+            history.buckets("minute")
+        # Trends fall back to the raw samples
+        self.assertAlmostEqual(history.drain_rate(3600, now=START + 300), 2.4)
+
+    def test_trend_needs_two_points(self) -> None:
+        history = DeviceHistory()
+        self.assertIsNone(history.drain_rate(3600, now=START))
+        history.add(_sample(START))
+        self.assertIsNone(history.drain_rate(3600, now=START))
+
+
+class TestClientHistory(IsolatedAsyncioTestCase):
+    """Telemetry history recorded by the client on each refresh."""
+
+    async def test_refreshes_are_recorded_when_enabled(self) -> None:
+        async with WebastoSimulator(devices=2) as simulator:
+            for history_samples in (None, 3):
+                webasto = WebastoConnect(
+                    "user",
+                    "pass",
+                    refresh_interval=0,
+                    api_url=simulator.api_url,
+                    history_samples=history_samples,
+                    history_minutes=0,
+                )
+                try:
+                    await webasto.connect()
+                    for _ in range(4):
+                        await webasto.update(force=True)
+                finally:
+                    await webasto.close()
+
+                device_id = next(iter(simulator.devices))
+                history = webasto.history(device_id)
+                if history_samples is None:
+                    self.assertIsNone(history)
+                    continue
+
+                self.assertEqual(len(history), 3)
+                sample = history.samples()[-1]
+                device = webasto.devices[device_id]
+                self.assertEqual(
+                    (sample.temperature, sample.voltage),
+                    (device.temperature, device.voltage),
+                )
+                self.assertEqual(
+                    sum(bucket.count for bucket in history.buckets("hour")), 5
+                )
+                with self.assertRaises(ValueError):
+                    history.buckets("minute")
@@ -0,0 +1,166 @@
+"""Tests for request tracing."""
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from pywebasto import SpanCollector, TraceHook, WebastoConnect
+from pywebasto.simulator import WebastoSimulator
+from pywebasto.tracing import Tracer
+
+
+class TestTracer(TestCase):
+    """Unit tests for span nesting."""
+
+    def test_spans_nest_and_reach_hooks(self) -> None:
+        collector = SpanCollector()
+        tracer = Tracer([collector])
+
+        with tracer.span("outer", device_id="1") as outer:
+            with tracer.span("inner"):
+                tracer.annotate(status=200)
+
+        self.assertEqual([span.name for span in collector.spans], ["inner", "outer"])
+        self.assertEqual(collector.roots(), [outer])
+        self.assertEqual(outer.children[0].attributes, {"status": 200})
+        self.assertGreaterEqual(outer.duration, outer.children[0].duration)
+        self.assertIsNone(tracer.current)
+
+    def test_errors_are_recorded(self) -> None:
+        collector = SpanCollector()
+        tracer = Tracer([collector])
+
+        with self.assertRaises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError
+
+        self.assertEqual(collector.spans[0].error, "ValueError")
+
+    def test_without_hooks_no_spans_are_created(self) -> None:
+        tracer = Tracer()
+
+        with tracer.span("ignored") as span:
+            tracer.annotate(status=200)
+            tracer.record("phase", 0.0)
+
+        self.assertIsNone(span)
+        self.assertFalse(tracer.enabled)
+
+    def test_hooks_see_span_start(self) -> None:
+        started = []
+
+        class _Hook(TraceHook):
+            def on_span_start(self, span) -> None:
+                started.append((span.name, span.end))
+
+        tracer = Tracer([_Hook()])
+        with tracer.span("operation"):
+            pass
+
+        self.assertEqual(started, [("operation", None)])
+
+    def test_collector_is_bounded(self) -> None:
+        collector = SpanCollector(max_spans=2)
+        tracer = Tracer([collector])
+
+        for index in range(5):
+            with tracer.span("step", index=index):
+                pass
+
+        self.assertEqual([span.attributes["index"] for span in collector.spans], [3, 4])
+        self.assertEqual(collector.summary()["step"]["count"], 2)
+
+
+class TestClientTracing(IsolatedAsyncioTestCase):
+    """Spans emitted by the client against the simulator."""
+
+    async def test_update_is_broken_down_into_phases(self) -> None:
+        collector = SpanCollector()
+        async with WebastoSimulator(devices=2) as simulator:
+            webasto = WebastoConnect(
+                "user", "pass", api_url=simulator.api_url, trace_hooks=[collector]
+            )
+            try:
+                await webasto.connect()
+                collector.clear()
+                await webasto.update(force=True)
+            finally:
+                await webasto.close()
+
+        (update,) = collector.roots()
+        self.assertEqual(update.name, "update")
+        self.assertEqual(len(update.find("lock_wait")), 1)
+        self.assertEqual(len(update.find("refresh_device")), 2)
+        self.assertEqual(len(update.find("parse")), 2)
+        requests = [span.attributes["request"] for span in update.find("request")]
+        self.assertEqual(requests.count("CHANGE_DEVICE"), 1)
+        self.assertEqual(requests.count("GET_SETTINGS"), 2)
+        for attempt in update.find("attempt"):
+            self.assertEqual(attempt.attributes["status"], 200)
+            self.assertEqual(len(attempt.find("ttfb")), 1)
+
+    async def test_connection_phases_are_traced(self) -> None:
+        collector = SpanCollector()
+        async with WebastoSimulator() as simulator:
+            webasto = WebastoConnect(
+                "user", "pass", api_url=simulator.api_url, trace_hooks=[collector]
+            )
+            try:
+                await webasto.connect()
+            finally:
+                await webasto.close()
+
+        (connect,) = collector.find("connect")
+        self.assertGreaterEqual(len(connect.find("connection")), 1)
+        self.assertTrue(
+            any(span.attributes.get("connection_reused") for span in connect.walk())
+        )
+
+    async def test_retries_show_backoff(self) -> None:
+        collector = SpanCollector()
+        async with WebastoSimulator(error_rate=0.3, seed=1) as simulator:
+            webasto = WebastoConnect(
+                "user", "pass", api_url=simulator.api_url, trace_hooks=[collector]
+            )
+            webasto._backoff_seconds = lambda attempt: 0
+            try:
+                await webasto.connect()
+            finally:
+                await webasto.close()
+
+        failed = [
+            span
+            for span in collector.find("attempt")
+            if span.attributes["status"] == 500
+        ]
+        self.assertEqual(len(failed), simulator.responses[500])
+        self.assertEqual(len(collector.find("backoff")), len(failed))
+        for span in failed:
+            self.assertEqual(span.children[-1].name, "backoff")
+
+    async def test_concurrent_operations_get_their_own_trees(self) -> None:
+        collector = SpanCollector()
+        async with WebastoSimulator(devices=2) as simulator:
+            webasto = WebastoConnect(
+                "user",
+                "pass",
+                sessions=2,
+                api_url=simulator.api_url,
+                trace_hooks=[collector],
+            )
+            try:
+                await webasto.connect()
+                collector.clear()
+                first, second = webasto.devices.values()
+                await asyncio.gather(
+                    webasto.set_output_aux1(first, True),
+                    webasto.set_output_aux1(second, True),
+                )
+            finally:
+                await webasto.close()
+
+        roots = collector.find("set_outputs")
+        self.assertEqual(len(roots), 2)
+        for root in roots:
+            self.assertIsNone(root.parent)
+            devices = {span.attributes["device_id"] for span in root.find("parse")}
+            self.assertEqual(devices, {root.attributes["device_id"]})